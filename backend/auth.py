@@ -1,17 +1,98 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Callable, Dict, NamedTuple, Optional, Set, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import DuplicateKeyError
+import asyncio
+import hashlib
 import os
+import time
+import uuid
+
+from database import get_db
+from metrics import PASSWORD_HASH_LATENCY, registry
 
 SECRET_KEY = os.environ.get("SECRET_KEY", "your-secret-key-change-this-in-production")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_HOURS = 24
+# Tickets that open an event stream end up in URLs (and access logs), so they
+# are only good for one stream and expire quickly
+STREAM_TICKET_SECONDS = 30
+STREAM_TICKET_TYPE = "stream"
+
+# Changing BCRYPT_ROUNDS re-hashes each admin's password on their next login
+BCRYPT_ROUNDS = int(os.environ.get("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", "2"))
+PASSWORD_HASH_QUEUE_LIMIT = int(os.environ.get("PASSWORD_HASH_QUEUE_LIMIT", "32"))
+TOKEN_CACHE_SIZE = int(os.environ.get("TOKEN_CACHE_SIZE", "1024"))
+# How stale the in-memory revoked-token and admin sets may get
+AUTH_STATE_REFRESH_SECONDS = float(os.environ.get("AUTH_STATE_REFRESH_SECONDS", "30"))
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
+
+
+class PasswordWorkerPool:
+    """Bounded thread pool for bcrypt so hashing never blocks the event loop.
+
+    Work beyond the running workers waits in a queue of at most `queue_limit`
+    jobs; further requests are rejected with 503 instead of piling up.
+    """
+
+    def __init__(self, workers: int, queue_limit: int):
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self.pending = 0
+        self.rejected = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        if self.pending >= self.workers + self.queue_limit:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many authentication requests, please retry",
+                headers={"Retry-After": "1"},
+            )
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self.pending -= 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "workers": self.workers,
+            "in_progress": min(self.pending, self.workers),
+            "queue_depth": max(self.pending - self.workers, 0),
+            "queue_limit": self.queue_limit,
+            "rejected": self.rejected,
+        }
+
+
+password_pool = PasswordWorkerPool(PASSWORD_HASH_WORKERS, PASSWORD_HASH_QUEUE_LIMIT)
+
+registry.gauge("password_pool_in_progress", "bcrypt jobs running.",
+               function=lambda: password_pool.stats()["in_progress"])
+registry.gauge("password_pool_queue_depth", "bcrypt jobs waiting for a worker.",
+               function=lambda: password_pool.stats()["queue_depth"])
+registry.gauge("password_pool_rejected", "bcrypt jobs rejected because the queue was full.",
+               function=lambda: password_pool.rejected)
+
+
+def _timed(operation: str, func: Callable[..., Any], *args: Any) -> Any:
+    """Run func on the calling (worker) thread, recording its duration."""
+    start = time.perf_counter()
+    try:
+        return func(*args)
+    finally:
+        PASSWORD_HASH_LATENCY.observe(time.perf_counter() - start, operation=operation)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -24,6 +105,22 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password on the bcrypt pool.
+
+    Returns (valid, new_hash); new_hash is set when the stored hash uses
+    outdated parameters and should be replaced.
+    """
+    return await password_pool.run(
+        _timed, "verify", pwd_context.verify_and_update, plain_password, hashed_password
+    )
+
+
+async def hash_password_async(password: str) -> str:
+    """Hash a password on the bcrypt pool."""
+    return await password_pool.run(_timed, "hash", pwd_context.hash, password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token."""
     to_encode = data.copy()
@@ -31,7 +128,8 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(hours=ACCESS_TOKEN_EXPIRE_HOURS)
-    to_encode.update({"exp": expire})
+    # jti identifies the token for revocation
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
@@ -49,15 +147,196 @@ def decode_token(token: str) -> dict:
         )
 
 
-async def get_current_admin(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    """Dependency to verify admin authentication."""
-    token = credentials.credentials
-    payload = decode_token(token)
-    username: str = payload.get("sub")
-    if username is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-            headers={"WWW-Authenticate": "Bearer"},
+class VerifiedToken(NamedTuple):
+    username: str
+    jti: Optional[str]
+    exp: float
+
+
+class TokenCache:
+    """Bounded LRU of tokens whose signature has already been verified.
+
+    Keyed by a hash of the token so raw tokens are not kept in memory;
+    entries are dropped once the token expires.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, VerifiedToken]" = OrderedDict()
+
+    @staticmethod
+    def key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[VerifiedToken]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.exp <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def set(self, key: str, entry: VerifiedToken) -> VerifiedToken:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        return entry
+
+    def discard(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+
+class AuthState:
+    """In-memory copy of revoked token ids and active admin usernames.
+
+    Refreshed from Mongo at most every AUTH_STATE_REFRESH_SECONDS, so
+    revocations made on other workers apply within that interval.
+    """
+
+    def __init__(self):
+        self.revoked_jtis: Set[str] = set()
+        self.active_admins: Set[str] = set()
+        # Usernames still missing after a forced refresh (deleted or disabled
+        # admins); not force-refreshed again until the next scheduled refresh
+        self.unknown_admins: Set[str] = set()
+        self.loaded_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def _fresh(self) -> bool:
+        return time.monotonic() - self.loaded_at < AUTH_STATE_REFRESH_SECONDS
+
+    async def refresh(self, db: AsyncIOMotorDatabase, force: bool = False) -> None:
+        # Checked without the lock first so requests only queue on it when a
+        # refresh is actually due
+        if not force and self._fresh():
+            return
+        seen = self.loaded_at
+        async with self._lock:
+            # Another request refreshed while this one waited for the lock
+            if self.loaded_at != seen or (not force and self._fresh()):
+                return
+            revoked, admins = await asyncio.gather(
+                db.revoked_tokens.find({"exp": {"$gt": datetime.utcnow()}}, {"_id": 0, "jti": 1}).to_list(None),
+                db.admins.find({"disabled": {"$ne": True}}, {"_id": 0, "username": 1}).to_list(None),
+            )
+            self.revoked_jtis = {doc["jti"] for doc in revoked}
+            self.active_admins = {doc["username"] for doc in admins}
+            self.unknown_admins = set()
+            self.loaded_at = time.monotonic()
+
+    def admin_added(self, username: str) -> None:
+        """Let a new admin's tokens through on this worker before the next refresh."""
+        self.unknown_admins.discard(username)
+        self.active_admins.add(username)
+
+    async def is_allowed(self, db: AsyncIOMotorDatabase, token: VerifiedToken) -> bool:
+        await self.refresh(db)
+        if token.username not in self.active_admins and token.username not in self.unknown_admins:
+            # Could be an admin created since the last refresh
+            await self.refresh(db, force=True)
+            if token.username not in self.active_admins:
+                self.unknown_admins.add(token.username)
+        return token.jti not in self.revoked_jtis and token.username in self.active_admins
+
+
+token_cache = TokenCache(TOKEN_CACHE_SIZE)
+auth_state = AuthState()
+
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+async def verify_access_token(raw_token: str, db: AsyncIOMotorDatabase) -> VerifiedToken:
+    """Return the verified token, or raise 401 if invalid, revoked or its admin is disabled."""
+    key = TokenCache.key(raw_token)
+    token = token_cache.get(key)
+    if token is None:
+        payload = decode_token(raw_token)
+        username: str = payload.get("sub")
+        if username is None or payload.get("typ") == STREAM_TICKET_TYPE:
+            raise _credentials_exception()
+        token = token_cache.set(key, VerifiedToken(username, payload.get("jti"), float(payload["exp"])))
+    
+    if not await auth_state.is_allowed(db, token):
+        token_cache.discard(key)
+        raise _credentials_exception()
+    return token
+
+
+async def get_current_token(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+) -> VerifiedToken:
+    """Dependency returning the verified, unrevoked token of the caller."""
+    return await verify_access_token(credentials.credentials, db)
+
+
+def create_stream_ticket(token: VerifiedToken) -> str:
+    """Issue a single-use ticket for opening an event stream as token's admin."""
+    return create_access_token(
+        {"sub": token.username, "typ": STREAM_TICKET_TYPE, "parent": token.jti},
+        expires_delta=timedelta(seconds=STREAM_TICKET_SECONDS)
+    )
+
+
+async def redeem_stream_ticket(ticket: str, db: AsyncIOMotorDatabase) -> str:
+    """Return the admin a stream ticket was issued to, consuming the ticket.
+
+    Raises 401 if the ticket is invalid, expired or already used, or if the
+    access token it was issued from has been revoked.
+    """
+    payload = decode_token(ticket)
+    if payload.get("typ") != STREAM_TICKET_TYPE or not payload.get("sub") or not payload.get("jti"):
+        raise _credentials_exception()
+    parent = VerifiedToken(payload["sub"], payload.get("parent"), float(payload["exp"]))
+    if not await auth_state.is_allowed(db, parent):
+        raise _credentials_exception()
+    try:
+        # revoked_tokens has a unique jti index, so only the first use succeeds on any worker
+        await db.revoked_tokens.insert_one(
+            {"jti": payload["jti"], "exp": datetime.utcfromtimestamp(payload["exp"])}
         )
-    return username
\ No newline at end of file
+    except DuplicateKeyError:
+        raise _credentials_exception()
+    return payload["sub"]
+
+
+async def get_stream_admin(
+    ticket: Optional[str] = Query(None),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+) -> str:
+    """Like get_current_admin, but also accepts a stream ticket as ?ticket=.
+
+    Browsers' EventSource cannot send an Authorization header.
+    """
+    if credentials:
+        return (await verify_access_token(credentials.credentials, db)).username
+    if not ticket:
+        raise _credentials_exception()
+    return await redeem_stream_ticket(ticket, db)
+
+
+async def get_current_admin(token: VerifiedToken = Depends(get_current_token)) -> str:
+    """Dependency to verify admin authentication."""
+    return token.username
+
+
+async def revoke_token(db: AsyncIOMotorDatabase, token: VerifiedToken) -> None:
+    """Revoke a token until it expires."""
+    if token.jti is None:
+        return
+    await db.revoked_tokens.update_one(
+        {"jti": token.jti},
+        {"$set": {"jti": token.jti, "exp": datetime.utcfromtimestamp(token.exp)}},
+        upsert=True
+    )
+    auth_state.revoked_jtis.add(token.jti)
@@ -0,0 +1,117 @@
+"""Benchmark: worker cold start.
+
+Each run starts a fresh interpreter, as a newly scaled-up worker would,
+and measures:
+  - `import server` (module imports plus create_app()),
+  - lifespan startup (Mongo client, indexes, default admin, workers),
+  - the first and second request to a few endpoints.
+It also reports optional heavy modules (Pillow, httpx, boto3) loaded by
+the import; they should only load once they are used.
+
+Runs against mongomock-motor unless --mongo-url is given. The mongomock
+database starts empty on every run, so startup includes hashing the
+default admin's password.
+
+    cd backend && python benchmarks/bench_cold_start.py [--runs 10] [--mongo-url mongodb://localhost:27017]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+PATHS = ["/healthz", "/api/", "/api/projects", "/api/home"]
+LAZY_MODULES = ["PIL", "httpx", "boto3"]
+
+
+def _ms(since: float) -> float:
+    return (time.perf_counter() - since) * 1000
+
+
+def child(mongo_url: Optional[str]) -> None:
+    """One measurement, printed as a JSON line. Runs in a fresh interpreter."""
+    sys.path.insert(0, str(BACKEND_DIR))
+    started = time.perf_counter()
+    import server
+    result: Dict[str, object] = {"import": _ms(started)}
+    result["loaded"] = [name for name in LAZY_MODULES if name in sys.modules]
+
+    import asyncio
+    import httpx
+    from load_test import Lifespan
+
+    if mongo_url:
+        app = server.app
+    else:
+        from mongomock_motor import AsyncMongoMockClient
+        app = server.create_app(client_factory=lambda url: AsyncMongoMockClient())
+
+    async def run() -> None:
+        started = time.perf_counter()
+        async with Lifespan(app):
+            result["startup"] = _ms(started)
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://coldstart") as client:
+                for path in PATHS:
+                    for attempt in ("first", "second"):
+                        started = time.perf_counter()
+                        response = await client.get(path)
+                        result[f"{attempt} {path}"] = _ms(started)
+                        if response.status_code != 200:
+                            raise SystemExit(f"GET {path} returned {response.status_code}")
+
+    asyncio.run(run())
+    print(json.dumps(result))
+
+
+def measure(args: argparse.Namespace) -> dict:
+    env = dict(os.environ)
+    env["MONGO_URL"] = args.mongo_url or "mongodb://localhost:27017"
+    env["DB_NAME"] = args.db_name
+    env.setdefault("UPLOAD_DIR", tempfile.mkdtemp(prefix="sbdev-coldstart-"))
+    env.pop("SENDGRID_API_KEY", None)
+    if not args.mongo_url:
+        # mongomock has no change streams or collection storage options
+        env.setdefault("EVENTS_MODE", "poll")
+        env.setdefault("CONTACT_ARCHIVE_COMPRESSOR", "")
+    command = [sys.executable, __file__, "--child"] + (["--mongo-url", args.mongo_url] if args.mongo_url else [])
+    completed = subprocess.run(command, env=env, cwd=BACKEND_DIR, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise SystemExit(f"Run failed:\n{completed.stderr}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=1, help="runs discarded first (bytecode compilation)")
+    parser.add_argument("--mongo-url", default=None)
+    parser.add_argument("--db-name", default="sbdevstudio_coldstart")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.mongo_url)
+        return
+
+    for _ in range(args.warmup):
+        measure(args)
+    runs = [measure(args) for _ in range(args.runs)]
+
+    loaded = sorted({name for run in runs for name in run.pop("loaded")})
+    print(f"{'ms':<22}{'median':>10}{'min':>10}{'max':>10}")
+    print("-" * 52)
+    for metric in runs[0]:
+        samples: List[float] = [run[metric] for run in runs]
+        print(f"{metric:<22}{statistics.median(samples):10.2f}{min(samples):10.2f}{max(samples):10.2f}")
+    print(f"loaded by import: {', '.join(loaded) or 'none of ' + ', '.join(LAZY_MODULES)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Microbenchmark: JSON rendering and compression of list responses.
+
+Compares the previous path (jsonable_encoder + stdlib json, as FastAPI's
+JSONResponse does) with serialization.render_json, on contact and project
+lists shaped like the /api/admin/contacts and /api/projects responses.
+
+    cd backend && python benchmarks/bench_serialization.py [--items 500] [--repeat 50]
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+
+from compression import GzipCompressor, BrotliCompressor, brotli  # noqa: E402
+from models import Contact, Project  # noqa: E402
+from serialization import render_json  # noqa: E402
+
+
+def stdlib_render(content) -> bytes:
+    return json.dumps(
+        jsonable_encoder(content),
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def make_contacts(count):
+    return [
+        Contact(
+            name=f"Visitor {i}",
+            email=f"visitor{i}@example.com",
+            subject=f"Project enquiry #{i}",
+            message="Hello, I'd like to discuss a website redesign. " * 6,
+        ).dict()
+        for i in range(count)
+    ]
+
+
+def make_projects(count):
+    return [
+        Project(
+            title=f"Project {i}",
+            description="A responsive marketing site with a headless CMS. " * 4,
+            image=f"/uploads/projects/{i:064x}.png",
+            technologies=["React", "FastAPI", "MongoDB", "Tailwind"],
+            category="Web",
+            image_variants={str(w): f"/uploads/projects/{i:064x}-{w}w.webp" for w in (320, 640, 1024)},
+        ).dict()
+        for i in range(count)
+    ]
+
+
+def timed(func, payload, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(payload)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def compress(factory, body):
+    compressor = factory()
+    return compressor.compress(body) + compressor.finish()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    for name, payload in (("contacts", make_contacts(args.items)), ("projects", make_projects(args.items))):
+        assert json.loads(stdlib_render(payload)) == json.loads(render_json(payload))
+        before = timed(stdlib_render, payload, args.repeat)
+        after = timed(render_json, payload, args.repeat)
+        body = render_json(payload)
+        print(f"{name} x{args.items}")
+        print(f"  jsonable_encoder+json  {before:8.2f} ms")
+        print(f"  orjson render_json     {after:8.2f} ms  ({before / after:.1f}x)")
+        print(f"  body                   {len(body):8d} bytes")
+        encoders = [("gzip", GzipCompressor)] + ([("br", BrotliCompressor)] if brotli else [])
+        for encoding, factory in encoders:
+            elapsed = timed(lambda data: compress(factory, data), body, args.repeat)
+            size = len(compress(factory, body))
+            print(f"  {encoding:<4} {size:8d} bytes ({size / len(body):.0%})  {elapsed:8.2f} ms")
+        if brotli is None:
+            print("  br   skipped (brotli not installed)")
+
+
+if __name__ == "__main__":
+    main()
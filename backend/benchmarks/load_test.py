@@ -0,0 +1,369 @@
+"""Load test: drive a realistic request mix against the app in-process.
+
+The app from server.py is served through httpx's ASGI transport, so no
+network or uvicorn process is involved. It runs against a real MongoDB when
+--mongo-url is given, otherwise against mongomock-motor
+(`pip install mongomock-motor`). Results are per-scenario latency
+percentiles and throughput. They can be saved as a baseline and compared
+on later runs.
+
+    cd backend
+    python benchmarks/load_test.py --duration 30 --concurrency 20 --save baseline.json
+    python benchmarks/load_test.py --duration 30 --concurrency 20 --compare baseline.json
+
+Numbers from mongomock are only comparable with other mongomock runs.
+Compare like with like.
+"""
+import argparse
+import asyncio
+import io
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+DEFAULT_MIX = "list_projects=40,get_project=15,list_testimonials=15,contact=10,admin_contacts=10,login=5,upload=5"
+ADMIN_USERNAME = "admin"
+ADMIN_PASSWORD = "Admin@123"
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix = {}
+    for item in spec.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise SystemExit(f"Unknown scenario {name!r}; choose from {', '.join(SCENARIOS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def configure_environment(args: argparse.Namespace) -> None:
+    """Set env before server.py is imported; most settings are read at import."""
+    os.environ["MONGO_URL"] = args.mongo_url or "mongodb://localhost:27017"
+    os.environ["DB_NAME"] = args.db_name
+    os.environ.setdefault("UPLOAD_DIR", tempfile.mkdtemp(prefix="sbdev-load-"))
+    # The limiter would otherwise turn most contact/login traffic into 429s
+    os.environ.setdefault("RATE_LIMIT_CONTACT", "1000000/1")
+    os.environ.setdefault("RATE_LIMIT_LOGIN", "1000000/1")
+    if not args.mongo_url:
+        # mongomock has no change streams or collection storage options
+        os.environ.setdefault("EVENTS_MODE", "poll")
+        os.environ.setdefault("CONTACT_ARCHIVE_COMPRESSOR", "")
+    # Don't send real emails from a load test
+    os.environ.pop("SENDGRID_API_KEY", None)
+
+
+def load_app(args: argparse.Namespace):
+    import server
+
+    # server.py logs at INFO; per-request client logs would swamp the report
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    if args.mongo_url:
+        return server.create_app()
+    try:
+        from mongomock_motor import AsyncMongoMockClient
+    except ImportError:
+        raise SystemExit("mongomock-motor is not installed; pip install mongomock-motor or pass --mongo-url")
+    return server.create_app(client_factory=lambda url: AsyncMongoMockClient())
+
+
+class Lifespan:
+    """Drive the ASGI lifespan protocol so startup/shutdown handlers run."""
+
+    def __init__(self, app):
+        self.app = app
+        self.receive_queue: asyncio.Queue = asyncio.Queue()
+        self.send_queue: asyncio.Queue = asyncio.Queue()
+        self.task: Optional[asyncio.Task] = None
+
+    async def _call(self, event: str) -> None:
+        await self.receive_queue.put({"type": f"lifespan.{event}"})
+        message = await self.send_queue.get()
+        if message["type"] != f"lifespan.{event}.complete":
+            raise RuntimeError(f"Lifespan {event} failed: {message.get('message')}")
+
+    async def __aenter__(self):
+        scope = {"type": "lifespan", "asgi": {"version": "3.0"}, "state": {}}
+        self.task = asyncio.create_task(self.app(scope, self.receive_queue.get, self.send_queue.put))
+        await self._call("startup")
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self._call("shutdown")
+        await self.task
+
+
+async def seed(db, projects: int, testimonials: int, contacts: int) -> None:
+    """Insert fixture documents directly, bypassing the API."""
+    from models import Contact, Project, Testimonial
+
+    now = datetime.utcnow()
+    await db.projects.delete_many({})
+    await db.testimonials.delete_many({})
+    await db.contacts.delete_many({})
+    if projects:
+        await db.projects.insert_many([
+            Project(
+                title=f"Project {i}",
+                description="Responsive marketing site with a headless CMS and analytics. " * 3,
+                category=random.choice(["Web Development", "Mobile", "Design"]),
+                technologies=random.sample(["React", "FastAPI", "MongoDB", "Tailwind", "Node.js", "Flutter"], 3),
+                image=f"/uploads/projects/{i:064x}.png",
+                created_at=now - timedelta(minutes=i),
+            ).dict()
+            for i in range(projects)
+        ])
+    if testimonials:
+        await db.testimonials.insert_many([
+            Testimonial(
+                name=f"Client {i}",
+                role="CEO, Example Corp",
+                content="Delivered on time and the site is fast. " * 3,
+                rating=5,
+                avatar=f"/uploads/testimonials/{i:064x}.png",
+                created_at=now - timedelta(minutes=i),
+            ).dict()
+            for i in range(testimonials)
+        ])
+    if contacts:
+        await db.contacts.insert_many([
+            Contact(
+                name=f"Visitor {i}",
+                email=f"visitor{i}@example.com",
+                subject=f"Enquiry {i}",
+                message="I'd like a quote for a new website. " * 5,
+                status=random.choice(["new", "read", "replied"]),
+                created_at=now - timedelta(minutes=i),
+            ).dict()
+            for i in range(contacts)
+        ])
+
+
+def _png_bytes() -> bytes:
+    from PIL import Image
+
+    # A random colour keeps most uploads distinct, so they are not all deduplicated
+    image = Image.new("RGB", (640, 480), tuple(random.randrange(256) for _ in range(3)))
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class Context:
+    def __init__(self, client, token: str, project_ids: List[str]):
+        self.client = client
+        self.auth = {"Authorization": f"Bearer {token}"}
+        self.project_ids = project_ids
+
+
+Scenario = Callable[[Context], Awaitable[Any]]
+
+
+async def list_projects(ctx: Context):
+    return await ctx.client.get("/api/projects", params={"limit": 20})
+
+
+async def get_project(ctx: Context):
+    project_id = random.choice(ctx.project_ids) if ctx.project_ids else str(uuid.uuid4())
+    return await ctx.client.get(f"/api/projects/{project_id}")
+
+
+async def list_testimonials(ctx: Context):
+    return await ctx.client.get("/api/testimonials", params={"limit": 20})
+
+
+async def contact(ctx: Context):
+    return await ctx.client.post("/api/contact", json={
+        "name": "Load Test",
+        "email": "load@example.com",
+        "subject": "Quote request",
+        "message": "Please get in touch about a new project.",
+    })
+
+
+async def admin_contacts(ctx: Context):
+    return await ctx.client.get("/api/admin/contacts", params={"limit": 100}, headers=ctx.auth)
+
+
+async def login(ctx: Context):
+    return await ctx.client.post("/api/admin/login", json={"username": ADMIN_USERNAME, "password": ADMIN_PASSWORD})
+
+
+async def upload(ctx: Context):
+    return await ctx.client.post(
+        "/api/admin/upload",
+        headers=ctx.auth,
+        data={"subfolder": "projects"},
+        files={"file": ("load.png", _png_bytes(), "image/png")},
+    )
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "list_projects": list_projects,
+    "get_project": get_project,
+    "list_testimonials": list_testimonials,
+    "contact": contact,
+    "admin_contacts": admin_contacts,
+    "login": login,
+    "upload": upload,
+}
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(fraction * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+async def worker(ctx: Context, mix: Dict[str, float], deadline: float, samples: List[Tuple[str, float, int]]):
+    names, weights = list(mix), list(mix.values())
+    while time.perf_counter() < deadline:
+        name = random.choices(names, weights)[0]
+        start = time.perf_counter()
+        try:
+            response = await SCENARIOS[name](ctx)
+            status = response.status_code
+        except Exception:
+            status = 0
+        samples.append((name, time.perf_counter() - start, status))
+
+
+def summarize(samples: List[Tuple[str, float, int]], elapsed: float) -> Dict[str, Dict[str, float]]:
+    by_name: Dict[str, List[Tuple[float, int]]] = {}
+    for name, latency, status in samples:
+        by_name.setdefault(name, []).append((latency, status))
+    by_name["total"] = [(latency, status) for _, latency, status in samples]
+
+    results = {}
+    for name, rows in by_name.items():
+        latencies = sorted(latency * 1000 for latency, _ in rows)
+        results[name] = {
+            "requests": len(rows),
+            # get_project may hit an id that no longer exists; 404 is an expected answer there
+            "errors": sum(1 for _, status in rows if status == 0 or status >= 500 or status == 429),
+            "throughput_rps": round(len(rows) / elapsed, 2),
+            "p50_ms": round(percentile(latencies, 0.50), 2),
+            "p95_ms": round(percentile(latencies, 0.95), 2),
+            "p99_ms": round(percentile(latencies, 0.99), 2),
+        }
+    return results
+
+
+def print_report(results: Dict[str, Dict[str, float]]) -> None:
+    header = f"{'scenario':<18}{'requests':>9}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    print(header)
+    print("-" * len(header))
+    for name in sorted(results, key=lambda key: (key == "total", key)):
+        row = results[name]
+        print(
+            f"{name:<18}{row['requests']:>9}{row['errors']:>8}{row['throughput_rps']:>10.1f}"
+            f"{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}{row['p99_ms']:>10.2f}"
+        )
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Return regressions: p95 slower or throughput lower than baseline beyond tolerance."""
+    regressions = []
+    for name, old in baseline["results"].items():
+        new = results.get(name)
+        if new is None:
+            continue
+        if old["p95_ms"] and new["p95_ms"] > old["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {old['p95_ms']:.2f} -> {new['p95_ms']:.2f} ms")
+        if old["throughput_rps"] and new["throughput_rps"] < old["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {old['throughput_rps']:.1f} -> {new['throughput_rps']:.1f} req/s")
+    return regressions
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    import httpx
+
+    mix = parse_mix(args.mix)
+    app = load_app(args)
+    async with Lifespan(app):
+        db = app.state.db
+        await seed(db, args.seed_projects, args.seed_testimonials, args.seed_contacts)
+        project_ids = [doc["id"] for doc in await db.projects.find({}, {"_id": 0, "id": 1}).to_list(None)]
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest") as client:
+            response = await client.post("/api/admin/login", json={"username": ADMIN_USERNAME, "password": ADMIN_PASSWORD})
+            response.raise_for_status()
+            ctx = Context(client, response.json()["access_token"], project_ids)
+
+            # Warm caches and lazy initialisation outside the measured window
+            for name in mix:
+                await SCENARIOS[name](ctx)
+
+            samples: List[Tuple[str, float, int]] = []
+            start = time.perf_counter()
+            deadline = start + args.duration
+            await asyncio.gather(*(worker(ctx, mix, deadline, samples) for _ in range(args.concurrency)))
+            elapsed = time.perf_counter() - start
+
+    return {
+        "meta": {
+            "created_at": datetime.utcnow().isoformat(),
+            "backend": "mongodb" if args.mongo_url else "mongomock",
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "mix": mix,
+            "python": platform.python_version(),
+        },
+        "results": summarize(samples, elapsed),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongo-url", help="real MongoDB to test against (default: mongomock-motor)")
+    parser.add_argument("--db-name", default="sbdevstudio_loadtest")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=10.0, help="measured seconds")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="scenario=weight list")
+    parser.add_argument("--seed-projects", type=int, default=50)
+    parser.add_argument("--seed-testimonials", type=int, default=20)
+    parser.add_argument("--seed-contacts", type=int, default=500)
+    parser.add_argument("--random-seed", type=int, default=1)
+    parser.add_argument("--save", metavar="PATH", help="write results as a baseline JSON file")
+    parser.add_argument("--compare", metavar="PATH", help="compare with a baseline; exit 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression (default 0.2)")
+    args = parser.parse_args()
+
+    if args.mongo_url and "loadtest" not in args.db_name:
+        # seed() clears collections; never point it at a real database by accident
+        raise SystemExit("--db-name must contain 'loadtest' when using --mongo-url")
+
+    random.seed(args.random_seed)
+    configure_environment(args)
+    report = asyncio.run(run(args))
+    print_report(report["results"])
+
+    if args.save:
+        Path(args.save).write_text(json.dumps(report, indent=2) + "\n")
+        print(f"\nBaseline written to {args.save}")
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        regressions = compare(report["results"], baseline, args.tolerance)
+        if regressions:
+            print(f"\nRegressions beyond {args.tolerance:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            raise SystemExit(1)
+        print(f"\nNo regressions beyond {args.tolerance:.0%} against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import hashlib
+import os
+import time
+from typing import Any, Dict, Hashable, NamedTuple, Optional, Tuple
+
+from fastapi import Request, Response
+
+from serialization import render_json
+
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "60"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "256"))
+
+
+class TTLCache:
+    """Namespaced in-process cache with per-entry expiry.
+
+    Entries are grouped by namespace (usually a collection name) so that a
+    write to a collection can drop every cached view of it at once.
+    """
+
+    def __init__(self, ttl: float = CACHE_TTL_SECONDS, max_entries: int = CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: Dict[str, Dict[Hashable, Tuple[float, Any]]] = {}
+
+    def get(self, namespace: str, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired."""
+        entries = self._entries.get(namespace)
+        if not entries:
+            return None
+        item = entries.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            entries.pop(key, None)
+            return None
+        return value
+
+    def set(self, namespace: str, key: Hashable, value: Any, ttl: Optional[float] = None) -> Any:
+        """Store a value and return it."""
+        entries = self._entries.setdefault(namespace, {})
+        if key not in entries and len(entries) >= self.max_entries:
+            # Drop the oldest insertion; keys include user-supplied filters.
+            entries.pop(next(iter(entries)))
+        entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        return value
+
+    def invalidate(self, namespace: str) -> None:
+        """Drop every entry in a namespace and its sub-namespaces ("<namespace>:<name>")."""
+        self._entries.pop(namespace, None)
+        for name in [name for name in self._entries if name.startswith(namespace + ":")]:
+            del self._entries[name]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class CachedBody(NamedTuple):
+    body: bytes
+    etag: str
+    headers: Dict[str, str] = {}
+
+
+def version_etag(version: int, *key: Hashable) -> str:
+    """Weak ETag for a view (`key`) of content at a content_versions version.
+
+    Derived without querying or serializing the content, so If-None-Match can
+    be answered before either, and identical on every worker. Weak, since one
+    version may be sent with different bytes (e.g. compressed or not).
+    """
+    digest = hashlib.blake2b(repr((version, key)).encode(), digest_size=16).hexdigest()
+    return f'W/"{digest}"'
+
+
+def make_cached_body(content: Any, headers: Optional[Dict[str, str]] = None, etag: Optional[str] = None) -> CachedBody:
+    """Render content; without an `etag`, derive a strong one from the bytes."""
+    body = render_json(content)
+    return CachedBody(
+        body=body,
+        etag=etag or f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"',
+        headers=headers or {},
+    )
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Evaluate an If-None-Match header (weak comparison, per RFC 9110)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    etag = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == etag
+        for candidate in if_none_match.split(",")
+    )
+
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """Return a 304 if the client already holds the representation tagged `etag`, else None."""
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+    return None
+
+
+def conditional_response(request: Request, cached: CachedBody) -> Response:
+    """Return 304 if the client already holds this body, else the JSON body."""
+    headers = {**cached.headers, "ETag": cached.etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), cached.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
+
+
+# Serialized public listings, invalidated by the admin write handlers.
+content_cache = TTLCache()
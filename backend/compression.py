@@ -0,0 +1,185 @@
+import mimetypes
+import os
+import zlib
+from typing import Callable, Optional, Set
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # optional; without it only gzip is offered
+    brotli = None
+
+# Bodies smaller than this are sent as-is; compression overhead isn't worth it
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+
+# Uploaded images are already compressed; only text-like bodies are worth it
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/", "application/javascript", "image/svg+xml")
+# Event streams must reach the client as soon as each event is written
+UNBUFFERED_TYPES = ("text/event-stream",)
+
+
+class GzipCompressor:
+    encoding = "gzip"
+
+    def __init__(self, level: int = GZIP_LEVEL):
+        # wbits 31: deflate with a gzip header and trailer
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class BrotliCompressor:
+    encoding = "br"
+
+    def __init__(self, quality: int = BROTLI_QUALITY):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+def accepted_encodings(header: str) -> Set[str]:
+    """Parse Accept-Encoding into the set of codings with a non-zero q-value."""
+    accepted = set()
+    for item in header.split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding and quality > 0:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def _is_compressible(headers: Headers) -> bool:
+    content_type = headers.get("content-type", "")
+    if "content-encoding" in headers or content_type.startswith(UNBUFFERED_TYPES):
+        return False
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def _weak(etag: str) -> str:
+    return etag if etag.startswith("W/") else f"W/{etag}"
+
+
+class CompressionMiddleware:
+    """Compress text-like responses with brotli (if installed) or gzip.
+
+    Responses below `minimum_size`, already-encoded responses, binary types
+    and event streams pass through untouched. Compressible types always get
+    `Vary: Accept-Encoding`, and their ETag is weakened whenever an encoding
+    was negotiated (compressed or not), so 200s and 304s agree.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    def _select(self, scope: Scope) -> Optional[Callable[[], object]]:
+        accepted = accepted_encodings(Headers(scope=scope).get("accept-encoding", ""))
+        if brotli is not None and "br" in accepted:
+            return BrotliCompressor
+        if "gzip" in accepted:
+            return GzipCompressor
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressionResponder(send, self._select(scope), self.minimum_size, scope.get("path", ""))
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    def __init__(self, send: Send, factory: Optional[Callable[[], object]], minimum_size: int, path: str = ""):
+        self._send = send
+        self.factory = factory
+        self.minimum_size = minimum_size
+        self.path = path
+        self.start_message: Message = {}
+        self.started = False
+        self.compressor = None
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            if message["status"] == 304:
+                self._not_modified(message)
+                await self._send(message)
+                return
+            # Held back until the first body chunk shows whether to compress
+            self.start_message = message
+            return
+        if message["type"] != "http.response.body" or not self.start_message:
+            await self._send(message)
+            return
+
+        if not self.started:
+            self.started = True
+            await self._first_chunk(message)
+            return
+
+        if self.compressor is not None:
+            body = self.compressor.compress(message.get("body", b""))
+            if not message.get("more_body", False):
+                body += self.compressor.finish()
+            message = {**message, "body": body}
+        await self._send(message)
+
+    def _not_modified(self, message: Message) -> None:
+        headers = MutableHeaders(scope=message)
+        # 304s carry no Content-Type: static files are typed by extension,
+        # and the API's own 304s answer for JSON
+        content_type = headers.get("content-type") or mimetypes.guess_type(self.path)[0] or "application/json"
+        if not content_type.startswith(COMPRESSIBLE_TYPES):
+            return
+        headers.add_vary_header("Accept-Encoding")
+        etag = headers.get("etag")
+        if etag and self.factory is not None:
+            headers["ETag"] = _weak(etag)
+
+    async def _first_chunk(self, message: Message) -> None:
+        headers = MutableHeaders(raw=self.start_message["headers"])
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if not _is_compressible(headers):
+            await self._send(self.start_message)
+            await self._send(message)
+            return
+
+        # The response varies by encoding even when this one goes out as-is
+        headers.add_vary_header("Accept-Encoding")
+        etag = headers.get("etag")
+        if etag and self.factory is not None:
+            headers["ETag"] = _weak(etag)
+        if self.factory is None or (len(body) < self.minimum_size and not more_body):
+            await self._send(self.start_message)
+            await self._send(message)
+            return
+
+        self.compressor = self.factory()
+        headers["Content-Encoding"] = self.compressor.encoding
+        body = self.compressor.compress(body)
+        if more_body:
+            del headers["Content-Length"]
+        else:
+            body += self.compressor.finish()
+            headers["Content-Length"] = str(len(body))
+        await self._send(self.start_message)
+        await self._send({**message, "body": body})
@@ -0,0 +1,272 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import OperationFailure, PyMongoError
+
+from cache import content_cache
+
+logger = logging.getLogger(__name__)
+
+# auto: change streams, falling back to polling where unsupported (standalone
+# mongod); changestream / poll force one mode; off disables the watcher
+EVENTS_MODE = os.getenv("EVENTS_MODE", "auto").lower()
+EVENTS_POLL_INTERVAL_SECONDS = float(os.getenv("EVENTS_POLL_INTERVAL_SECONDS", "2"))
+# Polling re-reads this far back so writes committed slightly out of order aren't missed
+EVENTS_POLL_LOOKBACK_SECONDS = float(os.getenv("EVENTS_POLL_LOOKBACK_SECONDS", "2"))
+EVENTS_POLL_BATCH = 500
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "1000"))
+EVENTS_RETRY_MAX_SECONDS = 30.0
+
+WATCHED_COLLECTIONS = ("projects", "testimonials", "contacts")
+# Returned by MongoDB when change streams need a replica set
+CHANGE_STREAMS_UNSUPPORTED = 40573
+
+Event = Dict[str, Any]
+
+
+class EventBus:
+    """In-process fan-out of change events.
+
+    Events are {"collection", "op", ...}: "upsert" events carry the changed
+    document as "doc"; "invalidate" means the collection changed in a way
+    that wasn't captured document by document (e.g. a delete), so views of
+    it should be reloaded.
+    """
+
+    def __init__(self, queue_size: int = EVENTS_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._listeners: List[Callable[[Event], None]] = []
+        self._queues: Dict[asyncio.Queue, Optional[Set[str]]] = {}
+
+    def add_listener(self, listener: Callable[[Event], None]) -> None:
+        """Call listener synchronously for every event."""
+        self._listeners.append(listener)
+
+    def subscribe(self, collections: Optional[Iterable[str]] = None) -> asyncio.Queue:
+        """Return a queue receiving events for the given collections (default all)."""
+        queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        self._queues[queue] = set(collections) if collections is not None else None
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._queues.pop(queue, None)
+
+    def publish(self, event: Event) -> None:
+        for listener in self._listeners:
+            try:
+                listener(event)
+            except Exception:
+                logger.exception("Event listener failed")
+        for queue, collections in list(self._queues.items()):
+            if collections is not None and event["collection"] not in collections:
+                continue
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Slow consumer: replace its backlog with a single reload signal
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait({"collection": event["collection"], "op": "invalidate"})
+
+
+event_bus = EventBus()
+
+
+def invalidate_caches(event: Event) -> None:
+    """Drop this worker's cached views of a collection changed anywhere."""
+    collection = event["collection"]
+    content_cache.invalidate(collection)
+    content_cache.invalidate("stats")
+    if collection in ("projects", "testimonials"):
+        content_cache.invalidate("home")
+
+
+event_bus.add_listener(invalidate_caches)
+
+
+async def bump_version(db: AsyncIOMotorDatabase, collection: str) -> None:
+    """Record a change the polling watcher can't see from updated_at (deletes, public content)."""
+    await db.content_versions.update_one(
+        {"_id": collection},
+        {"$inc": {"version": 1}, "$set": {"updated_at": datetime.utcnow()}},
+        upsert=True
+    )
+
+
+async def content_version(db: AsyncIOMotorDatabase, *collections: str, cached: bool = True) -> int:
+    """Sum of the collections' content_versions counters; grows on every bump of any of them.
+
+    Counters are cached in each collection's namespace, which writes and the
+    change watcher invalidate, so most requests don't read them from Mongo.
+    Pass cached=False where the exact current value matters.
+    """
+    total = 0
+    missing = []
+    for collection in collections:
+        version = content_cache.get(collection, "version") if cached else None
+        if version is None:
+            missing.append(collection)
+        else:
+            total += version
+    if missing:
+        docs = {
+            doc["_id"]: doc.get("version", 0)
+            for doc in await db.content_versions.find({"_id": {"$in": missing}}).to_list(None)
+        }
+        for collection in missing:
+            total += content_cache.set(collection, "version", docs.get(collection, 0))
+    return total
+
+
+def _strip_id(doc: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in doc.items() if key != "_id"}
+
+
+class ChangeWatcher:
+    """Publishes database changes, made by any worker, to the event bus.
+
+    Uses a change stream when the deployment supports it (replica set or
+    sharded cluster). Otherwise it polls: content_versions for collection
+    level changes, and contacts by updated_at for per-document deltas.
+    """
+
+    def __init__(self, db: AsyncIOMotorDatabase, bus: EventBus = event_bus, mode: str = EVENTS_MODE):
+        self.db = db
+        self.bus = bus
+        self.mode = mode
+        self._stop = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._resume_token = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _sleep(self, seconds: float) -> None:
+        try:
+            await asyncio.wait_for(self._stop.wait(), seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _run(self) -> None:
+        if self.mode in ("auto", "changestream"):
+            supported = await self._watch_change_stream()
+            if supported or self.mode == "changestream":
+                return
+            logger.info("Change streams unavailable; polling for changes every %ss", EVENTS_POLL_INTERVAL_SECONDS)
+        await self._poll()
+
+    async def _watch_change_stream(self) -> bool:
+        """Follow the change stream until stopped; False if the deployment has none."""
+        pipeline = [{"$match": {"ns.coll": {"$in": list(WATCHED_COLLECTIONS)}}}]
+        delay = 1.0
+        while not self._stop.is_set():
+            try:
+                async with self.db.watch(
+                    pipeline, full_document="updateLookup", resume_after=self._resume_token
+                ) as stream:
+                    delay = 1.0
+                    async for change in stream:
+                        self._resume_token = stream.resume_token
+                        self._publish_change(change)
+            except OperationFailure as exc:
+                if exc.code == CHANGE_STREAMS_UNSUPPORTED:
+                    return False
+                logger.warning("Change stream failed (%s); reopening", exc)
+                # The token may be what's rejected; start from now instead
+                self._resume_token = None
+            except PyMongoError as exc:
+                logger.warning("Change stream interrupted (%s); resuming", exc)
+            await self._sleep(delay)
+            delay = min(delay * 2, EVENTS_RETRY_MAX_SECONDS)
+        return True
+
+    def _publish_change(self, change: Dict[str, Any]) -> None:
+        collection = change.get("ns", {}).get("coll")
+        if collection not in WATCHED_COLLECTIONS:
+            return
+        doc = change.get("fullDocument")
+        if change["operationType"] in ("insert", "update", "replace") and doc:
+            self.bus.publish({"collection": collection, "op": "upsert", "doc": _strip_id(doc)})
+        else:
+            # Deletes only carry the Mongo _id, not the application id
+            self.bus.publish({"collection": collection, "op": "invalidate"})
+
+    async def _read_versions(self) -> Dict[str, int]:
+        docs = await self.db.content_versions.find({}).to_list(None)
+        return {doc["_id"]: doc.get("version", 0) for doc in docs}
+
+    async def _poll(self) -> None:
+        versions = None
+        since = datetime.utcnow()
+        seen: Dict[str, datetime] = {}
+        while not self._stop.is_set():
+            try:
+                current = await self._read_versions()
+                if versions is not None:
+                    for collection, version in current.items():
+                        if versions.get(collection) != version and collection in WATCHED_COLLECTIONS:
+                            self.bus.publish({"collection": collection, "op": "invalidate"})
+                versions = current
+                since = await self._poll_contacts(since, seen)
+            except PyMongoError as exc:
+                logger.warning("Change polling failed: %s", exc)
+            await self._sleep(EVENTS_POLL_INTERVAL_SECONDS)
+
+    async def _poll_contacts(self, since: datetime, seen: Dict[str, datetime]) -> datetime:
+        """Publish contacts updated since the last poll; returns the new high-water mark."""
+        cutoff = since - timedelta(seconds=EVENTS_POLL_LOOKBACK_SECONDS)
+        query: Dict[str, Any] = {"updated_at": {"$gte": cutoff}}
+        while True:
+            docs = await self.db.contacts.find(query, {"_id": 0}).sort(
+                [("updated_at", 1), ("id", 1)]
+            ).limit(EVENTS_POLL_BATCH).to_list(EVENTS_POLL_BATCH)
+            for doc in docs:
+                if seen.get(doc["id"]) == doc["updated_at"]:
+                    continue
+                seen[doc["id"]] = doc["updated_at"]
+                since = max(since, doc["updated_at"])
+                self.bus.publish({"collection": "contacts", "op": "upsert", "doc": doc})
+            if len(docs) < EVENTS_POLL_BATCH:
+                break
+            last = docs[-1]
+            query = {"$or": [
+                {"updated_at": {"$gt": last["updated_at"]}},
+                {"updated_at": last["updated_at"], "id": {"$gt": last["id"]}},
+            ]}
+        for doc_id in [doc_id for doc_id, updated_at in seen.items() if updated_at < cutoff]:
+            del seen[doc_id]
+        return since
+
+
+change_watcher: Optional[ChangeWatcher] = None
+
+
+def start_change_watcher(db: AsyncIOMotorDatabase) -> Optional[ChangeWatcher]:
+    """Start the process-wide change watcher unless EVENTS_MODE=off."""
+    global change_watcher
+    if EVENTS_MODE == "off":
+        logger.info("EVENTS_MODE=off; cross-worker change events disabled")
+        return None
+    change_watcher = ChangeWatcher(db)
+    change_watcher.start()
+    return change_watcher
+
+
+async def stop_change_watcher() -> None:
+    global change_watcher
+    if change_watcher is not None:
+        await change_watcher.stop()
+        change_watcher = None
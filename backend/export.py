@@ -0,0 +1,116 @@
+import csv
+import io
+import json
+import os
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Sequence, Type
+
+from fastapi.responses import StreamingResponse
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pydantic import BaseModel
+
+from pagination import SORT_ORDER
+from serialization import render_json
+
+# Documents fetched per round trip; only one batch is held in memory at a time
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+# Rows are buffered into chunks of about this many bytes before being sent
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+# Spreadsheet apps treat cells starting with these as formulas
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _csv_value(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, list):
+        value = "; ".join(str(item) for item in value)
+    elif isinstance(value, dict):
+        value = json.dumps(value, default=str)
+    value = str(value)
+    if value.startswith(_FORMULA_PREFIXES):
+        value = "'" + value
+    return value
+
+
+async def _documents(cursors: List) -> AsyncIterator[Dict[str, Any]]:
+    for cursor in cursors:
+        async for doc in cursor:
+            yield doc
+
+
+async def _csv_rows(docs: AsyncIterator[Dict[str, Any]], fields: List[str]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    async for doc in docs:
+        writer.writerow([_csv_value(doc.get(field)) for field in fields])
+        if buffer.tell() >= EXPORT_CHUNK_BYTES:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+async def _ndjson_rows(docs: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[bytes]:
+    chunk = bytearray()
+    async for doc in docs:
+        chunk += render_json(doc)
+        chunk += b"\n"
+        if len(chunk) >= EXPORT_CHUNK_BYTES:
+            yield bytes(chunk)
+            chunk.clear()
+    if chunk:
+        yield bytes(chunk)
+
+
+async def _export_rows(cursors: List, fields: List[str], export_format: str) -> AsyncIterator[bytes]:
+    docs = _documents(cursors)
+    try:
+        rows = _csv_rows(docs, fields) if export_format == "csv" else _ndjson_rows(docs)
+        async for chunk in rows:
+            yield chunk
+    finally:
+        # Also runs when the client disconnects mid-export
+        for cursor in cursors:
+            await cursor.close()
+
+
+def export_response(
+    collection: AsyncIOMotorCollection,
+    query: Dict[str, Any],
+    model: Type[BaseModel],
+    export_format: str,
+    followed_by: Sequence[AsyncIOMotorCollection] = (),
+) -> StreamingResponse:
+    """Stream every matching document, newest first, as CSV or NDJSON.
+
+    Memory use is bounded by one cursor batch, however many rows match.
+    Columns are the model's fields; in CSV lists are joined with "; ".
+    Matches in `followed_by` collections are appended in the same way.
+    """
+    fields = list(model.model_fields)
+    projection = {"_id": 0}
+    projection.update({field: 1 for field in fields})
+    cursors = [
+        source.find(query, projection).sort(SORT_ORDER).batch_size(EXPORT_BATCH_SIZE)
+        for source in (collection, *followed_by)
+    ]
+    filename = f"{collection.name}-{datetime.utcnow():%Y%m%d}.{export_format}"
+    return StreamingResponse(
+        _export_rows(cursors, fields, export_format),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "Cache-Control": "no-store",
+        }
+    )
@@ -1,17 +1,58 @@
+import asyncio
+import hashlib
+import logging
 import os
-import uuid
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta
 from pathlib import Path
-from fastapi import UploadFile, HTTPException
-from typing import List
+from fastapi import FastAPI, UploadFile, HTTPException
+from fastapi.responses import JSONResponse, RedirectResponse
+from fastapi.staticfiles import StaticFiles
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import DuplicateKeyError, PyMongoError
+from starlette.types import ASGIApp, Receive, Scope, Send
+from typing import BinaryIO, Dict, List, Optional, Set, Tuple
+from images import generate_variants, parse_variant_width
+from metrics import UPLOAD_BYTES, UPLOAD_LATENCY
+from storage import (
+    IMMUTABLE_CACHE_CONTROL, LocalStorage, S3Storage, create_storage, is_content_addressed
+)
 
 # Use env override for uploads; default to backend/uploads
 UPLOAD_DIR = Path(os.getenv("UPLOAD_DIR", Path(__file__).parent / "uploads"))
 ALLOWED_EXTENSIONS = {"jpg", "jpeg", "png", "webp", "gif"}
 MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB
+CHUNK_SIZE = 64 * 1024
+# Whole upload request: the file plus multipart framing and the other form fields
+MAX_UPLOAD_BODY = MAX_FILE_SIZE + 64 * 1024
+UPLOAD_PATHS = {"/api/admin/upload"}
 
-# Create upload directories if missing
+# Documents that can point at an uploaded file: collection -> field
+FILE_REFERENCES = {"projects": "image", "testimonials": "avatar"}
+# An upload is returned before any document references it; for this long it is
+# claimed and release_file won't delete it, even if an identical file is released
+UPLOAD_CLAIM_SECONDS = int(os.getenv("UPLOAD_CLAIM_SECONDS", "3600"))
+# A release holds the claim document while it deletes a file; a crashed
+# release stops blocking uploads of that file after this long
+UPLOAD_RELEASE_LEASE_SECONDS = 60
+# How often expired claims are swept and their never-referenced files deleted
+UPLOAD_SWEEP_INTERVAL_SECONDS = float(os.getenv("UPLOAD_SWEEP_INTERVAL_SECONDS", "3600"))
+UPLOAD_SWEEP_BATCH_SIZE = 500
+
+# Uploads in progress are written here, outside the served directory, and
+# moved into place once complete; keep it on the same filesystem as UPLOAD_DIR
+UPLOAD_STAGING_DIR = Path(os.getenv("UPLOAD_STAGING_DIR", UPLOAD_DIR.parent / f".{UPLOAD_DIR.name}-staging"))
+
+# Create upload directories if missing; with remote storage they stay empty
 (UPLOAD_DIR / "projects").mkdir(parents=True, exist_ok=True)
 (UPLOAD_DIR / "testimonials").mkdir(parents=True, exist_ok=True)
+UPLOAD_STAGING_DIR.mkdir(parents=True, exist_ok=True)
+
+storage = create_storage(UPLOAD_DIR)
+
+logger = logging.getLogger(__name__)
 
 
 def validate_file(file: UploadFile) -> None:
@@ -28,37 +69,365 @@ def validate_file(file: UploadFile) -> None:
         )
 
 
-async def save_upload_file(file: UploadFile, subfolder: str) -> str:
-    """Save uploaded file and return the file path."""
+def _file_too_large() -> HTTPException:
+    return HTTPException(
+        status_code=400,
+        detail=f"File too large. Maximum size: {MAX_FILE_SIZE / 1024 / 1024}MB"
+    )
+
+
+def _body_too_large() -> str:
+    return f"Request body too large. Maximum upload size: {MAX_FILE_SIZE / 1024 / 1024}MB"
+
+
+class UploadSizeLimitMiddleware:
+    """Cap upload request bodies before they are parsed.
+
+    Starlette spools the whole multipart body to a temp file before the
+    handler runs, so checking the file afterwards is too late. A declared
+    Content-Length over the cap gets 413 without reading the body, and
+    chunked bodies are cut off with 413 once they pass it.
+    """
+
+    def __init__(self, app: ASGIApp, max_body: int = MAX_UPLOAD_BODY, paths=UPLOAD_PATHS):
+        self.app = app
+        self.max_body = max_body
+        self.paths = paths
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        for name, value in scope.get("headers", []):
+            if name == b"content-length" and value.isdigit() and int(value) > self.max_body:
+                response = JSONResponse({"detail": _body_too_large()}, status_code=413)
+                await response(scope, receive, send)
+                return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body:
+                    # Raised inside form parsing; FastAPI passes HTTPException through
+                    raise HTTPException(status_code=413, detail=_body_too_large())
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+def _stage_upload(source: BinaryIO, extension: str) -> Tuple[Path, str]:
+    """Copy source to a temp file in UPLOAD_STAGING_DIR in chunks, enforcing MAX_FILE_SIZE.
+
+    Returns the temp path and the content-addressed name (SHA-256 of the
+    content) the file should be stored under.
+    """
+    digest = hashlib.sha256()
+    fd, tmp_name = tempfile.mkstemp(dir=UPLOAD_STAGING_DIR, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as tmp:
+            written = 0
+            while chunk := source.read(CHUNK_SIZE):
+                written += len(chunk)
+                if written > MAX_FILE_SIZE:
+                    raise _file_too_large()
+                digest.update(chunk)
+                tmp.write(chunk)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+    return Path(tmp_name), f"{digest.hexdigest()}.{extension}"
+
+
+def _store_staged(tmp_path: Path, subfolder: str, filename: str) -> None:
+    """Build a staged upload's variants and hand everything to storage.
+
+    Identical content maps to the same key, so a repeat upload reuses the
+    stored file and its variants.
+    """
+    key = f"{subfolder}/{filename}"
+    if storage.exists(key):
+        return
+    # Store variants first so an existing original implies its variants exist
+    _store_variants(tmp_path, key)
+    storage.put(key, tmp_path)
+
+
+def _store_variants(original: Path, key: str) -> None:
+    """Generate the variants of key from original in a staging dir and store them."""
+    directory, _, name = key.rpartition("/")
+    stem = name.rsplit(".", 1)[0]
+    # Per call, so concurrent uploads of the same image don't share variant files
+    work_dir = Path(tempfile.mkdtemp(dir=UPLOAD_STAGING_DIR))
+    try:
+        for variant in generate_variants(original, stem, work_dir).values():
+            storage.put(f"{directory}/{variant.name}", variant)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+async def _claim_upload(db: AsyncIOMotorDatabase, file_path: str) -> None:
+    """Claim file_path for UPLOAD_CLAIM_SECONDS, waiting out a release deleting it."""
+    now = datetime.utcnow()
+    while True:
+        try:
+            # A release in progress holds the document with deleting set; the
+            # upsert then collides on _id instead of taking it over
+            await db.upload_claims.update_one(
+                {"_id": file_path, "$or": [{"deleting": {"$ne": True}}, {"expires_at": {"$lte": now}}]},
+                {"$set": {"expires_at": now + timedelta(seconds=UPLOAD_CLAIM_SECONDS)}, "$unset": {"deleting": ""}},
+                upsert=True
+            )
+            return
+        except DuplicateKeyError:
+            await asyncio.sleep(0.05)
+            now = datetime.utcnow()
+
+
+async def confirm_upload(db: AsyncIOMotorDatabase, file_path: str) -> None:
+    """Drop an upload's claim once a saved document references it; the reference protects it now."""
+    if _storage_key(file_path) is not None:
+        await db.upload_claims.delete_one({"_id": file_path, "deleting": {"$ne": True}})
+
+
+async def save_upload_file(db: AsyncIOMotorDatabase, file: UploadFile, subfolder: str) -> str:
+    """Save uploaded file and return the file path.
+
+    The path is claimed for UPLOAD_CLAIM_SECONDS before storage is checked, so
+    a concurrent release of the same content can't delete the file between
+    this upload reusing it and a document referencing it.
+    """
     validate_file(file)
     
-    # Generate unique filename
+    # The body was capped by UploadSizeLimitMiddleware; _stage_upload applies the exact file limit
+    # Stream, resize and store off the event loop
     extension = file.filename.split(".")[-1].lower()
-    unique_filename = f"{uuid.uuid4()}.{extension}"
-    
-    # Create full path
-    file_path = UPLOAD_DIR / subfolder / unique_filename
-    
-    # Save file
-    contents = await file.read()
-    
-    # Check file size
-    if len(contents) > MAX_FILE_SIZE:
-        raise HTTPException(
-            status_code=400,
-            detail=f"File too large. Maximum size: {MAX_FILE_SIZE / 1024 / 1024}MB"
-        )
-    
-    with open(file_path, "wb") as f:
-        f.write(contents)
+    start = time.perf_counter()
+    tmp_path, filename = await asyncio.to_thread(_stage_upload, file.file, extension)
+    file_path = f"/uploads/{subfolder}/{filename}"
+    try:
+        await _claim_upload(db, file_path)
+        await asyncio.to_thread(_store_staged, tmp_path, subfolder, filename)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    UPLOAD_LATENCY.observe(time.perf_counter() - start, subfolder=subfolder)
+    # The whole stream has been read, so its position is the upload size
+    UPLOAD_BYTES.inc(file.file.tell(), subfolder=subfolder)
     
     # Return relative path for URL
-    return f"/uploads/{subfolder}/{unique_filename}"
+    return file_path
+
+
+def _storage_key(file_path: str) -> Optional[str]:
+    """Map an /uploads/ URL to a storage key, or None if it is not one."""
+    if not file_path.startswith("/uploads/"):
+        return None
+    key = file_path[len("/uploads/"):]
+    if not key or any(part in ("", ".", "..") for part in key.split("/")):
+        return None
+    return key
+
+
+def _variant_keys(key: str) -> Dict[int, str]:
+    """Return the stored variants of key, keyed by width."""
+    directory, _, name = key.rpartition("/")
+    stem = name.rsplit(".", 1)[0]
+    variants = {}
+    for candidate in storage.list(f"{directory}/{stem}-"):
+        width = parse_variant_width(candidate.rpartition("/")[2], stem)
+        if width is not None:
+            variants[width] = candidate
+    return dict(sorted(variants.items()))
+
+
+def _ensure_variants(key: str) -> Dict[int, str]:
+    variants = _variant_keys(key)
+    if variants:
+        return variants
+    # Backfill images stored before variants existed; only possible when
+    # the original is readable locally.
+    local_path = storage.local_path(key)
+    if local_path is None or not local_path.is_file():
+        return {}
+    _store_variants(local_path, key)
+    return _variant_keys(key)
+
+
+async def get_image_variants(file_path: str) -> Dict[str, str]:
+    """Return {width: url} variants of an uploaded image."""
+    key = _storage_key(file_path)
+    if key is None:
+        return {}
+    variants = await asyncio.to_thread(_ensure_variants, key)
+    return {str(width): f"/uploads/{variant}" for width, variant in variants.items()}
 
 
 def delete_file(file_path: str) -> None:
-    """Delete a file from the uploads directory."""
-    if file_path.startswith("/uploads/"):
-        full_path = UPLOAD_DIR / file_path.replace("/uploads/", "")
-        if full_path.exists():
-            full_path.unlink()
\ No newline at end of file
+    """Delete a file and its resized variants from upload storage."""
+    key = _storage_key(file_path)
+    if key is None:
+        return
+    for variant in _variant_keys(key).values():
+        storage.delete(variant)
+    storage.delete(key)
+
+
+async def _referenced(db: AsyncIOMotorDatabase, file_path: str) -> bool:
+    for collection, field in FILE_REFERENCES.items():
+        if await db[collection].count_documents({field: file_path}, limit=1):
+            return True
+    return False
+
+
+async def _release(db: AsyncIOMotorDatabase, file_path: str) -> bool:
+    """Delete file_path unless it is claimed or referenced; True if deleted.
+
+    The claim document is taken over first, atomically and only if it is
+    missing or expired, so an upload can't claim the file between the checks
+    and the delete; it waits in _claim_upload until the document is dropped.
+    """
+    now = datetime.utcnow()
+    try:
+        await db.upload_claims.update_one(
+            {"_id": file_path, "expires_at": {"$lte": now}},
+            {"$set": {"deleting": True, "expires_at": now + timedelta(seconds=UPLOAD_RELEASE_LEASE_SECONDS)}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        # Claimed by an upload, or another release is deleting it
+        return False
+    try:
+        if await _referenced(db, file_path):
+            return False
+        await asyncio.to_thread(delete_file, file_path)
+        return True
+    finally:
+        await db.upload_claims.delete_one({"_id": file_path, "deleting": True})
+
+
+async def release_file(db: AsyncIOMotorDatabase, file_path: str) -> None:
+    """Delete an uploaded file once no project or testimonial references it.
+
+    Call after the referencing document has been updated or removed. Files
+    uploaded within UPLOAD_CLAIM_SECONDS are kept; nothing may reference them yet.
+    """
+    if _storage_key(file_path) is None:
+        return
+    if await _referenced(db, file_path):
+        return
+    await _release(db, file_path)
+
+
+async def release_files(db: AsyncIOMotorDatabase, file_paths: List[str]) -> None:
+    """Batch form of release_file: one reference query per collection up front."""
+    candidates = {path for path in file_paths if _storage_key(path) is not None}
+    for collection, field in FILE_REFERENCES.items():
+        if not candidates:
+            return
+        candidates -= set(await db[collection].distinct(field, {field: {"$in": list(candidates)}}))
+    for path in candidates:
+        await _release(db, path)
+
+
+async def sweep_upload_claims(db: AsyncIOMotorDatabase) -> int:
+    """Release the files of expired claims; returns how many were deleted.
+
+    Catches uploads whose project or testimonial was never saved. Files that
+    did get referenced are kept and only the claim is dropped.
+    """
+    deleted = 0
+    now = datetime.utcnow()
+    expired = await db.upload_claims.find(
+        {"expires_at": {"$lte": now}}, {"_id": 1}
+    ).limit(UPLOAD_SWEEP_BATCH_SIZE).to_list(None)
+    for doc in expired:
+        if await _release(db, doc["_id"]):
+            deleted += 1
+    return deleted
+
+
+class UploadSweepJob:
+    """Runs sweep_upload_claims every UPLOAD_SWEEP_INTERVAL_SECONDS."""
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.db = db
+        self._stop = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                deleted = await sweep_upload_claims(self.db)
+                if deleted:
+                    logger.info("Deleted %s uploads that were never used", deleted)
+            except PyMongoError as exc:
+                logger.warning("Upload claim sweep failed: %s", exc)
+            try:
+                await asyncio.wait_for(self._stop.wait(), UPLOAD_SWEEP_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+
+upload_sweep_job: Optional[UploadSweepJob] = None
+
+
+def start_upload_sweep_job(db: AsyncIOMotorDatabase) -> UploadSweepJob:
+    """Start the process-wide sweep of expired upload claims."""
+    global upload_sweep_job
+    upload_sweep_job = UploadSweepJob(db)
+    upload_sweep_job.start()
+    return upload_sweep_job
+
+
+async def stop_upload_sweep_job() -> None:
+    global upload_sweep_job
+    if upload_sweep_job is not None:
+        await upload_sweep_job.stop()
+        upload_sweep_job = None
+
+
+class UploadStaticFiles(StaticFiles):
+    """StaticFiles that marks content-addressed uploads as cacheable forever."""
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        if is_content_addressed(os.path.basename(full_path)):
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        return response
+
+
+async def redirect_upload(key: str) -> RedirectResponse:
+    """Send clients straight to object storage instead of proxying the bytes."""
+    if _storage_key(f"/uploads/{key}") is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    url = await asyncio.to_thread(storage.url_for, key)
+    if isinstance(storage, S3Storage) and storage.public_base_url and is_content_addressed(key):
+        cache_control = IMMUTABLE_CACHE_CONTROL
+    else:
+        # Presigned URLs expire; don't let clients reuse the redirect past that.
+        cache_control = f"private, max-age={getattr(storage, 'presign_expires', 3600) // 2}"
+    return RedirectResponse(url, status_code=307, headers={"Cache-Control": cache_control})
+
+
+def mount_uploads(app: FastAPI) -> None:
+    """Serve /uploads from local disk, or redirect to the storage backend."""
+    if isinstance(storage, LocalStorage):
+        app.mount("/uploads", UploadStaticFiles(directory=str(storage.root)), name="uploads")
+    else:
+        app.add_api_route("/uploads/{key:path}", redirect_upload, methods=["GET"], include_in_schema=False)
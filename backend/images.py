@@ -0,0 +1,72 @@
+import logging
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+VARIANT_WIDTHS = sorted(
+    int(width) for width in os.getenv("IMAGE_VARIANT_WIDTHS", "320,640,1024,1600").split(",") if width.strip()
+)
+VARIANT_QUALITY = int(os.getenv("IMAGE_VARIANT_QUALITY", "80"))
+
+_VARIANT_NAME = re.compile(r"^(?P<stem>.+)-(?P<width>\d+)w\.webp$")
+
+
+def variant_name(stem: str, width: int) -> str:
+    return f"{stem}-{width}w.webp"
+
+
+def parse_variant_width(name: str, stem: str) -> Optional[int]:
+    """Return the width encoded in a variant file name of `stem`, if it is one."""
+    match = _VARIANT_NAME.match(name)
+    if match and match.group("stem") == stem:
+        return int(match.group("width"))
+    return None
+
+
+def _target_widths(source_width: int) -> List[int]:
+    # Never upscale: buckets wider than the source collapse to the source width.
+    return sorted({min(width, source_width) for width in VARIANT_WIDTHS})
+
+
+def generate_variants(original: Path, stem: str, out_dir: Path) -> Dict[int, Path]:
+    """Write width-bucketed WebP variants of an image as out_dir/<stem>-<width>w.webp.
+
+    Blocking; call from a worker thread. Animated and unreadable images are
+    left without variants.
+    """
+    # Pillow is only needed once an image is uploaded, so it stays out of startup
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    try:
+        with Image.open(original) as source:
+            if getattr(source, "is_animated", False):
+                return {}
+            image = ImageOps.exif_transpose(source)
+            if image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA" if "transparency" in image.info or "A" in image.mode else "RGB")
+
+            variants = {}
+            for width in _target_widths(image.width):
+                if width < image.width:
+                    height = max(1, round(image.height * width / image.width))
+                    resized = image.resize((width, height), Image.LANCZOS)
+                else:
+                    resized = image
+                destination = out_dir / variant_name(stem, width)
+                fd, tmp_name = tempfile.mkstemp(dir=out_dir, prefix=".", suffix=".part")
+                try:
+                    with os.fdopen(fd, "wb") as tmp:
+                        resized.save(tmp, format="WEBP", quality=VARIANT_QUALITY, method=4)
+                    os.replace(tmp_name, destination)
+                except BaseException:
+                    Path(tmp_name).unlink(missing_ok=True)
+                    raise
+                variants[width] = destination
+            return variants
+    except (UnidentifiedImageError, OSError) as exc:
+        logger.warning("Could not generate variants for %s: %s", stem, exc)
+        return {}
@@ -0,0 +1,152 @@
+import logging
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, DESCENDING, TEXT
+from pymongo.errors import OperationFailure
+
+from retention import CONTACT_ARCHIVE_TTL_DAYS
+from search import CONTACT_SEARCH, PROJECT_SEARCH
+
+logger = logging.getLogger(__name__)
+
+
+class IndexSpec(NamedTuple):
+    name: str
+    keys: List[Tuple[str, Union[int, str]]]
+    unique: bool = False
+    expire_after_seconds: Optional[int] = None
+    # Field weights, for text indexes only
+    weights: Optional[Dict[str, int]] = None
+
+
+def text_index(name: str, weights: Dict[str, int]) -> IndexSpec:
+    return IndexSpec(name, [(field, TEXT) for field in weights], weights=weights)
+
+
+def _declared_shape(spec: IndexSpec) -> Dict[str, Any]:
+    # Mongo reports every text index under the same internal key pattern
+    keys = [("_fts", TEXT), ("_ftsx", 1)] if spec.weights else spec.keys
+    return {"key": keys, "unique": spec.unique, "ttl": spec.expire_after_seconds, "weights": spec.weights}
+
+
+def _existing_shape(info: Dict[str, Any]) -> Dict[str, Any]:
+    keys = [(field, direction if isinstance(direction, str) else int(direction)) for field, direction in info["key"]]
+    weights = dict(info["weights"]) if "weights" in info else None
+    return {"key": keys, "unique": bool(info.get("unique")), "ttl": info.get("expireAfterSeconds"), "weights": weights}
+
+
+def _id_index() -> IndexSpec:
+    return IndexSpec("id_unique", [("id", ASCENDING)], unique=True)
+
+
+def _recent_index(prefix: Tuple[str, ...] = ()) -> IndexSpec:
+    """Index matching the (created_at, id) keyset order, optionally behind equality filters."""
+    keys = [(field, ASCENDING) for field in prefix]
+    keys += [("created_at", DESCENDING), ("id", DESCENDING)]
+    name = "_".join([*prefix, "created_at", "id"])
+    return IndexSpec(name, keys)
+
+
+# Declared indexes per collection. Names are part of the declaration so drift
+# can be reported by name.
+INDEXES: Dict[str, List[IndexSpec]] = {
+    "projects": [
+        _id_index(),
+        _recent_index(),
+        _recent_index(("category",)),
+        # Upload reference checks before deleting a shared file
+        IndexSpec("image", [("image", ASCENDING)]),
+        text_index("text_search", PROJECT_SEARCH.weights),
+    ],
+    "testimonials": [
+        _id_index(),
+        _recent_index(),
+        IndexSpec("avatar", [("avatar", ASCENDING)]),
+    ],
+    "contacts": [
+        _id_index(),
+        _recent_index(),
+        _recent_index(("status",)),
+        # Change polling and event-stream replay
+        IndexSpec("updated_at_id", [("updated_at", ASCENDING), ("id", ASCENDING)]),
+        text_index("text_search", CONTACT_SEARCH.weights),
+    ],
+    "contacts_archive": [
+        _id_index(),
+        _recent_index(),
+        _recent_index(("status",)),
+        *([IndexSpec(
+            "archived_at_ttl", [("archived_at", ASCENDING)], expire_after_seconds=CONTACT_ARCHIVE_TTL_DAYS * 24 * 3600
+        )] if CONTACT_ARCHIVE_TTL_DAYS > 0 else []),
+    ],
+    "email_outbox": [
+        _id_index(),
+        IndexSpec("status_next_attempt_at", [("status", ASCENDING), ("next_attempt_at", ASCENDING)]),
+        IndexSpec("claim", [("claim", ASCENDING)]),
+        # Sent notifications are kept for a week for troubleshooting
+        IndexSpec("sent_at_ttl", [("sent_at", ASCENDING)], expire_after_seconds=7 * 24 * 3600),
+    ],
+    "revoked_tokens": [
+        IndexSpec("jti_unique", [("jti", ASCENDING)], unique=True),
+        # Revocations are only needed until the token itself expires
+        IndexSpec("exp_ttl", [("exp", ASCENDING)], expire_after_seconds=0),
+    ],
+    "upload_claims": [
+        # Not a TTL index: sweep_upload_claims removes expired claims together
+        # with the files nothing ended up referencing
+        IndexSpec("expires_at", [("expires_at", ASCENDING)]),
+    ],
+    "rate_limits": [
+        IndexSpec("expires_at_ttl", [("expires_at", ASCENDING)], expire_after_seconds=0),
+    ],
+    "admins": [
+        _id_index(),
+        IndexSpec("username_unique", [("username", ASCENDING)], unique=True),
+    ],
+}
+
+
+async def ensure_indexes(db: AsyncIOMotorDatabase) -> Dict[str, List[str]]:
+    """Create missing declared indexes and report drift.
+
+    Existing indexes are never dropped or rebuilt; mismatches and undeclared
+    indexes are logged and returned as {collection: [problems]}.
+    """
+    drift: Dict[str, List[str]] = {}
+
+    for collection_name, specs in INDEXES.items():
+        collection = db[collection_name]
+        problems: List[str] = []
+        existing = await collection.index_information()
+
+        for spec in specs:
+            current = existing.get(spec.name)
+            if current is None:
+                options = {"name": spec.name, "unique": spec.unique}
+                if spec.expire_after_seconds is not None:
+                    options["expireAfterSeconds"] = spec.expire_after_seconds
+                if spec.weights:
+                    options["weights"] = spec.weights
+                try:
+                    await collection.create_index(spec.keys, **options)
+                    logger.info("Created index %s.%s", collection_name, spec.name)
+                except OperationFailure as exc:
+                    problems.append(f"could not create {spec.name}: {exc}")
+                continue
+
+            declared_shape, existing_shape = _declared_shape(spec), _existing_shape(current)
+            if declared_shape != existing_shape:
+                problems.append(f"{spec.name} is {existing_shape}, declared {declared_shape}")
+
+        declared = {spec.name for spec in specs}
+        for name in existing:
+            if name != "_id_" and name not in declared:
+                problems.append(f"undeclared index {name}")
+
+        for problem in problems:
+            logger.warning("Index drift on %s: %s", collection_name, problem)
+        if problems:
+            drift[collection_name] = problems
+
+    return drift
@@ -0,0 +1,122 @@
+import asyncio
+import logging
+import os
+import signal
+import threading
+from typing import Callable
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+# How long shutdown waits for in-flight requests before closing connections
+SHUTDOWN_DRAIN_TIMEOUT_SECONDS = float(os.getenv("SHUTDOWN_DRAIN_TIMEOUT_SECONDS", "20"))
+
+
+class DrainState:
+    """Tracks in-flight requests so shutdown can wait for them.
+
+    Once draining, /readyz reports 503 and long-lived responses (event
+    streams) finish, so the server's wait for open connections is short.
+    """
+
+    def __init__(self):
+        self.draining = False
+        self.in_flight = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._draining = asyncio.Event()
+
+    def reset(self) -> None:
+        """Start serving again; the events are recreated for the current event loop."""
+        self.draining = False
+        self._idle = asyncio.Event()
+        if self.in_flight == 0:
+            self._idle.set()
+        self._draining = asyncio.Event()
+
+    def start_draining(self) -> None:
+        self.draining = True
+        self._draining.set()
+
+    async def wait_draining(self) -> None:
+        await self._draining.wait()
+
+    def request_started(self) -> None:
+        self.in_flight += 1
+        self._idle.clear()
+
+    def request_finished(self) -> None:
+        self.in_flight -= 1
+        if self.in_flight == 0:
+            self._idle.set()
+
+    async def drain(self, timeout: float = SHUTDOWN_DRAIN_TIMEOUT_SECONDS) -> bool:
+        """Mark the process as draining and wait for in-flight requests.
+
+        Returns False if requests were still running when the timeout expired.
+        """
+        self.start_draining()
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            logger.warning("Shutdown drain timed out with %s requests in flight", self.in_flight)
+            return False
+
+
+drain_state = DrainState()
+
+
+def install_drain_signal_handlers(state: DrainState = drain_state) -> Callable[[], None]:
+    """Start draining as soon as SIGTERM/SIGINT arrives.
+
+    uvicorn and gunicorn stop accepting connections and wait for open ones
+    before the lifespan shutdown runs, so flagging the drain there is too
+    late to end event streams or fail readiness. The handlers already
+    installed keep running after ours. Returns a function restoring them;
+    does nothing outside the main thread, where signals can't be handled.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return lambda: None
+    loop = asyncio.get_running_loop()
+    previous = {}
+
+    def handler(signum, frame):
+        loop.call_soon_threadsafe(state.start_draining)
+        prev = previous[signum]
+        if callable(prev):
+            prev(signum, frame)
+        elif prev == signal.SIG_DFL:
+            # Nothing else handles it: keep the default behaviour
+            signal.signal(signum, signal.SIG_DFL)
+            signal.raise_signal(signum)
+
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        previous[signum] = signal.getsignal(signum)
+        signal.signal(signum, handler)
+
+    def restore() -> None:
+        for signum, prev in previous.items():
+            if prev is not None:
+                signal.signal(signum, prev)
+
+    return restore
+
+
+class DrainMiddleware:
+    """Count HTTP requests in flight for graceful shutdown."""
+
+    def __init__(self, app: ASGIApp, state: DrainState = drain_state):
+        self.app = app
+        self.state = state
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        self.state.request_started()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.state.request_finished()
@@ -1,33 +1,54 @@
 import asyncio
 import logging
 import os
-from typing import Any, Dict, NamedTuple
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Any, Dict, List, NamedTuple, Optional
 
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from metrics import EMAIL_ITEMS, EMAIL_SEND_LATENCY, EMAIL_SENDS
+
+if TYPE_CHECKING:
+    import httpx
 
 logger = logging.getLogger(__name__)
 
+# Digest batching: one email per EMAIL_BATCH_SIZE submissions, or once the
+# oldest pending submission has waited EMAIL_BATCH_WINDOW_SECONDS.
+EMAIL_BATCH_SIZE = int(os.getenv("EMAIL_BATCH_SIZE", "20"))
+EMAIL_BATCH_WINDOW_SECONDS = float(os.getenv("EMAIL_BATCH_WINDOW_SECONDS", "60"))
+EMAIL_CONCURRENCY = int(os.getenv("EMAIL_CONCURRENCY", "4"))
+EMAIL_MAX_ATTEMPTS = int(os.getenv("EMAIL_MAX_ATTEMPTS", "8"))
+EMAIL_POLL_INTERVAL_SECONDS = float(os.getenv("EMAIL_POLL_INTERVAL_SECONDS", "5"))
+EMAIL_RETRY_BASE_SECONDS = float(os.getenv("EMAIL_RETRY_BASE_SECONDS", "30"))
+EMAIL_RETRY_MAX_SECONDS = float(os.getenv("EMAIL_RETRY_MAX_SECONDS", "3600"))
+# A claimed batch is handed to another worker if not finished within this lease
+EMAIL_LEASE_SECONDS = 300
+
 
 class SendGridConfig(NamedTuple):
     api_key: str
     from_addr: str
     notify_to: str
+    api_base: str
 
 
 def _get_sendgrid_config() -> SendGridConfig | None:
     api_key = os.getenv("SENDGRID_API_KEY")
     from_addr = os.getenv("SENDGRID_FROM") or ""
     notify_to = os.getenv("NOTIFY_TO") or from_addr
+    # Overridable so the send path can be pointed at a local fake endpoint
+    api_base = (os.getenv("SENDGRID_API_BASE") or "https://api.sendgrid.com").rstrip("/")
     if not api_key or not from_addr:
         return None
-    return SendGridConfig(api_key=api_key, from_addr=from_addr, notify_to=notify_to)
+    return SendGridConfig(api_key=api_key, from_addr=from_addr, notify_to=notify_to, api_base=api_base)
 
 
-def _build_contact_email(contact_data: Dict[str, Any], cfg: SendGridConfig) -> Mail:
-    subject = f"New contact from {contact_data.get('name', 'Unknown')}"
-    body_lines = [
-        "You received a new contact submission:\n",
+def _format_contact(contact_data: Dict[str, Any]) -> List[str]:
+    return [
         f"Name: {contact_data.get('name')}",
         f"Email: {contact_data.get('email')}",
         f"Subject: {contact_data.get('subject')}",
@@ -36,38 +57,204 @@ def _build_contact_email(contact_data: Dict[str, Any], cfg: SendGridConfig) -> M
         "",
         f"Status: {contact_data.get('status', 'new')}",
     ]
-    return Mail(
-        from_email=cfg.from_addr,
-        to_emails=cfg.notify_to,
-        subject=subject,
-        plain_text_content="\n".join(body_lines),
-    )
 
 
-def _send_sendgrid(message: Mail, cfg: SendGridConfig) -> None:
-    client = SendGridAPIClient(cfg.api_key)
-    response = client.send(message)
-    logger.info("SendGrid send status=%s", response.status_code)
+def _build_contact_email(contacts: List[Dict[str, Any]], cfg: SendGridConfig) -> Dict[str, Any]:
+    """Build a SendGrid v3 mail/send body for one or more contact submissions."""
+    if len(contacts) == 1:
+        subject = f"New contact from {contacts[0].get('name', 'Unknown')}"
+        body_lines = ["You received a new contact submission:\n", *_format_contact(contacts[0])]
+    else:
+        subject = f"{len(contacts)} new contact submissions"
+        body_lines = [f"You received {len(contacts)} new contact submissions:\n"]
+        for index, contact_data in enumerate(contacts, start=1):
+            body_lines += [f"--- {index} ---", *_format_contact(contact_data), ""]
+    return {
+        "personalizations": [{"to": [{"email": cfg.notify_to}]}],
+        "from": {"email": cfg.from_addr},
+        "subject": subject,
+        "content": [{"type": "text/plain", "value": "\n".join(body_lines)}],
+    }
 
 
-def send_contact_notification(contact_data: Dict[str, Any]) -> None:
-    """Send contact notification via SendGrid."""
-    cfg = _get_sendgrid_config()
-    if not cfg:
+async def enqueue_contact_notification(db: AsyncIOMotorDatabase, contact_data: Dict[str, Any]) -> None:
+    """Record a contact notification in the outbox for the worker to send."""
+    if not _get_sendgrid_config():
         logger.warning("SendGrid not configured (missing SENDGRID_API_KEY/SENDGRID_FROM); skipping send")
         return
+    now = datetime.utcnow()
+    await db.email_outbox.insert_one({
+        "id": str(uuid.uuid4()),
+        "kind": "contact",
+        "payload": contact_data,
+        "status": "pending",
+        "attempts": 0,
+        "next_attempt_at": now,
+        "created_at": now,
+    })
+    if outbox_worker is not None:
+        outbox_worker.wake()
 
-    try:
-        message = _build_contact_email(contact_data, cfg)
-    except Exception as exc:  # pragma: no cover
-        logger.error("Failed to build contact email: %s", exc)
-        return
 
-    try:
-        asyncio.run_coroutine_threadsafe(
-            asyncio.to_thread(_send_sendgrid, message, cfg), asyncio.get_event_loop()
+class OutboxWorker:
+    """Drains db.email_outbox into digest emails sent through SendGrid.
+
+    Items move pending -> sending -> sent, or back to pending with
+    exponential backoff on failure until EMAIL_MAX_ATTEMPTS, then failed.
+    A batch whose worker died mid-send is picked up again once its lease
+    expires.
+    """
+
+    def __init__(
+        self,
+        db: AsyncIOMotorDatabase,
+        cfg: SendGridConfig,
+        transport: Optional["httpx.AsyncBaseTransport"] = None,
+    ):
+        # Imported here so processes without SendGrid configured never load it
+        import httpx
+
+        self.db = db
+        self.cfg = cfg
+        self.http = httpx.AsyncClient(
+            base_url=cfg.api_base,
+            headers={"Authorization": f"Bearer {cfg.api_key}"},
+            limits=httpx.Limits(max_connections=EMAIL_CONCURRENCY),
+            timeout=10.0,
+            transport=transport,
         )
-    except RuntimeError:
-        _send_sendgrid(message, cfg)
-    except Exception as exc:  # pragma: no cover
-        logger.error("SendGrid send failed: %s", exc)
+        self._semaphore = asyncio.Semaphore(EMAIL_CONCURRENCY)
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._task: Optional[asyncio.Task] = None
+        self._sends: set = set()
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    def wake(self) -> None:
+        self._wakeup.set()
+
+    async def stop(self) -> None:
+        """Stop claiming new batches, wait for in-flight sends, close the client."""
+        self._stopping = True
+        self._wakeup.set()
+        if self._task is not None:
+            await self._task
+        if self._sends:
+            await asyncio.gather(*self._sends, return_exceptions=True)
+        await self.http.aclose()
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            # Only claim work when a send slot is free, so claimed items don't sit idle
+            await self._semaphore.acquire()
+            # stop() may have been called while waiting for the slot
+            if self._stopping:
+                self._semaphore.release()
+                break
+            try:
+                batch = await self._claim_batch()
+            except Exception as exc:
+                logger.error("Email outbox claim failed: %s", exc)
+                batch = None
+            if batch:
+                task = asyncio.create_task(self._send_batch(batch))
+                self._sends.add(task)
+                task.add_done_callback(self._sends.discard)
+                continue
+            self._semaphore.release()
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), EMAIL_POLL_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _claim_batch(self) -> Optional[List[Dict[str, Any]]]:
+        now = datetime.utcnow()
+        due = {"$or": [
+            {"status": "pending", "next_attempt_at": {"$lte": now}},
+            {"status": "sending", "locked_until": {"$lt": now}},
+        ]}
+        candidates = await self.db.email_outbox.find(
+            due, {"_id": 0, "id": 1, "created_at": 1}
+        ).sort("created_at", 1).limit(EMAIL_BATCH_SIZE).to_list(EMAIL_BATCH_SIZE)
+        if not candidates:
+            return None
+        window_open = candidates[0]["created_at"] > now - timedelta(seconds=EMAIL_BATCH_WINDOW_SECONDS)
+        if len(candidates) < EMAIL_BATCH_SIZE and window_open:
+            return None
+
+        claim = str(uuid.uuid4())
+        await self.db.email_outbox.update_many(
+            {"$and": [due, {"id": {"$in": [item["id"] for item in candidates]}}]},
+            {"$set": {
+                "status": "sending",
+                "claim": claim,
+                "locked_until": now + timedelta(seconds=EMAIL_LEASE_SECONDS)
+            }}
+        )
+        return await self.db.email_outbox.find({"claim": claim}).to_list(EMAIL_BATCH_SIZE)
+
+    async def _send_batch(self, batch: List[Dict[str, Any]]) -> None:
+        ids = [item["id"] for item in batch]
+        try:
+            message = _build_contact_email([item["payload"] for item in batch], self.cfg)
+            start = time.perf_counter()
+            try:
+                response = await self.http.post("/v3/mail/send", json=message)
+            finally:
+                EMAIL_SEND_LATENCY.observe(time.perf_counter() - start)
+            response.raise_for_status()
+            logger.info("SendGrid send status=%s items=%s", response.status_code, len(batch))
+            EMAIL_SENDS.inc(outcome="sent")
+            EMAIL_ITEMS.inc(len(batch), status="sent")
+            await self.db.email_outbox.update_many(
+                {"id": {"$in": ids}},
+                {"$set": {"status": "sent", "sent_at": datetime.utcnow()}, "$unset": {"claim": "", "locked_until": ""}}
+            )
+        except Exception as exc:
+            logger.error("SendGrid send failed for %s items: %s", len(batch), exc)
+            EMAIL_SENDS.inc(outcome="error")
+            await self._reschedule(batch, str(exc))
+        finally:
+            self._semaphore.release()
+
+    async def _reschedule(self, batch: List[Dict[str, Any]], error: str) -> None:
+        now = datetime.utcnow()
+        for item in batch:
+            attempts = item.get("attempts", 0) + 1
+            update = {"attempts": attempts, "last_error": error}
+            if attempts >= EMAIL_MAX_ATTEMPTS:
+                update["status"] = "failed"
+            else:
+                delay = min(EMAIL_RETRY_BASE_SECONDS * 2 ** (attempts - 1), EMAIL_RETRY_MAX_SECONDS)
+                update["status"] = "pending"
+                update["next_attempt_at"] = now + timedelta(seconds=delay * random.uniform(0.8, 1.2))
+            EMAIL_ITEMS.inc(status=update["status"])
+            await self.db.email_outbox.update_one(
+                {"id": item["id"]},
+                {"$set": update, "$unset": {"claim": "", "locked_until": ""}}
+            )
+
+
+outbox_worker: Optional[OutboxWorker] = None
+
+
+def start_outbox_worker(db: AsyncIOMotorDatabase) -> Optional[OutboxWorker]:
+    """Start the process-wide outbox worker if SendGrid is configured."""
+    global outbox_worker
+    cfg = _get_sendgrid_config()
+    if not cfg:
+        logger.warning("SendGrid not configured; email outbox worker not started")
+        return None
+    outbox_worker = OutboxWorker(db, cfg)
+    outbox_worker.start()
+    return outbox_worker
+
+
+async def stop_outbox_worker() -> None:
+    global outbox_worker
+    if outbox_worker is not None:
+        await outbox_worker.stop()
+        outbox_worker = None
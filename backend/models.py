@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, EmailStr
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 import uuid
 
@@ -19,6 +19,7 @@ class ProjectCreate(ProjectBase):
 
 class Project(ProjectBase):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    image_variants: Dict[str, str] = Field(default_factory=dict)
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
     class Config:
@@ -48,6 +49,7 @@ class TestimonialCreate(TestimonialBase):
 
 class Testimonial(TestimonialBase):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    avatar_variants: Dict[str, str] = Field(default_factory=dict)
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
     class Config:
@@ -77,6 +79,10 @@ class Contact(ContactBase):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     status: str = "new"
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    # Set on every write; change polling and event replay follow it
+    updated_at: Optional[datetime] = None
+    # Set when retention moves the contact to contacts_archive
+    archived_at: Optional[datetime] = None
 
     class Config:
         json_schema_extra = {
@@ -90,10 +96,43 @@ class Contact(ContactBase):
         }
 
 
+CONTACT_STATUSES = ("new", "read", "replied")
+
+
 class ContactStatusUpdate(BaseModel):
     status: str = Field(pattern="^(new|read|replied)$")
 
 
+class BulkDeleteRequest(BaseModel):
+    ids: List[str] = Field(min_length=1, max_length=1000)
+
+
+class ContactBulkFilter(BaseModel):
+    status: Optional[str] = Field(None, pattern="^(new|read|replied)$")
+    created_before: Optional[datetime] = None
+    created_after: Optional[datetime] = None
+
+
+class ContactBulkRequest(BaseModel):
+    action: str = Field(pattern="^(set_status|delete)$")
+    status: Optional[str] = Field(None, pattern="^(new|read|replied)$")
+    # Exactly one of ids or filter selects the contacts
+    ids: Optional[List[str]] = Field(None, min_length=1, max_length=1000)
+    filter: Optional[ContactBulkFilter] = None
+
+
+class BulkItemResult(BaseModel):
+    id: str
+    result: str
+
+
+class BulkResult(BaseModel):
+    matched: int
+    modified: int
+    # Per-item outcomes; only reported when items were selected by id
+    results: List[BulkItemResult] = Field(default_factory=list)
+
+
 class AdminUserBase(BaseModel):
     username: str
     email: EmailStr
@@ -121,4 +160,5 @@ class Token(BaseModel):
 
 class FileUploadResponse(BaseModel):
     filename: str
-    url: str
\ No newline at end of file
+    url: str
+    variants: Dict[str, str] = Field(default_factory=dict)
\ No newline at end of file
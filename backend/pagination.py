@@ -0,0 +1,123 @@
+import asyncio
+import base64
+import heapq
+import itertools
+import json
+from datetime import datetime
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple, Type
+
+from fastapi import HTTPException
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pydantic import BaseModel
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Keyset order shared by every listing; ties on created_at are broken by id.
+SORT_ORDER = [("created_at", -1), ("id", -1)]
+
+
+def encode_cursor(doc: Dict[str, Any]) -> str:
+    """Build an opaque cursor pointing just past the given document."""
+    payload = json.dumps([doc["created_at"].isoformat(), doc["id"]])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Decode a cursor produced by encode_cursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, doc_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), str(doc_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def parse_fields(fields: Optional[str], model: Type[BaseModel]) -> Dict[str, int]:
+    """Turn a comma-separated `fields=` value into a Mongo projection.
+
+    `id` and `created_at` are always included since the cursor is built from them.
+    """
+    allowed = list(model.model_fields)
+    if fields:
+        names = [name.strip() for name in fields.split(",") if name.strip()]
+        unknown = sorted(set(names) - set(allowed))
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown fields: {', '.join(unknown)}. Allowed fields: {', '.join(allowed)}"
+            )
+    else:
+        names = allowed
+
+    projection = {"_id": 0, "id": 1, "created_at": 1}
+    projection.update({name: 1 for name in names})
+    return projection
+
+
+def page_cache_key(cursor: Optional[str], projection: Dict[str, int], *parts: Hashable) -> Optional[Tuple]:
+    """Cache key for a listing page, or None if the page shouldn't be cached.
+
+    Only first pages are cached: cursors are chosen by the client, so caching
+    later pages would let anyone flush the cache with one-off entries. The
+    key uses the validated projection, not the raw `fields=` string.
+    """
+    if cursor:
+        return None
+    return (*parts, tuple(sorted(projection)))
+
+
+def _after_cursor(query: Dict[str, Any], cursor: Optional[str]) -> Dict[str, Any]:
+    """Restrict query to documents after the cursor position."""
+    if not cursor:
+        return query
+    created_at, last_id = decode_cursor(cursor)
+    after = {"$or": [
+        {"created_at": {"$lt": created_at}},
+        {"created_at": created_at, "id": {"$lt": last_id}},
+    ]}
+    return {"$and": [query, after]} if query else after
+
+
+async def paginate(
+    collection: AsyncIOMotorCollection,
+    query: Dict[str, Any],
+    limit: int,
+    cursor: Optional[str] = None,
+    projection: Optional[Dict[str, int]] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Fetch one page ordered by (created_at, id) descending.
+
+    Returns the documents and the cursor for the next page (None on the last page).
+    """
+    query = _after_cursor(query, cursor)
+    # Fetch one extra document to learn whether another page exists.
+    docs = await collection.find(query, projection).sort(SORT_ORDER).limit(limit + 1).to_list(limit + 1)
+    next_cursor = encode_cursor(docs[limit - 1]) if len(docs) > limit else None
+    return docs[:limit], next_cursor
+
+
+async def paginate_merged(
+    collections: Sequence[AsyncIOMotorCollection],
+    query: Dict[str, Any],
+    limit: int,
+    cursor: Optional[str] = None,
+    projection: Optional[Dict[str, int]] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Like paginate, over several collections sharing the same ids and order.
+
+    Each collection is queried for a page concurrently and the pages are
+    merged, so each query still uses its own (created_at, id) index.
+    """
+    query = _after_cursor(query, cursor)
+    pages = await asyncio.gather(*(
+        collection.find(query, projection).sort(SORT_ORDER).limit(limit + 1).to_list(limit + 1)
+        for collection in collections
+    ))
+    docs = heapq.merge(*pages, key=lambda doc: (doc["created_at"], doc["id"]), reverse=True)
+    docs = list(itertools.islice(docs, limit + 1))
+    next_cursor = encode_cursor(docs[limit - 1]) if len(docs) > limit else None
+    return docs[:limit], next_cursor
+
+
+def next_cursor_headers(next_cursor: Optional[str]) -> Dict[str, str]:
+    return {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
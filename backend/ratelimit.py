@@ -0,0 +1,184 @@
+import logging
+import math
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+# Behind reverse proxies the client address is the nearest proxy's. Set this to
+# how many proxies append to X-Forwarded-For; 0 ignores the header
+TRUSTED_PROXY_COUNT = int(os.getenv("TRUSTED_PROXY_COUNT", "0"))
+
+
+class RateLimitRule(NamedTuple):
+    """Token bucket: bursts of up to `capacity`, refilled at `refill_per_second`."""
+    capacity: float
+    refill_per_second: float
+
+    @classmethod
+    def parse(cls, spec: str) -> "RateLimitRule":
+        """Parse "<requests>/<seconds>", e.g. "5/600" for five requests per ten minutes."""
+        requests, seconds = spec.split("/")
+        return cls(capacity=float(requests), refill_per_second=float(requests) / float(seconds))
+
+
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    retry_after: float = 0.0
+
+
+def _retry_after(tokens: float, rule: RateLimitRule) -> float:
+    return max(1.0 - tokens, 0.0) / rule.refill_per_second
+
+
+class InMemoryRateLimitBackend:
+    """Per-process buckets; limits are per worker."""
+
+    def __init__(self, max_keys: int = 10000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def hit(self, key: str, rule: RateLimitRule) -> RateLimitResult:
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.pop(key, (rule.capacity, now))
+        tokens = min(rule.capacity, tokens + (now - updated_at) * rule.refill_per_second)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return RateLimitResult(allowed, 0.0 if allowed else _retry_after(tokens, rule))
+
+
+class MongoRateLimitBackend:
+    """Buckets shared by all workers, one document per key.
+
+    Each hit is a single atomic pipeline update (MongoDB 4.2+); idle buckets
+    are removed by the TTL index on `expires_at`.
+    """
+
+    def __init__(self, collection: AsyncIOMotorCollection):
+        self.collection = collection
+
+    async def hit(self, key: str, rule: RateLimitRule) -> RateLimitResult:
+        now = time.time()
+        # A bucket left idle long enough to refill completely can be forgotten
+        idle_ttl = rule.capacity / rule.refill_per_second
+        refilled = {"$min": [
+            rule.capacity,
+            {"$add": [
+                {"$ifNull": ["$tokens", rule.capacity]},
+                {"$multiply": [{"$subtract": [now, {"$ifNull": ["$updated_at", now]}]}, rule.refill_per_second]},
+            ]},
+        ]}
+        pipeline = [
+            {"$set": {"tokens": refilled}},
+            {"$set": {
+                "allowed": {"$gte": ["$tokens", 1]},
+                "updated_at": now,
+                "expires_at": datetime.utcnow() + timedelta(seconds=idle_ttl),
+            }},
+            {"$set": {"tokens": {"$cond": ["$allowed", {"$subtract": ["$tokens", 1]}, "$tokens"]}}},
+        ]
+        try:
+            bucket = await self.collection.find_one_and_update(
+                {"_id": key}, pipeline, upsert=True, return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            # Another worker created the bucket between our match and insert; it exists now
+            bucket = await self.collection.find_one_and_update(
+                {"_id": key}, pipeline, upsert=True, return_document=ReturnDocument.AFTER
+            )
+        if bucket["allowed"]:
+            return RateLimitResult(True)
+        return RateLimitResult(False, _retry_after(bucket["tokens"], rule))
+
+
+def default_rules() -> Dict[Tuple[str, str], RateLimitRule]:
+    return {
+        ("POST", "/api/contact"): RateLimitRule.parse(os.getenv("RATE_LIMIT_CONTACT", "5/600")),
+        ("POST", "/api/admin/login"): RateLimitRule.parse(os.getenv("RATE_LIMIT_LOGIN", "10/60")),
+        ("GET", "/api/projects/search"): RateLimitRule.parse(os.getenv("RATE_LIMIT_SEARCH", "60/60")),
+    }
+
+
+def create_rate_limit_backend(collection: AsyncIOMotorCollection):
+    """Build the backend selected by RATE_LIMIT_BACKEND (memory or mongo)."""
+    backend = os.getenv("RATE_LIMIT_BACKEND", "memory").lower()
+    if backend == "memory":
+        return InMemoryRateLimitBackend()
+    if backend == "mongo":
+        return MongoRateLimitBackend(collection)
+    raise ValueError(f"Unknown RATE_LIMIT_BACKEND: {backend}")
+
+
+def client_ip(scope: Scope, trusted_proxies: int = TRUSTED_PROXY_COUNT) -> str:
+    """The client address as seen by the outermost trusted proxy.
+
+    Clients can put anything in X-Forwarded-For; only the last
+    `trusted_proxies` entries were appended by our own proxies, so the
+    entry that many hops from the right is the first one we can trust.
+    """
+    if trusted_proxies > 0:
+        forwarded = [
+            entry.strip()
+            for name, value in scope.get("headers", [])
+            if name == b"x-forwarded-for"
+            for entry in value.decode("latin-1").split(",")
+        ]
+        if len(forwarded) >= trusted_proxies:
+            return forwarded[-trusted_proxies]
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+class RateLimitMiddleware:
+    """Token-bucket limiting per client IP and route; over-limit requests get 429.
+
+    Without an explicit backend, app.state.rate_limit_backend is used; the
+    lifespan sets it once the database is open.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        backend=None,
+        rules: Optional[Dict[Tuple[str, str], RateLimitRule]] = None,
+    ):
+        self.app = app
+        self.backend = backend
+        self.rules = default_rules() if rules is None else rules
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            rule = self.rules.get((scope["method"], scope["path"]))
+            if rule is not None:
+                key = f"{scope['method']} {scope['path']} {client_ip(scope)}"
+                try:
+                    backend = self.backend
+                    if backend is None:
+                        backend = scope["app"].state.rate_limit_backend
+                    result = await backend.hit(key, rule)
+                except Exception as exc:
+                    # Fail open: a limiter outage should not take the endpoint down
+                    logger.error("Rate limiter unavailable: %s", exc)
+                    result = RateLimitResult(True)
+                if not result.allowed:
+                    response = JSONResponse(
+                        {"detail": "Too many requests"},
+                        status_code=429,
+                        headers={"Retry-After": str(max(1, math.ceil(result.retry_after)))},
+                    )
+                    await response(scope, receive, send)
+                    return
+        await self.app(scope, receive, send)
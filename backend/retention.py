@@ -0,0 +1,171 @@
+import asyncio
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReplaceOne
+from pymongo.errors import CollectionInvalid, DuplicateKeyError, OperationFailure, PyMongoError
+
+from cache import content_cache
+from events import bump_version
+
+logger = logging.getLogger(__name__)
+
+# Contacts in these statuses move to contacts_archive once older than
+# CONTACT_RETENTION_DAYS; 0 disables archiving
+CONTACT_RETENTION_DAYS = int(os.getenv("CONTACT_RETENTION_DAYS", "0"))
+CONTACT_RETENTION_STATUSES = tuple(
+    status.strip() for status in os.getenv("CONTACT_RETENTION_STATUSES", "read,replied").split(",") if status.strip()
+)
+CONTACT_ARCHIVE_BATCH_SIZE = int(os.getenv("CONTACT_ARCHIVE_BATCH_SIZE", "500"))
+CONTACT_ARCHIVE_INTERVAL_SECONDS = float(os.getenv("CONTACT_ARCHIVE_INTERVAL_SECONDS", "3600"))
+# Archived contacts are deleted this long after archiving; 0 keeps them
+CONTACT_ARCHIVE_TTL_DAYS = int(os.getenv("CONTACT_ARCHIVE_TTL_DAYS", "0"))
+# WiredTiger block compressor for the archive, applied when the collection is
+# created; empty uses the server default
+CONTACT_ARCHIVE_COMPRESSOR = os.getenv("CONTACT_ARCHIVE_COMPRESSOR", "zstd")
+
+ARCHIVE_COLLECTION = "contacts_archive"
+# Only one worker archives at a time; the lease is renewed every batch
+ARCHIVE_LEASE_ID = "contact_archive"
+ARCHIVE_LEASE_SECONDS = 300
+
+_worker_id = str(uuid.uuid4())
+
+
+async def ensure_archive_collection(db: AsyncIOMotorDatabase) -> None:
+    """Create contacts_archive with a stronger block compressor, if it doesn't exist yet.
+
+    Must run before its indexes are created, which would create it with defaults.
+    """
+    if not CONTACT_ARCHIVE_COMPRESSOR or ARCHIVE_COLLECTION in await db.list_collection_names():
+        return
+    try:
+        await db.create_collection(
+            ARCHIVE_COLLECTION,
+            storageEngine={"wiredTiger": {"configString": f"block_compressor={CONTACT_ARCHIVE_COMPRESSOR}"}}
+        )
+    except CollectionInvalid:
+        pass  # Created by another worker meanwhile
+    except OperationFailure as exc:
+        logger.warning("Could not create %s with %s compression (%s); using defaults",
+                       ARCHIVE_COLLECTION, CONTACT_ARCHIVE_COMPRESSOR, exc)
+
+
+async def _acquire_lease(db: AsyncIOMotorDatabase) -> bool:
+    now = datetime.utcnow()
+    try:
+        await db.job_leases.update_one(
+            {"_id": ARCHIVE_LEASE_ID, "$or": [{"expires_at": {"$lt": now}}, {"holder": _worker_id}]},
+            {"$set": {"holder": _worker_id, "expires_at": now + timedelta(seconds=ARCHIVE_LEASE_SECONDS)}},
+            upsert=True
+        )
+        return True
+    except DuplicateKeyError:
+        # The lease document exists and another worker holds it
+        return False
+
+
+async def _release_lease(db: AsyncIOMotorDatabase) -> None:
+    await db.job_leases.update_one(
+        {"_id": ARCHIVE_LEASE_ID, "holder": _worker_id},
+        {"$set": {"expires_at": datetime.utcnow()}}
+    )
+
+
+async def archive_contacts(db: AsyncIOMotorDatabase, retention_days: int = CONTACT_RETENTION_DAYS) -> int:
+    """Move contacts past retention into contacts_archive in batches.
+
+    Each batch is copied first, then removed from contacts only where the
+    document is unchanged since it was read; copies of documents edited in
+    between are dropped and picked up again on a later run. Returns how many
+    contacts were moved (0 when another worker holds the job).
+    """
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    query = {"status": {"$in": list(CONTACT_RETENTION_STATUSES)}, "created_at": {"$lt": cutoff}}
+    moved = 0
+    try:
+        while await _acquire_lease(db):
+            docs = await db.contacts.find(query).limit(CONTACT_ARCHIVE_BATCH_SIZE).to_list(CONTACT_ARCHIVE_BATCH_SIZE)
+            if not docs:
+                break
+            archived_at = datetime.utcnow()
+            await db[ARCHIVE_COLLECTION].bulk_write(
+                [ReplaceOne({"_id": doc["_id"]}, {**doc, "archived_at": archived_at}, upsert=True) for doc in docs],
+                ordered=False
+            )
+            ids = [doc["_id"] for doc in docs]
+            result = await db.contacts.delete_many(
+                {"$or": [{"_id": doc["_id"], "updated_at": doc.get("updated_at")} for doc in docs]}
+            )
+            if result.deleted_count < len(docs):
+                edited = await db.contacts.distinct("_id", {"_id": {"$in": ids}})
+                await db[ARCHIVE_COLLECTION].delete_many({"_id": {"$in": edited}})
+            moved += result.deleted_count
+            if len(docs) < CONTACT_ARCHIVE_BATCH_SIZE or result.deleted_count == 0:
+                break
+    finally:
+        await _release_lease(db)
+
+    if moved:
+        content_cache.invalidate("contacts")
+        content_cache.invalidate("stats")
+        await bump_version(db, "contacts")
+    return moved
+
+
+class RetentionJob:
+    """Runs archive_contacts every CONTACT_ARCHIVE_INTERVAL_SECONDS."""
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.db = db
+        self._stop = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                moved = await archive_contacts(self.db)
+                if moved:
+                    logger.info("Archived %s contacts older than %s days", moved, CONTACT_RETENTION_DAYS)
+            except PyMongoError as exc:
+                logger.warning("Contact archiving failed: %s", exc)
+            try:
+                await asyncio.wait_for(self._stop.wait(), CONTACT_ARCHIVE_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+
+retention_job: Optional[RetentionJob] = None
+
+
+def start_retention_job(db: AsyncIOMotorDatabase) -> Optional[RetentionJob]:
+    """Start the process-wide archiving job if CONTACT_RETENTION_DAYS is set."""
+    global retention_job
+    if CONTACT_RETENTION_DAYS <= 0:
+        return None
+    retention_job = RetentionJob(db)
+    retention_job.start()
+    return retention_job
+
+
+async def stop_retention_job() -> None:
+    global retention_job
+    if retention_job is not None:
+        await retention_job.stop()
+        retention_job = None
@@ -1,26 +1,118 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Depends
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from typing import Dict, List, Optional, Tuple
 from models import (
     Project, ProjectCreate,
     Testimonial, TestimonialCreate,
     Contact, ContactStatusUpdate,
+    BulkDeleteRequest, ContactBulkRequest, BulkResult,
     AdminLogin, Token, AdminUserCreate, AdminUser,
-    FileUploadResponse
+    FileUploadResponse, CONTACT_STATUSES
 )
 from auth import (
-    get_password_hash, verify_password, create_access_token, get_current_admin
+    hash_password_async, verify_password_async, create_access_token, get_current_admin,
+    get_current_token, get_stream_admin, revoke_token, VerifiedToken,
+    create_stream_ticket, auth_state, STREAM_TICKET_SECONDS
 )
-from file_handler import save_upload_file, delete_file
-from motor.motor_asyncio import AsyncIOMotorDatabase
-from datetime import timedelta
+from file_handler import save_upload_file, confirm_upload, release_file, release_files, get_image_variants
+from cache import content_cache
+from serialization import render_json
+from pagination import paginate, paginate_merged, parse_fields, next_cursor_headers
+from search import search, CONTACT_SEARCH
+from export import export_response
+from retention import ARCHIVE_COLLECTION
+from snapshot import content_changed
+from events import event_bus, bump_version
+from lifecycle import drain_state
+from database import get_db
+from motor.motor_asyncio import AsyncIOMotorDatabase, AsyncIOMotorCollection
+from pymongo import ReturnDocument
+from datetime import datetime, timedelta
+import asyncio
 import json
+import os
+import time
 
 router = APIRouter()
 
+# Dashboard stats are shared across admin sessions for a few seconds.
+STATS_TTL_SECONDS = float(os.getenv("STATS_TTL_SECONDS", "5"))
+# Contact event streams: comment keepalives keep proxies from closing idle
+# streams; streams end after SSE_MAX_STREAM_SECONDS and the browser reconnects,
+# which also keeps deploys from waiting on them.
+SSE_KEEPALIVE_SECONDS = float(os.getenv("SSE_KEEPALIVE_SECONDS", "15"))
+SSE_MAX_STREAM_SECONDS = float(os.getenv("SSE_MAX_STREAM_SECONDS", "300"))
+SSE_REPLAY_LIMIT = 500
 
-async def get_db():
-    from server import db
-    return db
+
+async def _update_returning_previous(
+    collection: AsyncIOMotorCollection, doc_id: str, updated_data: dict
+) -> Optional[tuple]:
+    """Apply a $set in a single round trip.
+
+    Returns (previous, updated) documents, or None if no document matched.
+    The pre-image is needed for file cleanup; since $set only replaces the
+    given fields, the post-image is derived from it instead of re-reading.
+    """
+    previous = await collection.find_one_and_update(
+        {"id": doc_id},
+        {"$set": updated_data},
+        return_document=ReturnDocument.BEFORE
+    )
+    if previous is None:
+        return None
+    return previous, {**previous, **updated_data}
+
+
+async def _variants_for_update(
+    collection: AsyncIOMotorCollection, doc_id: str, file_field: str, file_path: str, not_found: str
+) -> Dict[str, str]:
+    """Image variants for a PUT that sets file_field to file_path.
+
+    Checks the document exists first (404 with `not_found` otherwise), so no
+    variants are built for updates that can't apply; an unchanged file keeps
+    its stored variants.
+    """
+    variants_field = f"{file_field}_variants"
+    existing = await collection.find_one({"id": doc_id}, {"_id": 0, file_field: 1, variants_field: 1})
+    if existing is None:
+        raise HTTPException(status_code=404, detail=not_found)
+    if existing.get(file_field) == file_path and existing.get(variants_field):
+        return existing[variants_field]
+    return await get_image_variants(file_path)
+
+
+def _bulk_result(ids: List[str], found: set, outcome: str, modified: int) -> BulkResult:
+    results = [{"id": doc_id, "result": outcome if doc_id in found else "not_found"} for doc_id in ids]
+    return BulkResult(matched=len(found), modified=modified, results=results)
+
+
+def _created_between(created_after: Optional[datetime], created_before: Optional[datetime]) -> dict:
+    """Query for documents created in [created_after, created_before)."""
+    created_range = {}
+    if created_after is not None:
+        created_range["$gte"] = created_after
+    if created_before is not None:
+        created_range["$lt"] = created_before
+    return {"created_at": created_range} if created_range else {}
+
+
+async def _bulk_delete_with_files(
+    db: AsyncIOMotorDatabase, collection_name: str, file_field: str, ids: List[str]
+) -> BulkResult:
+    """Delete documents by id in one delete_many, then release their files as a batch."""
+    collection = db[collection_name]
+    ids = list(dict.fromkeys(ids))
+    docs = await collection.find(
+        {"id": {"$in": ids}}, {"_id": 0, "id": 1, file_field: 1}
+    ).to_list(len(ids))
+    found = {doc["id"] for doc in docs}
+    result = await collection.delete_many({"id": {"$in": list(found)}}) if found else None
+    deleted = result.deleted_count if result else 0
+    if deleted:
+        await release_files(db, [doc.get(file_field, "") for doc in docs])
+        await content_changed(db, collection_name)
+    return _bulk_result(ids, found, "deleted", deleted)
 
 
 # Authentication Routes
@@ -28,10 +120,17 @@ async def get_db():
 async def admin_login(credentials: AdminLogin, db: AsyncIOMotorDatabase = Depends(get_db)):
     """Admin login endpoint."""
     admin = await db.admins.find_one({"username": credentials.username})
+    if not admin or admin.get("disabled"):
+        raise HTTPException(status_code=401, detail="Incorrect username or password")
     
-    if not admin or not verify_password(credentials.password, admin["password_hash"]):
+    valid, new_hash = await verify_password_async(credentials.password, admin["password_hash"])
+    if not valid:
         raise HTTPException(status_code=401, detail="Incorrect username or password")
     
+    # Transparently upgrade hashes made with outdated cost parameters
+    if new_hash:
+        await db.admins.update_one({"username": admin["username"]}, {"$set": {"password_hash": new_hash}})
+    
     access_token = create_access_token(
         data={"sub": admin["username"]},
         expires_delta=timedelta(hours=24)
@@ -40,6 +139,16 @@ async def admin_login(credentials: AdminLogin, db: AsyncIOMotorDatabase = Depend
     return {"access_token": access_token, "token_type": "bearer"}
 
 
+@router.post("/admin/logout", response_model=dict)
+async def admin_logout(
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    token: VerifiedToken = Depends(get_current_token)
+):
+    """Revoke the caller's access token."""
+    await revoke_token(db, token)
+    return {"message": "Logged out successfully"}
+
+
 @router.post("/admin/register", response_model=dict)
 async def register_admin(
     admin_data: AdminUserCreate,
@@ -56,10 +165,11 @@ async def register_admin(
     admin = AdminUser(
         username=admin_data.username,
         email=admin_data.email,
-        password_hash=get_password_hash(admin_data.password)
+        password_hash=await hash_password_async(admin_data.password)
     )
     
     await db.admins.insert_one(admin.dict())
+    auth_state.admin_added(admin.username)
     return {"message": "Admin created successfully"}
 
 
@@ -68,17 +178,19 @@ async def register_admin(
 async def upload_file(
     file: UploadFile = File(...),
     subfolder: str = Form(...),
+    db: AsyncIOMotorDatabase = Depends(get_db),
     current_admin: str = Depends(get_current_admin)
 ):
     """Upload an image file."""
     if subfolder not in ["projects", "testimonials"]:
         raise HTTPException(status_code=400, detail="Invalid subfolder")
     
-    file_url = await save_upload_file(file, subfolder)
+    file_url = await save_upload_file(db, file, subfolder)
     
     return {
         "filename": file.filename,
-        "url": file_url
+        "url": file_url,
+        "variants": await get_image_variants(file_url)
     }
 
 
@@ -90,8 +202,10 @@ async def create_project(
     current_admin: str = Depends(get_current_admin)
 ):
     """Create a new project."""
-    project = Project(**project_data.dict())
+    project = Project(**project_data.dict(), image_variants=await get_image_variants(project_data.image))
     await db.projects.insert_one(project.dict())
+    await confirm_upload(db, project.image)
+    await content_changed(db, "projects")
     return project
 
 
@@ -103,18 +217,21 @@ async def update_project(
     current_admin: str = Depends(get_current_admin)
 ):
     """Update an existing project."""
-    existing = await db.projects.find_one({"id": project_id})
-    if not existing:
+    updated_data = project_data.dict()
+    updated_data["image_variants"] = await _variants_for_update(
+        db.projects, project_id, "image", project_data.image, "Project not found"
+    )
+    result = await _update_returning_previous(db.projects, project_id, updated_data)
+    if result is None:
         raise HTTPException(status_code=404, detail="Project not found")
+    existing, updated_project = result
+    await confirm_upload(db, project_data.image)
     
     # Delete old image if changed
     if existing.get("image") != project_data.image:
-        delete_file(existing.get("image", ""))
-    
-    updated_data = project_data.dict()
-    await db.projects.update_one({"id": project_id}, {"$set": updated_data})
+        await release_file(db, existing.get("image", ""))
     
-    updated_project = await db.projects.find_one({"id": project_id})
+    await content_changed(db, "projects")
     return Project(**updated_project)
 
 
@@ -125,17 +242,43 @@ async def delete_project(
     current_admin: str = Depends(get_current_admin)
 ):
     """Delete a project."""
-    project = await db.projects.find_one({"id": project_id})
+    project = await db.projects.find_one_and_delete({"id": project_id}, projection={"_id": 0, "image": 1})
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
     # Delete associated image
-    delete_file(project.get("image", ""))
+    await release_file(db, project.get("image", ""))
     
-    await db.projects.delete_one({"id": project_id})
+    await content_changed(db, "projects")
     return {"message": "Project deleted successfully"}
 
 
+@router.post("/admin/projects/bulk-delete", response_model=BulkResult)
+async def bulk_delete_projects(
+    request: BulkDeleteRequest,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    current_admin: str = Depends(get_current_admin)
+):
+    """Delete several projects and release their images."""
+    return await _bulk_delete_with_files(db, "projects", "image", request.ids)
+
+
+@router.get("/admin/projects/export")
+async def export_projects(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    category: Optional[str] = None,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    current_admin: str = Depends(get_current_admin)
+):
+    """Download all matching projects as CSV or NDJSON."""
+    query = _created_between(created_after, created_before)
+    if category:
+        query["category"] = category
+    return export_response(db.projects, query, Project, format)
+
+
 # Testimonial Management Routes
 @router.post("/admin/testimonials", response_model=Testimonial)
 async def create_testimonial(
@@ -144,8 +287,12 @@ async def create_testimonial(
     current_admin: str = Depends(get_current_admin)
 ):
     """Create a new testimonial."""
-    testimonial = Testimonial(**testimonial_data.dict())
+    testimonial = Testimonial(
+        **testimonial_data.dict(), avatar_variants=await get_image_variants(testimonial_data.avatar)
+    )
     await db.testimonials.insert_one(testimonial.dict())
+    await confirm_upload(db, testimonial.avatar)
+    await content_changed(db, "testimonials")
     return testimonial
 
 
@@ -157,18 +304,21 @@ async def update_testimonial(
     current_admin: str = Depends(get_current_admin)
 ):
     """Update an existing testimonial."""
-    existing = await db.testimonials.find_one({"id": testimonial_id})
-    if not existing:
+    updated_data = testimonial_data.dict()
+    updated_data["avatar_variants"] = await _variants_for_update(
+        db.testimonials, testimonial_id, "avatar", testimonial_data.avatar, "Testimonial not found"
+    )
+    result = await _update_returning_previous(db.testimonials, testimonial_id, updated_data)
+    if result is None:
         raise HTTPException(status_code=404, detail="Testimonial not found")
+    existing, updated_testimonial = result
+    await confirm_upload(db, testimonial_data.avatar)
     
     # Delete old avatar if changed
     if existing.get("avatar") != testimonial_data.avatar:
-        delete_file(existing.get("avatar", ""))
+        await release_file(db, existing.get("avatar", ""))
     
-    updated_data = testimonial_data.dict()
-    await db.testimonials.update_one({"id": testimonial_id}, {"$set": updated_data})
-    
-    updated_testimonial = await db.testimonials.find_one({"id": testimonial_id})
+    await content_changed(db, "testimonials")
     return Testimonial(**updated_testimonial)
 
 
@@ -179,36 +329,226 @@ async def delete_testimonial(
     current_admin: str = Depends(get_current_admin)
 ):
     """Delete a testimonial."""
-    testimonial = await db.testimonials.find_one({"id": testimonial_id})
+    testimonial = await db.testimonials.find_one_and_delete(
+        {"id": testimonial_id}, projection={"_id": 0, "avatar": 1}
+    )
     if not testimonial:
         raise HTTPException(status_code=404, detail="Testimonial not found")
     
     # Delete associated avatar
-    delete_file(testimonial.get("avatar", ""))
+    await release_file(db, testimonial.get("avatar", ""))
     
-    await db.testimonials.delete_one({"id": testimonial_id})
+    await content_changed(db, "testimonials")
     return {"message": "Testimonial deleted successfully"}
 
 
+@router.post("/admin/testimonials/bulk-delete", response_model=BulkResult)
+async def bulk_delete_testimonials(
+    request: BulkDeleteRequest,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    current_admin: str = Depends(get_current_admin)
+):
+    """Delete several testimonials and release their avatars."""
+    return await _bulk_delete_with_files(db, "testimonials", "avatar", request.ids)
+
+
+@router.get("/admin/testimonials/export")
+async def export_testimonials(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    current_admin: str = Depends(get_current_admin)
+):
+    """Download all matching testimonials as CSV or NDJSON."""
+    query = _created_between(created_after, created_before)
+    return export_response(db.testimonials, query, Testimonial, format)
+
+
 # Contact Management Routes
 @router.get("/admin/contacts", response_model=List[Contact])
 async def get_contacts(
+    status: Optional[str] = Query(None, pattern="^(new|read|replied)$"),
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    include_archived: bool = False,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    current_admin: str = Depends(get_current_admin)
+):
+    """Get contact submissions newest first, paged through the X-Next-Cursor header.
+
+    `include_archived` merges in contacts moved to the archive by retention.
+    """
+    query = {"status": status} if status else {}
+    projection = parse_fields(fields, Contact)
+    if include_archived:
+        contacts, next_cursor = await paginate_merged(
+            [db.contacts, db[ARCHIVE_COLLECTION]], query, limit, cursor, projection
+        )
+    else:
+        contacts, next_cursor = await paginate(db.contacts, query, limit, cursor, projection)
+    return Response(
+        content=render_json(contacts),
+        media_type="application/json",
+        headers=next_cursor_headers(next_cursor)
+    )
+
+
+@router.get("/admin/contacts/search", response_model=List[Contact])
+async def search_contacts(
+    q: str = Query(..., min_length=1, max_length=200),
+    status: Optional[str] = Query(None, pattern="^(new|read|replied)$"),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
     db: AsyncIOMotorDatabase = Depends(get_db),
     current_admin: str = Depends(get_current_admin)
 ):
-    """Get all contact submissions."""
-    contacts = await db.contacts.find().sort("created_at", -1).to_list(1000)
-    return [Contact(**contact) for contact in contacts]
+    """Search contact submissions by text, best matches first, each with a `score`."""
+    query_filter = {"status": status} if status else {}
+    results, next_cursor = await search(db, CONTACT_SEARCH, q, limit, cursor, query_filter)
+    return Response(
+        content=render_json(results),
+        media_type="application/json",
+        headers=next_cursor_headers(next_cursor)
+    )
+
+
+@router.get("/admin/contacts/export")
+async def export_contacts(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    status: Optional[str] = Query(None, pattern="^(new|read|replied)$"),
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    include_archived: bool = False,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    current_admin: str = Depends(get_current_admin)
+):
+    """Download all matching contacts as CSV or NDJSON, streamed in batches.
+
+    With `include_archived`, archived contacts follow the live ones.
+    """
+    query = _created_between(created_after, created_before)
+    if status:
+        query["status"] = status
+    archive = [db[ARCHIVE_COLLECTION]] if include_archived else []
+    return export_response(db.contacts, query, Contact, format, followed_by=archive)
+
+
+def _sse(event: str, data, event_id: Optional[str] = None) -> bytes:
+    prefix = f"id: {event_id}\n".encode() if event_id else b""
+    return prefix + f"event: {event}\ndata: ".encode() + render_json(data) + b"\n\n"
+
+
+def _contact_event_id(contact: dict) -> Optional[str]:
+    """Position of a contact change, as "<updated_at>_<id>", for Last-Event-ID."""
+    updated_at = contact.get("updated_at")
+    return f"{updated_at.isoformat()}_{contact['id']}" if isinstance(updated_at, datetime) else None
+
+
+def _parse_contact_event_id(event_id: str) -> Optional[dict]:
+    """Query for contacts changed after the given event id, or None if malformed."""
+    timestamp, _, contact_id = event_id.rpartition("_")
+    try:
+        since = datetime.fromisoformat(timestamp)
+    except ValueError:
+        return None
+    return {"$or": [
+        {"updated_at": {"$gt": since}},
+        {"updated_at": since, "id": {"$gt": contact_id}},
+    ]}
+
+
+async def _next_event(queue: asyncio.Queue, draining: asyncio.Future, timeout: float) -> Optional[dict]:
+    """Wait for the next bus event; None on timeout or once the process starts draining."""
+    getter = asyncio.ensure_future(queue.get())
+    await asyncio.wait({getter, draining}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+    if not getter.done():
+        getter.cancel()
+        return None
+    return getter.result()
+
+
+async def _contact_events(db: AsyncIOMotorDatabase, last_event_id: Optional[str]):
+    # Subscribed inside the generator so the queue is only created (and always
+    # released) if the response body is actually sent. Subscribe before
+    # replaying so nothing falls between the two.
+    queue = event_bus.subscribe(["contacts"])
+    draining = asyncio.ensure_future(drain_state.wait_draining())
+    try:
+        yield b"retry: 3000\n\n"
+        if last_event_id:
+            # Catch up on what changed while the client was disconnected
+            query = _parse_contact_event_id(last_event_id)
+            missed = []
+            if query is not None:
+                missed = await db.contacts.find(query, {"_id": 0}).sort(
+                    [("updated_at", 1), ("id", 1)]
+                ).limit(SSE_REPLAY_LIMIT + 1).to_list(SSE_REPLAY_LIMIT + 1)
+            if query is None or len(missed) > SSE_REPLAY_LIMIT:
+                yield _sse("invalidate", {})
+            else:
+                for contact in missed:
+                    yield _sse("upsert", contact, _contact_event_id(contact))
+
+        deadline = time.monotonic() + SSE_MAX_STREAM_SECONDS
+        while not draining.done():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            event = await _next_event(queue, draining, min(SSE_KEEPALIVE_SECONDS, remaining))
+            if event is None:
+                if not draining.done():
+                    yield b": keepalive\n\n"
+                continue
+            if event["op"] == "upsert":
+                yield _sse("upsert", event["doc"], _contact_event_id(event["doc"]))
+            else:
+                yield _sse("invalidate", {})
+    finally:
+        draining.cancel()
+        event_bus.unsubscribe(queue)
+
+
+@router.post("/admin/contacts/stream-ticket")
+async def create_contact_stream_ticket(token: VerifiedToken = Depends(get_current_token)):
+    """Issue a single-use ticket, valid for a few seconds, for opening the contact stream."""
+    return {"ticket": create_stream_ticket(token), "expires_in": STREAM_TICKET_SECONDS}
+
+
+@router.get("/admin/contacts/stream")
+async def stream_contacts(
+    request: Request,
+    last_event_id: Optional[str] = None,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    current_admin: str = Depends(get_stream_admin)
+):
+    """Push new and updated contacts as Server-Sent Events.
+
+    `upsert` events carry a contact; `invalidate` means contacts were removed
+    (or too much changed) and the list should be reloaded. Browsers pass a
+    ticket from POST /admin/contacts/stream-ticket as `?ticket=`, since
+    EventSource cannot set headers; a new stream needs a new ticket, and
+    `?last_event_id=` resumes it like the Last-Event-ID header.
+    """
+    return StreamingResponse(
+        _contact_events(db, request.headers.get("last-event-id") or last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @router.get("/admin/contacts/{contact_id}", response_model=Contact)
 async def get_contact(
     contact_id: str,
+    include_archived: bool = False,
     db: AsyncIOMotorDatabase = Depends(get_db),
     current_admin: str = Depends(get_current_admin)
 ):
-    """Get a single contact submission."""
+    """Get a single contact submission, looking in the archive too with `include_archived`."""
     contact = await db.contacts.find_one({"id": contact_id})
+    if not contact and include_archived:
+        contact = await db[ARCHIVE_COLLECTION].find_one({"id": contact_id})
     if not contact:
         raise HTTPException(status_code=404, detail="Contact not found")
     return Contact(**contact)
@@ -221,17 +561,18 @@ async def update_contact_status(
     db: AsyncIOMotorDatabase = Depends(get_db),
     current_admin: str = Depends(get_current_admin)
 ):
-    """Update contact submission status."""
-    contact = await db.contacts.find_one({"id": contact_id})
-    if not contact:
-        raise HTTPException(status_code=404, detail="Contact not found")
-    
-    await db.contacts.update_one(
-        {"id": contact_id},
-        {"$set": {"status": status_update.status}}
+    """Update contact submission status; archived contacts are updated in the archive."""
+    update = {"$set": {"status": status_update.status, "updated_at": datetime.utcnow()}}
+    updated_contact = await db.contacts.find_one_and_update(
+        {"id": contact_id}, update, return_document=ReturnDocument.AFTER
     )
-    
-    updated_contact = await db.contacts.find_one({"id": contact_id})
+    if not updated_contact:
+        updated_contact = await db[ARCHIVE_COLLECTION].find_one_and_update(
+            {"id": contact_id}, update, return_document=ReturnDocument.AFTER
+        )
+    if not updated_contact:
+        raise HTTPException(status_code=404, detail="Contact not found")
+    content_cache.invalidate("contacts")
     return Contact(**updated_contact)
 
 
@@ -241,28 +582,206 @@ async def delete_contact(
     db: AsyncIOMotorDatabase = Depends(get_db),
     current_admin: str = Depends(get_current_admin)
 ):
-    """Delete a contact submission."""
+    """Delete a contact submission, from the archive if it was archived."""
     result = await db.contacts.delete_one({"id": contact_id})
+    if result.deleted_count == 0:
+        result = await db[ARCHIVE_COLLECTION].delete_one({"id": contact_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Contact not found")
+    await bump_version(db, "contacts")
+    content_cache.invalidate("contacts")
     return {"message": "Contact deleted successfully"}
 
 
-# Dashboard Stats
-@router.get("/admin/stats")
-async def get_stats(
+@router.post("/admin/contacts/bulk", response_model=BulkResult)
+async def bulk_update_contacts(
+    request: ContactBulkRequest,
     db: AsyncIOMotorDatabase = Depends(get_db),
     current_admin: str = Depends(get_current_admin)
 ):
-    """Get dashboard statistics."""
-    total_projects = await db.projects.count_documents({})
-    total_testimonials = await db.testimonials.count_documents({})
-    total_contacts = await db.contacts.count_documents({})
-    new_contacts = await db.contacts.count_documents({"status": "new"})
-    
-    return {
+    """Set the status of, or delete, many contacts selected by ids or by filter.
+
+    Selecting by ids reports a result per id ("updated", "unchanged" when the
+    contact already had the status, "deleted" or "not_found") and, like the
+    single-contact endpoints, also finds archived contacts. A filter only
+    selects live contacts and only reports counts.
+    """
+    if (request.ids is None) == (request.filter is None):
+        raise HTTPException(status_code=400, detail="Provide exactly one of ids or filter")
+    if request.action == "set_status" and not request.status:
+        raise HTTPException(status_code=400, detail="status is required for set_status")
+
+    if request.ids is not None:
+        ids = list(dict.fromkeys(request.ids))
+        query = {"id": {"$in": ids}}
+        collections = [db.contacts, db[ARCHIVE_COLLECTION]]
+        found = await asyncio.gather(*(
+            collection.find(query, {"_id": 0, "id": 1, "status": 1}).to_list(len(ids))
+            for collection in collections
+        ))
+        statuses = {doc["id"]: doc.get("status") for docs in found for doc in docs}
+    else:
+        criteria = request.filter.dict(exclude_none=True)
+        if not criteria:
+            raise HTTPException(status_code=400, detail="filter must not be empty")
+        query = _created_between(criteria.get("created_after"), criteria.get("created_before"))
+        if "status" in criteria:
+            query["status"] = criteria["status"]
+        collections = [db.contacts]
+
+    if request.action == "delete":
+        results = await asyncio.gather(*(collection.delete_many(query) for collection in collections))
+        matched = modified = sum(result.deleted_count for result in results)
+        if modified:
+            await bump_version(db, "contacts")
+    else:
+        # Contacts already in the requested status are left as they are
+        changing = {"$and": [query, {"status": {"$ne": request.status}}]}
+        update = {"$set": {"status": request.status, "updated_at": datetime.utcnow()}}
+        results = await asyncio.gather(*(collection.update_many(changing, update) for collection in collections))
+        modified = sum(result.modified_count for result in results)
+        if request.ids is not None:
+            matched = len(statuses)
+        else:
+            matched = await db.contacts.count_documents(query)
+    if modified:
+        content_cache.invalidate("contacts")
+
+    if request.ids is None:
+        return BulkResult(matched=matched, modified=modified)
+    results = []
+    for doc_id in ids:
+        if doc_id not in statuses:
+            outcome = "not_found"
+        elif request.action == "delete":
+            outcome = "deleted"
+        else:
+            outcome = "unchanged" if statuses[doc_id] == request.status else "updated"
+        results.append({"id": doc_id, "result": outcome})
+    return BulkResult(matched=len(statuses), modified=modified, results=results)
+
+
+# Dashboard Stats
+async def _contacts_per_day(collections: List[AsyncIOMotorCollection], days: int) -> List[dict]:
+    """Count contacts per UTC day over the last `days` days, across the given collections."""
+    since = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days - 1)
+    pipeline = [
+        {"$match": {"created_at": {"$gte": since}}},
+        {"$group": {
+            "_id": {"$dateToString": {"format": "%Y-%m-%d", "date": "$created_at"}},
+            "count": {"$sum": 1}
+        }},
+    ]
+    results = await asyncio.gather(*(collection.aggregate(pipeline).to_list(None) for collection in collections))
+    counts: Dict[str, int] = {}
+    for rows in results:
+        for row in rows:
+            counts[row["_id"]] = counts.get(row["_id"], 0) + row["count"]
+    return [{"date": date, "count": counts[date]} for date in sorted(counts)]
+
+
+async def _contact_counts(collection: AsyncIOMotorCollection, statuses) -> Tuple[int, Dict[str, int]]:
+    total, *by_status = await asyncio.gather(
+        collection.estimated_document_count(),
+        *(collection.count_documents({"status": status}) for status in statuses),
+    )
+    return total, dict(zip(statuses, by_status))
+
+
+async def compute_stats(
+    db: AsyncIOMotorDatabase, breakdown: bool = False, days: Optional[int] = None, include_archived: bool = False
+) -> dict:
+    """Run the dashboard counts concurrently.
+
+    Collection totals use collection metadata; per-status counts are served
+    by the (status, created_at, id) index rather than scanning contacts.
+    With `include_archived`, contact counts also cover contacts_archive.
+    """
+    statuses = CONTACT_STATUSES if breakdown else ("new",)
+    contact_collections = [db.contacts] + ([db[ARCHIVE_COLLECTION]] if include_archived else [])
+    counts = await asyncio.gather(
+        db.projects.estimated_document_count(),
+        db.testimonials.estimated_document_count(),
+        *(_contact_counts(collection, statuses) for collection in contact_collections),
+        *([_contacts_per_day(contact_collections, days)] if days else []),
+    )
+    total_projects, total_testimonials = counts[:2]
+    contact_counts = counts[2:2 + len(contact_collections)]
+    total_contacts = sum(total for total, _ in contact_counts)
+    by_status = {status: sum(per_status[status] for _, per_status in contact_counts) for status in statuses}
+
+    stats = {
         "total_projects": total_projects,
         "total_testimonials": total_testimonials,
         "total_contacts": total_contacts,
-        "new_contacts": new_contacts
-    }
\ No newline at end of file
+        "new_contacts": by_status["new"]
+    }
+    if include_archived:
+        stats["archived_contacts"] = contact_counts[1][0]
+    if breakdown:
+        stats["contacts_by_status"] = by_status
+    if days:
+        stats["contacts_per_day"] = counts[-1]
+    return stats
+
+
+async def _cached_stats(
+    db: AsyncIOMotorDatabase, breakdown: bool = False, days: Optional[int] = None, include_archived: bool = False
+) -> dict:
+    cache_key = (breakdown, days, include_archived)
+    stats = content_cache.get("stats", cache_key)
+    if stats is None:
+        stats = await compute_stats(db, breakdown, days, include_archived)
+        content_cache.set("stats", cache_key, stats, ttl=STATS_TTL_SECONDS)
+    return stats
+
+
+@router.get("/admin/stats")
+async def get_stats(
+    breakdown: bool = False,
+    days: Optional[int] = Query(None, ge=1, le=365),
+    include_archived: bool = False,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    current_admin: str = Depends(get_current_admin)
+):
+    """Get dashboard statistics.
+
+    `breakdown` adds contact counts per status; `days` adds contacts per day;
+    `include_archived` counts archived contacts too and adds `archived_contacts`.
+    """
+    return await _cached_stats(db, breakdown, days, include_archived)
+
+
+@router.get("/admin/bootstrap")
+async def get_bootstrap(
+    limit: int = Query(100, ge=1, le=100),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    current_admin: str = Depends(get_current_admin)
+):
+    """Load everything the dashboard shows initially in one call.
+
+    Stats and the first page of projects, testimonials and contacts are
+    queried concurrently. `cursors` holds each list's next-page cursor.
+    """
+    stats, (projects, projects_cursor), (testimonials, testimonials_cursor), (contacts, contacts_cursor) = (
+        await asyncio.gather(
+            _cached_stats(db),
+            paginate(db.projects, {}, limit, projection={"_id": 0}),
+            paginate(db.testimonials, {}, limit, projection={"_id": 0}),
+            paginate(db.contacts, {}, limit, projection={"_id": 0}),
+        )
+    )
+    return Response(
+        content=render_json({
+            "stats": stats,
+            "projects": projects,
+            "testimonials": testimonials,
+            "contacts": contacts,
+            "cursors": {
+                "projects": projects_cursor,
+                "testimonials": testimonials_cursor,
+                "contacts": contacts_cursor,
+            },
+        }),
+        media_type="application/json"
+    )
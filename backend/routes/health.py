@@ -0,0 +1,55 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from lifecycle import drain_state
+from database import get_db
+import asyncio
+import os
+import time
+
+router = APIRouter()
+
+# Probes may hit every worker every few seconds; reuse a recent ping result
+HEALTH_CACHE_SECONDS = float(os.getenv("HEALTH_CACHE_SECONDS", "2"))
+HEALTH_PING_TIMEOUT_SECONDS = float(os.getenv("HEALTH_PING_TIMEOUT_SECONDS", "2"))
+
+
+class MongoPing:
+    """Cached, single-flight MongoDB ping."""
+
+    def __init__(self):
+        self.ok = False
+        self.error = None
+        self.checked_at = float("-inf")
+        self._lock = asyncio.Lock()
+
+    async def check(self, db: AsyncIOMotorDatabase) -> bool:
+        async with self._lock:
+            if time.monotonic() - self.checked_at < HEALTH_CACHE_SECONDS:
+                return self.ok
+            try:
+                await asyncio.wait_for(db.command("ping"), HEALTH_PING_TIMEOUT_SECONDS)
+                self.ok, self.error = True, None
+            except Exception as exc:
+                self.ok, self.error = False, str(exc) or type(exc).__name__
+            self.checked_at = time.monotonic()
+            return self.ok
+
+
+mongo_ping = MongoPing()
+
+
+@router.get("/healthz", include_in_schema=False)
+async def healthz():
+    """Liveness: the process is up and serving requests."""
+    return {"status": "ok"}
+
+
+@router.get("/readyz", include_in_schema=False)
+async def readyz(db: AsyncIOMotorDatabase = Depends(get_db)):
+    """Readiness: MongoDB answers and the process is not shutting down."""
+    if drain_state.draining:
+        return JSONResponse({"status": "draining"}, status_code=503)
+    if not await mongo_ping.check(db):
+        return JSONResponse({"status": "unavailable", "mongo": mongo_ping.error}, status_code=503)
+    return {"status": "ok", "mongo": "ok"}
@@ -1,6 +1,12 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request, Query
 from typing import List, Optional
 from models import Project, ProjectCreate
+from cache import content_cache, make_cached_body, conditional_response, not_modified, version_etag
+from pagination import paginate, parse_fields, page_cache_key, next_cursor_headers
+from search import search, search_namespace, decode_offset, PROJECT_SEARCH
+from snapshot import get_home_snapshot, SNAPSHOT_COLLECTIONS
+from events import content_version
+from database import get_db
 from motor.motor_asyncio import AsyncIOMotorDatabase
 import os
 from datetime import datetime
@@ -8,26 +14,99 @@ from datetime import datetime
 router = APIRouter()
 
 
-async def get_db():
-    from server import db
-    return db
+@router.get("/home")
+async def get_home(request: Request, db: AsyncIOMotorDatabase = Depends(get_db)):
+    """Get the homepage projects and testimonials in one response.
+
+    Served from the snapshot that admin writes rebuild, so this is a single
+    document read at most.
+    """
+    etag = version_etag(await content_version(db, *SNAPSHOT_COLLECTIONS), "home")
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
+    cached = content_cache.get("home", "snapshot")
+    if cached is None or cached.etag != etag:
+        cached = content_cache.set("home", "snapshot", make_cached_body(await get_home_snapshot(db), etag=etag))
+    return conditional_response(request, cached)
 
 
 @router.get("/projects", response_model=List[Project])
-async def get_projects(category: Optional[str] = None, db: AsyncIOMotorDatabase = Depends(get_db)):
-    """Get all projects, optionally filtered by category."""
+async def get_projects(
+    request: Request,
+    category: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """Get projects newest first, optionally filtered by category.
+
+    Pages are linked through the X-Next-Cursor response header.
+    """
     query = {}
     if category and category != "All":
         query["category"] = category
     
-    projects = await db.projects.find(query).sort("created_at", -1).to_list(100)
-    return [Project(**project) for project in projects]
+    projection = parse_fields(fields, Project)
+    # Answer revalidations from the version alone, before querying
+    etag = version_etag(
+        await content_version(db, "projects"), "list", query.get("category"), limit, cursor, tuple(sorted(projection))
+    )
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
+    cache_key = page_cache_key(cursor, projection, query.get("category"), limit)
+    cached = content_cache.get("projects", cache_key) if cache_key else None
+    if cached is None or cached.etag != etag:
+        projects, next_cursor = await paginate(db.projects, query, limit, cursor, projection)
+        cached = make_cached_body(projects, next_cursor_headers(next_cursor), etag=etag)
+        if cache_key:
+            content_cache.set("projects", cache_key, cached)
+    return conditional_response(request, cached)
+
+
+@router.get("/projects/search", response_model=List[Project])
+async def search_projects(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """Search projects by text, best matches first, each with a `score`.
+
+    Terms also match technology names by prefix. Pages are linked through
+    the X-Next-Cursor response header.
+    """
+    # Own namespace, so arbitrary queries can't evict the project listings
+    namespace = search_namespace("projects")
+    cache_key = (q, limit, decode_offset(cursor))
+    etag = version_etag(await content_version(db, "projects"), "search", *cache_key)
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
+    cached = content_cache.get(namespace, cache_key)
+    if cached is None or cached.etag != etag:
+        results, next_cursor = await search(db, PROJECT_SEARCH, q, limit, cursor)
+        cached = content_cache.set(
+            namespace, cache_key, make_cached_body(results, next_cursor_headers(next_cursor), etag=etag)
+        )
+    return conditional_response(request, cached)
 
 
 @router.get("/projects/{project_id}", response_model=Project)
-async def get_project(project_id: str, db: AsyncIOMotorDatabase = Depends(get_db)):
+async def get_project(project_id: str, request: Request, db: AsyncIOMotorDatabase = Depends(get_db)):
     """Get a single project by ID."""
-    project = await db.projects.find_one({"id": project_id})
-    if not project:
-        raise HTTPException(status_code=404, detail="Project not found")
-    return Project(**project)
\ No newline at end of file
+    cache_key = ("id", project_id)
+    etag = version_etag(await content_version(db, "projects"), *cache_key)
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
+    cached = content_cache.get("projects", cache_key)
+    if cached is None or cached.etag != etag:
+        project = await db.projects.find_one({"id": project_id})
+        if not project:
+            raise HTTPException(status_code=404, detail="Project not found")
+        cached = content_cache.set("projects", cache_key, make_cached_body(Project(**project), etag=etag))
+    return conditional_response(request, cached)
\ No newline at end of file
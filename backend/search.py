@@ -0,0 +1,219 @@
+import base64
+import bisect
+import json
+import logging
+import math
+import os
+import re
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from fastapi import HTTPException
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import OperationFailure
+
+from cache import content_cache
+from pagination import SORT_ORDER
+
+logger = logging.getLogger(__name__)
+
+# mongo: $text indexes (falls back to memory if the index is missing);
+# memory: in-process inverted index, for small deployments
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "mongo").lower()
+# Deepest result reachable by paging; ranked results can't use keyset cursors
+SEARCH_MAX_RESULTS = int(os.getenv("SEARCH_MAX_RESULTS", "500"))
+# How long a built in-memory index is reused when no write invalidates it
+SEARCH_INDEX_TTL_SECONDS = float(os.getenv("SEARCH_INDEX_TTL_SECONDS", "300"))
+# Newest documents an in-memory index holds; older ones are not searchable
+SEARCH_MEMORY_MAX_DOCS = int(os.getenv("SEARCH_MEMORY_MAX_DOCS", "5000"))
+
+_TOKEN = re.compile(r"\w+")
+
+
+class SearchSpec(NamedTuple):
+    collection: str
+    # Searchable fields and their ranking weights
+    weights: Dict[str, int]
+    # Fields where any query term also matches as a prefix (e.g. "reac" -> "React")
+    prefix_fields: Tuple[str, ...] = ()
+    # Whether SEARCH_BACKEND=mongo may fall back to an in-memory index when
+    # the text index is missing. Off for collections that are large or written
+    # often, where the index would be reloaded after every write.
+    memory_fallback: bool = True
+
+
+PROJECT_SEARCH = SearchSpec(
+    "projects",
+    {"title": 10, "technologies": 5, "category": 3, "description": 1},
+    prefix_fields=("technologies",),
+)
+CONTACT_SEARCH = SearchSpec(
+    "contacts",
+    {"subject": 5, "name": 5, "email": 5, "message": 1},
+    memory_fallback=False,
+)
+
+
+def search_namespace(collection: str) -> str:
+    """Cache namespace for a collection's search results and index.
+
+    A sub-namespace of the collection's, so writes to it drop them too.
+    """
+    return f"{collection}:search"
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower())
+
+
+def _field_text(value: Any) -> str:
+    if isinstance(value, list):
+        return " ".join(str(item) for item in value)
+    return "" if value is None else str(value)
+
+
+def encode_offset(offset: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"o": offset}).encode()).decode().rstrip("=")
+
+
+def decode_offset(cursor: Optional[str]) -> int:
+    if not cursor:
+        return 0
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        offset = int(json.loads(base64.urlsafe_b64decode(padded))["o"])
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not 0 <= offset < SEARCH_MAX_RESULTS:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return offset
+
+
+class InvertedIndex:
+    """Term -> document postings with weighted term frequencies.
+
+    Scores are sum(field weight * idf) over matching terms; a query term
+    also matches longer terms it is a prefix of, at half weight.
+    """
+
+    def __init__(self, docs: Iterable[Dict[str, Any]], spec: SearchSpec):
+        self.docs: Dict[str, Dict[str, Any]] = {}
+        self.postings: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        for doc in docs:
+            self.docs[doc["id"]] = doc
+            for field, weight in spec.weights.items():
+                for term in tokenize(_field_text(doc.get(field))):
+                    self.postings[term][doc["id"]] += weight
+        self.terms = sorted(self.postings)
+
+    def _expand(self, term: str) -> Iterable[str]:
+        start = bisect.bisect_left(self.terms, term)
+        for candidate in self.terms[start:]:
+            if not candidate.startswith(term):
+                break
+            yield candidate
+
+    def search(self, query: str) -> List[Tuple[float, Dict[str, Any]]]:
+        scores: Dict[str, float] = defaultdict(float)
+        total = len(self.docs)
+        for term in set(tokenize(query)):
+            for candidate in self._expand(term):
+                postings = self.postings[candidate]
+                idf = math.log(1 + total / len(postings))
+                factor = 1.0 if candidate == term else 0.5
+                for doc_id, weight in postings.items():
+                    scores[doc_id] += factor * weight * idf
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return [(score, self.docs[doc_id]) for doc_id, score in ranked]
+
+
+async def _memory_index(db: AsyncIOMotorDatabase, spec: SearchSpec) -> InvertedIndex:
+    # Invalidated with the collection's namespace, so admin writes rebuild it
+    namespace = search_namespace(spec.collection)
+    index = content_cache.get(namespace, "index")
+    if index is None:
+        docs = await db[spec.collection].find({}, {"_id": 0}).sort(SORT_ORDER).limit(
+            SEARCH_MEMORY_MAX_DOCS + 1
+        ).to_list(SEARCH_MEMORY_MAX_DOCS + 1)
+        if len(docs) > SEARCH_MEMORY_MAX_DOCS:
+            logger.warning("In-memory search of %s only covers the newest %s documents",
+                           spec.collection, SEARCH_MEMORY_MAX_DOCS)
+            docs = docs[:SEARCH_MEMORY_MAX_DOCS]
+        index = InvertedIndex(docs, spec)
+        content_cache.set(namespace, "index", index, ttl=SEARCH_INDEX_TTL_SECONDS)
+    return index
+
+
+def _matches(doc: Dict[str, Any], query_filter: Dict[str, Any]) -> bool:
+    return all(doc.get(field) == value for field, value in query_filter.items())
+
+
+async def _memory_search(
+    db: AsyncIOMotorDatabase, spec: SearchSpec, q: str, query_filter: Dict[str, Any], window: int
+) -> List[Dict[str, Any]]:
+    index = await _memory_index(db, spec)
+    results = []
+    for score, doc in index.search(q):
+        if _matches(doc, query_filter):
+            results.append({**doc, "score": round(score, 4)})
+            if len(results) >= window:
+                break
+    return results
+
+
+async def _mongo_search(
+    db: AsyncIOMotorDatabase, spec: SearchSpec, q: str, query_filter: Dict[str, Any], window: int
+) -> List[Dict[str, Any]]:
+    collection = db[spec.collection]
+    text_hits = await collection.find(
+        {**query_filter, "$text": {"$search": q}},
+        {"_id": 0, "score": {"$meta": "textScore"}}
+    ).sort([("score", {"$meta": "textScore"})]).limit(window).to_list(window)
+
+    results = {doc["id"]: doc for doc in text_hits}
+    terms = tokenize(q)
+    for field in spec.prefix_fields:
+        if not terms:
+            break
+        prefix_query = {**query_filter, "$or": [
+            {field: {"$regex": f"^{re.escape(term)}", "$options": "i"}} for term in terms
+        ]}
+        for doc in await collection.find(prefix_query, {"_id": 0}).limit(window).to_list(window):
+            values = [value.lower() for value in doc.get(field, []) if isinstance(value, str)]
+            matched = sum(1 for term in terms if any(value.startswith(term) for value in values))
+            bonus = spec.weights.get(field, 1) * 0.5 * matched
+            existing = results.setdefault(doc["id"], {**doc, "score": 0.0})
+            existing["score"] += bonus
+
+    ranked = sorted(results.values(), key=lambda doc: (-doc["score"], doc["id"]))
+    return ranked[:window]
+
+
+async def search(
+    db: AsyncIOMotorDatabase,
+    spec: SearchSpec,
+    q: str,
+    limit: int,
+    cursor: Optional[str] = None,
+    query_filter: Optional[Dict[str, Any]] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Return one page of ranked matches (each with a `score`) and the next cursor."""
+    offset = decode_offset(cursor)
+    window = min(offset + limit + 1, SEARCH_MAX_RESULTS)
+    query_filter = query_filter or {}
+
+    if SEARCH_BACKEND == "memory":
+        results = await _memory_search(db, spec, q, query_filter, window)
+    else:
+        try:
+            results = await _mongo_search(db, spec, q, query_filter, window)
+        except OperationFailure as exc:
+            if not spec.memory_fallback:
+                logger.error("Text search on %s failed (%s); is its text index missing?", spec.collection, exc)
+                raise HTTPException(status_code=503, detail="Search is unavailable")
+            logger.warning("Text search on %s failed (%s); using in-memory index", spec.collection, exc)
+            results = await _memory_search(db, spec, q, query_filter, window)
+
+    page = results[offset:offset + limit]
+    has_more = len(results) > offset + limit and offset + limit < SEARCH_MAX_RESULTS
+    return page, encode_offset(offset + limit) if has_more else None
@@ -0,0 +1,27 @@
+from typing import Any
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+
+def _fallback(value: Any) -> Any:
+    # Types orjson doesn't know natively (Pydantic models, sets, ...)
+    return jsonable_encoder(value)
+
+
+def render_json(content: Any) -> bytes:
+    """Serialize content to compact UTF-8 JSON.
+
+    dicts, lists, strings and datetimes (as ISO 8601, like jsonable_encoder)
+    are encoded natively by orjson, so raw Mongo documents and model dicts
+    skip the jsonable_encoder pass entirely.
+    """
+    return orjson.dumps(content, default=_fallback)
+
+
+class FastJSONResponse(JSONResponse):
+    """Default response class; renders with orjson instead of the stdlib json module."""
+
+    def render(self, content: Any) -> bytes:
+        return render_json(content)
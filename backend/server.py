@@ -1,39 +1,95 @@
-from fastapi import FastAPI, APIRouter, BackgroundTasks
-from fastapi.staticfiles import StaticFiles
+from pathlib import Path
 from dotenv import load_dotenv
+
+# Load .env before importing local modules: they read their settings at import
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+from fastapi import FastAPI, APIRouter, Request, Query, Depends
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
+from contextlib import asynccontextmanager
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
 import os
 import logging
-from pathlib import Path
 from models import Testimonial, Contact, ContactCreate
-from mailer import send_contact_notification
-from auth import get_password_hash
-from typing import List
+from mailer import enqueue_contact_notification, start_outbox_worker, stop_outbox_worker
+from auth import hash_password_async
+from file_handler import mount_uploads, start_upload_sweep_job, stop_upload_sweep_job, UploadSizeLimitMiddleware
+from cache import content_cache, make_cached_body, conditional_response, not_modified, version_etag
+from indexes import ensure_indexes
+from ratelimit import RateLimitMiddleware, create_rate_limit_backend
+from compression import CompressionMiddleware
+from serialization import FastJSONResponse
+from metrics import MetricsMiddleware, metrics_endpoint
+from database import create_mongo_client, get_db
+from lifecycle import DrainMiddleware, drain_state, install_drain_signal_handlers
+from events import start_change_watcher, stop_change_watcher, content_version
+from retention import ensure_archive_collection, start_retention_job, stop_retention_job
+from datetime import datetime
+from pagination import paginate, parse_fields, page_cache_key, next_cursor_headers, NEXT_CURSOR_HEADER
+from typing import Callable, List, Optional
 
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
 
-ROOT_DIR = Path(__file__).parent
-load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+async def create_default_admin(db: AsyncIOMotorDatabase):
+    """Create the default admin user if it does not exist."""
+    admin_exists = await db.admins.find_one({"username": "admin"})
+    if not admin_exists:
+        from models import AdminUser
+        default_admin = AdminUser(
+            username="admin",
+            email="admin@sbdevstudio.com",
+            password_hash=await hash_password_async("Admin@123")
+        )
+        await db.admins.insert_one(default_admin.dict())
+        logger.info("Default admin user created: username='admin', password='Admin@123'")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open the database and prepare it on startup; drain and release resources on shutdown."""
+    # MongoDB connection, opened here rather than at import so importing the
+    # app stays cheap and the client belongs to the serving event loop
+    client = app.state.client_factory(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+    app.state.mongo_client = client
+    app.state.db = db
+    app.state.rate_limit_backend = create_rate_limit_backend(db.rate_limits)
+
+    drain_state.reset()
+    restore_signal_handlers = install_drain_signal_handlers()
+    await ensure_archive_collection(db)
+    await ensure_indexes(db)
+    await create_default_admin(db)
+    start_outbox_worker(db)
+    start_change_watcher(db)
+    start_retention_job(db)
+    start_upload_sweep_job(db)
+    yield
+    # Usually already draining since the stop signal; let running requests finish before closing anything
+    await drain_state.drain()
+    await stop_upload_sweep_job()
+    await stop_retention_job()
+    await stop_change_watcher()
+    await stop_outbox_worker()
+    client.close()
+    restore_signal_handlers()
+    logger.info("Shutdown complete")
 
-# Create the main app without a prefix
-app = FastAPI(title="SB Dev Studio API", version="1.0.0")
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
-# Mount uploads directory for serving static files
-UPLOAD_DIR = Path(os.getenv("UPLOAD_DIR", Path(__file__).parent / "uploads"))
-UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
-app.mount("/uploads", StaticFiles(directory=str(UPLOAD_DIR)), name="uploads")
-
 # Import and include routers
 from routes.public import router as public_router
 from routes.admin import router as admin_router
+from routes.health import router as health_router
 
 # Basic routes
 @api_router.get("/")
@@ -42,56 +98,92 @@ async def root():
 
 # Public routes
 @api_router.get("/testimonials", response_model=List[Testimonial])
-async def get_testimonials():
-    """Get all testimonials."""
-    testimonials = await db.testimonials.find().sort("created_at", -1).to_list(100)
-    return [Testimonial(**testimonial) for testimonial in testimonials]
+async def get_testimonials(
+    request: Request,
+    limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """Get testimonials newest first, paged through the X-Next-Cursor header."""
+    projection = parse_fields(fields, Testimonial)
+    # Answer revalidations from the version alone, before querying
+    etag = version_etag(await content_version(db, "testimonials"), "list", limit, cursor, tuple(sorted(projection)))
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
+    cache_key = page_cache_key(cursor, projection, limit)
+    cached = content_cache.get("testimonials", cache_key) if cache_key else None
+    if cached is None or cached.etag != etag:
+        testimonials, next_cursor = await paginate(db.testimonials, {}, limit, cursor, projection)
+        cached = make_cached_body(testimonials, next_cursor_headers(next_cursor), etag=etag)
+        if cache_key:
+            content_cache.set("testimonials", cache_key, cached)
+    return conditional_response(request, cached)
 
 @api_router.post("/contact", response_model=Contact)
-async def submit_contact(contact_data: ContactCreate, background_tasks: BackgroundTasks):
+async def submit_contact(contact_data: ContactCreate, db: AsyncIOMotorDatabase = Depends(get_db)):
     """Submit a contact form."""
-    contact = Contact(**contact_data.dict())
+    now = datetime.utcnow()
+    contact = Contact(**contact_data.dict(), created_at=now, updated_at=now)
     await db.contacts.insert_one(contact.dict())
-    # Fire-and-forget email notification if SMTP is configured
-    background_tasks.add_task(send_contact_notification, contact.dict())
+    content_cache.invalidate("contacts")
+    # Queue the email notification in the outbox; the worker sends it in a digest
+    await enqueue_contact_notification(db, contact.dict())
     return contact
 
 # Include public and admin routers
 api_router.include_router(public_router, tags=["Public"])
 api_router.include_router(admin_router, tags=["Admin"])
 
-# Include the router in the main app
-app.include_router(api_router)
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_credentials=True,
-    allow_origins=["*"],
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+def create_app(client_factory: Callable[[str], AsyncIOMotorClient] = create_mongo_client) -> FastAPI:
+    """Build the application.
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-logger = logging.getLogger(__name__)
+    Nothing here touches the network; the Mongo client is made by
+    `client_factory` when the lifespan starts.
+    """
+    app = FastAPI(
+        title="SB Dev Studio API",
+        version="1.0.0",
+        default_response_class=FastJSONResponse,
+        lifespan=lifespan
+    )
+    app.state.client_factory = client_factory
+
+    # Serve uploaded files (local disk or redirects to object storage)
+    mount_uploads(app)
+
+    app.include_router(api_router)
+
+    # Probes and the Prometheus scrape endpoint live outside /api
+    app.include_router(health_router)
+    app.add_api_route("/metrics", metrics_endpoint, methods=["GET"], include_in_schema=False)
+
+    # Rejects oversized uploads before multipart parsing spools them to disk
+    app.add_middleware(UploadSizeLimitMiddleware)
+
+    # Uses app.state.rate_limit_backend, set by the lifespan
+    app.add_middleware(RateLimitMiddleware)
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_credentials=True,
+        allow_origins=["*"],
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=[NEXT_CURSOR_HEADER],
+    )
+
+    # Outside CORS, so CORS and error responses are compressed too
+    app.add_middleware(CompressionMiddleware)
+
+    # Counts every request still running, for the shutdown drain
+    app.add_middleware(DrainMiddleware)
+
+    # Outermost, so time spent in every other middleware is included
+    app.add_middleware(MetricsMiddleware)
+    return app
 
-@app.on_event("startup")
-async def startup_event():
-    """Initialize database with default admin if not exists."""
-    admin_exists = await db.admins.find_one({"username": "admin"})
-    if not admin_exists:
-        from models import AdminUser
-        default_admin = AdminUser(
-            username="admin",
-            email="admin@sbdevstudio.com",
-            password_hash=get_password_hash("Admin@123")
-        )
-        await db.admins.insert_one(default_admin.dict())
-        logger.info("Default admin user created: username='admin', password='Admin@123'")
 
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+app = create_app()
@@ -0,0 +1,79 @@
+import asyncio
+import os
+from datetime import datetime
+from typing import Any, Dict
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import DuplicateKeyError
+
+from cache import content_cache
+from events import bump_version, content_version
+from pagination import paginate
+
+# How many of the newest projects/testimonials the homepage snapshot holds
+HOME_PROJECT_LIMIT = int(os.getenv("HOME_PROJECT_LIMIT", "100"))
+HOME_TESTIMONIAL_LIMIT = int(os.getenv("HOME_TESTIMONIAL_LIMIT", "100"))
+
+HOME_SNAPSHOT_ID = "home"
+
+# content_versions counters the snapshot is built from
+SNAPSHOT_COLLECTIONS = ("projects", "testimonials")
+
+
+async def rebuild_home_snapshot(db: AsyncIOMotorDatabase) -> Dict[str, Any]:
+    """Materialize the homepage lists into db.site_snapshots.
+
+    Called after every project/testimonial write, so GET /api/home is a
+    single document read. The snapshot records the content version read
+    before the lists; it only replaces a snapshot with an older version, so
+    a slow rebuild on any worker can't overwrite a newer one.
+    """
+    version = await content_version(db, *SNAPSHOT_COLLECTIONS, cached=False)
+    (projects, _), (testimonials, _) = await asyncio.gather(
+        paginate(db.projects, {}, HOME_PROJECT_LIMIT, projection={"_id": 0}),
+        paginate(db.testimonials, {}, HOME_TESTIMONIAL_LIMIT, projection={"_id": 0}),
+    )
+    snapshot = {
+        "projects": projects,
+        "testimonials": testimonials,
+        "version": version,
+        "built_at": datetime.utcnow(),
+    }
+    try:
+        await db.site_snapshots.replace_one(
+            # Snapshots stored before versioning have no version and are replaced too
+            {"_id": HOME_SNAPSHOT_ID, "$or": [{"version": {"$lt": version}}, {"version": {"$exists": False}}]},
+            snapshot,
+            upsert=True
+        )
+    except DuplicateKeyError:
+        # A snapshot at least this new is already stored; serve that one
+        stored = await db.site_snapshots.find_one({"_id": HOME_SNAPSHOT_ID}, {"_id": 0})
+        if stored is not None:
+            snapshot = stored
+    content_cache.invalidate("home")
+    return snapshot
+
+
+async def get_home_snapshot(db: AsyncIOMotorDatabase) -> Dict[str, Any]:
+    """Return the stored homepage snapshot, rebuilding it if missing or behind content_versions."""
+    snapshot, version = await asyncio.gather(
+        db.site_snapshots.find_one({"_id": HOME_SNAPSHOT_ID}, {"_id": 0}),
+        content_version(db, *SNAPSHOT_COLLECTIONS),
+    )
+    if snapshot is None or snapshot.get("version", -1) < version:
+        snapshot = await rebuild_home_snapshot(db)
+        snapshot.pop("_id", None)
+    return snapshot
+
+
+async def content_changed(db: AsyncIOMotorDatabase, collection: str) -> None:
+    """Drop cached views of a public collection and refresh the homepage snapshot.
+
+    Other workers learn of the change through the change watcher.
+    """
+    # Bump first: the rebuild stores the version it read, and invalidating
+    # afterwards drops a cached counter read before the bump
+    await bump_version(db, collection)
+    content_cache.invalidate(collection)
+    await rebuild_home_snapshot(db)
@@ -0,0 +1,184 @@
+import mimetypes
+import os
+import re
+from pathlib import Path
+from typing import List, Optional
+
+# Uploads are named by the SHA-256 of their content, so a name never changes meaning
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+CONTENT_ADDRESSED_NAME = re.compile(r"^[0-9a-f]{64}(-\d+w)?\.[a-z]+$")
+
+
+def is_content_addressed(key: str) -> bool:
+    return bool(CONTENT_ADDRESSED_NAME.match(key.rsplit("/", 1)[-1]))
+
+
+class StorageBackend:
+    """Where uploaded files live.
+
+    Keys are paths relative to the uploads root (e.g. `projects/<sha256>.png`)
+    and map to the public URL `/uploads/<key>`. Methods are blocking; call
+    them from a worker thread.
+    """
+
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def put(self, key: str, source: Path) -> None:
+        """Store a local file under key, consuming the source file."""
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def list(self, prefix: str) -> List[str]:
+        """Return the keys starting with prefix."""
+        raise NotImplementedError
+
+    def local_path(self, key: str) -> Optional[Path]:
+        """Return a readable local path for key, if the backend has one."""
+        return None
+
+    def url_for(self, key: str) -> str:
+        """Return a URL clients can be redirected to for reading key."""
+        raise NotImplementedError
+
+
+class LocalStorage(StorageBackend):
+    """Files under a local directory, served by the /uploads StaticFiles mount."""
+
+    def __init__(self, root: Path):
+        self.root = root
+
+    def _path(self, key: str) -> Path:
+        return self.root / key
+
+    def exists(self, key: str) -> bool:
+        return self._path(key).is_file()
+
+    def put(self, key: str, source: Path) -> None:
+        destination = self._path(key)
+        if source != destination:
+            os.replace(source, destination)
+
+    def delete(self, key: str) -> None:
+        self._path(key).unlink(missing_ok=True)
+
+    def list(self, prefix: str) -> List[str]:
+        directory, _, name_prefix = prefix.rpartition("/")
+        base = self.root / directory
+        if not base.is_dir():
+            return []
+        return [
+            f"{directory}/{entry.name}" if directory else entry.name
+            for entry in base.iterdir()
+            if entry.name.startswith(name_prefix) and entry.is_file()
+        ]
+
+    def local_path(self, key: str) -> Optional[Path]:
+        return self._path(key)
+
+    def url_for(self, key: str) -> str:
+        return f"/uploads/{key}"
+
+
+class S3Storage(StorageBackend):
+    """Files in an S3-compatible bucket (AWS S3, MinIO, ...).
+
+    Uploads use boto3's managed transfer, which switches to multipart for
+    large files. Reads are redirected to S3_PUBLIC_BASE_URL when set (e.g. a
+    CDN in front of the bucket), otherwise to a presigned GET URL.
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        prefix: str = "",
+        endpoint_url: Optional[str] = None,
+        region: Optional[str] = None,
+        public_base_url: Optional[str] = None,
+        presign_expires: int = 3600,
+    ):
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.endpoint_url = endpoint_url
+        self.region = region
+        self.public_base_url = public_base_url.rstrip("/") if public_base_url else None
+        self.presign_expires = presign_expires
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            import boto3
+
+            self._client = boto3.client("s3", endpoint_url=self.endpoint_url, region_name=self.region)
+        return self._client
+
+    def _object_key(self, key: str) -> str:
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._object_key(key))
+            return True
+        except ClientError as exc:
+            if exc.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def put(self, key: str, source: Path) -> None:
+        from boto3.s3.transfer import TransferConfig
+
+        extra_args = {"ContentType": mimetypes.guess_type(key)[0] or "application/octet-stream"}
+        if is_content_addressed(key):
+            extra_args["CacheControl"] = IMMUTABLE_CACHE_CONTROL
+        try:
+            self.client.upload_file(
+                str(source),
+                self.bucket,
+                self._object_key(key),
+                ExtraArgs=extra_args,
+                Config=TransferConfig(multipart_threshold=8 * 1024 * 1024),
+            )
+        finally:
+            Path(source).unlink(missing_ok=True)
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self._object_key(key))
+
+    def list(self, prefix: str) -> List[str]:
+        strip = len(self.prefix) + 1 if self.prefix else 0
+        keys = []
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self._object_key(prefix)):
+            keys.extend(item["Key"][strip:] for item in page.get("Contents", []))
+        return keys
+
+    def url_for(self, key: str) -> str:
+        if self.public_base_url:
+            return f"{self.public_base_url}/{self._object_key(key)}"
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": self.bucket, "Key": self._object_key(key)},
+            ExpiresIn=self.presign_expires,
+        )
+
+
+def create_storage(upload_dir: Path) -> StorageBackend:
+    """Build the backend selected by STORAGE_BACKEND (local or s3)."""
+    backend = os.getenv("STORAGE_BACKEND", "local").lower()
+    if backend == "local":
+        return LocalStorage(upload_dir)
+    if backend == "s3":
+        return S3Storage(
+            bucket=os.environ["S3_BUCKET"],
+            prefix=os.getenv("S3_PREFIX", ""),
+            endpoint_url=os.getenv("S3_ENDPOINT_URL") or None,
+            region=os.getenv("S3_REGION") or None,
+            public_base_url=os.getenv("S3_PUBLIC_BASE_URL") or None,
+            presign_expires=int(os.getenv("S3_PRESIGN_EXPIRES", "3600")),
+        )
+    raise ValueError(f"Unknown STORAGE_BACKEND: {backend}")
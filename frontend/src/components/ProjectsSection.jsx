@@ -1,27 +1,9 @@
-import React, { useEffect, useMemo, useState } from 'react';
+import React, { useMemo, useState } from 'react';
 import { ExternalLink } from 'lucide-react';
-import { fetchProjects } from '@/lib/api';
-import { useToast } from '@/hooks/use-toast';
+import { variantSrcSet } from '@/lib/utils';
 
-const ProjectsSection = () => {
-  const { toast } = useToast();
+const ProjectsSection = ({ projects = [], loading = false }) => {
   const [filter, setFilter] = useState('All');
-  const [projects, setProjects] = useState([]);
-  const [loading, setLoading] = useState(true);
-
-  useEffect(() => {
-    const load = async () => {
-      try {
-        const data = await fetchProjects();
-        setProjects(data);
-      } catch (error) {
-        toast({ title: 'Could not load projects', description: 'Please try again later.' });
-      } finally {
-        setLoading(false);
-      }
-    };
-    load();
-  }, [toast]);
 
   const categories = useMemo(() => {
     const unique = new Set(projects.map((p) => p.category));
@@ -73,6 +55,8 @@ const ProjectsSection = () => {
                 <div className="relative overflow-hidden rounded-t-xl h-64">
                   <img
                     src={project.image}
+                    srcSet={variantSrcSet(project.image_variants)}
+                    sizes="(min-width: 1024px) 33vw, (min-width: 768px) 50vw, 100vw"
                     alt={project.title}
                     className="w-full h-full object-cover transform group-hover:scale-110 transition-transform duration-500"
                   />
@@ -1,27 +1,9 @@
-import React, { useEffect, useState } from 'react';
+import React, { useState } from 'react';
 import { ChevronLeft, ChevronRight, Star } from 'lucide-react';
-import { fetchTestimonials } from '@/lib/api';
-import { useToast } from '@/hooks/use-toast';
+import { variantSrcSet } from '@/lib/utils';
 
-const TestimonialsSection = () => {
-  const { toast } = useToast();
+const TestimonialsSection = ({ items = [], loading = false }) => {
   const [currentIndex, setCurrentIndex] = useState(0);
-  const [items, setItems] = useState([]);
-  const [loading, setLoading] = useState(true);
-
-  useEffect(() => {
-    const load = async () => {
-      try {
-        const data = await fetchTestimonials();
-        setItems(data);
-      } catch (error) {
-        toast({ title: 'Could not load testimonials', description: 'Please try again later.' });
-      } finally {
-        setLoading(false);
-      }
-    };
-    load();
-  }, [toast]);
 
   const nextTestimonial = () => {
     setCurrentIndex((prev) => items.length ? (prev + 1) % items.length : 0);
@@ -54,6 +36,8 @@ const TestimonialsSection = () => {
                 <div className="flex items-center mb-6">
                   <img
                     src={items[currentIndex].avatar}
+                    srcSet={variantSrcSet(items[currentIndex].avatar_variants)}
+                    sizes="64px"
                     alt={items[currentIndex].name}
                     className="w-16 h-16 rounded-full border-2 border-cyan-500 mr-4"
                   />
@@ -25,6 +25,12 @@ export const adminLogin = (username, password) =>
 // Stats
 export const fetchStats = () => unwrap(api.get("/admin/stats"));
 
+// Stats plus the first page of projects, testimonials and contacts in one call
+export const fetchAdminBootstrap = () => unwrap(api.get("/admin/bootstrap"));
+
+// Homepage projects and testimonials in one call
+export const fetchHome = () => unwrap(api.get("/home"));
+
 // Projects
 export const fetchProjects = () => unwrap(api.get("/projects"));
 export const createProject = (payload) => unwrap(api.post("/admin/projects", payload));
@@ -38,11 +44,63 @@ export const updateTestimonial = (id, payload) => unwrap(api.put(`/admin/testimo
 export const deleteTestimonial = (id) => unwrap(api.delete(`/admin/testimonials/${id}`));
 
 // Contacts
-export const fetchContacts = () => unwrap(api.get("/admin/contacts"));
+// One page of contacts, newest first; pass nextCursor back to get the following page
+// (null once there are no more)
+export const fetchContacts = (cursor) =>
+  api.get("/admin/contacts", { params: cursor ? { cursor } : {} }).then((res) => ({
+    contacts: res.data,
+    nextCursor: res.headers["x-next-cursor"] || null,
+  }));
 export const updateContactStatus = (id, status) =>
   unwrap(api.put(`/admin/contacts/${id}`, { status }));
 export const deleteContact = (id) => unwrap(api.delete(`/admin/contacts/${id}`));
 
+// Live contact changes over Server-Sent Events. EventSource can't send headers,
+// so each connection uses a single-use ticket instead of the token; on error the
+// stream is reopened with a new ticket, resuming after the last event seen.
+// Returns { close }.
+const STREAM_RETRY_MS = 3000;
+
+export const openContactStream = ({ onUpsert, onInvalidate }) => {
+  let source = null;
+  let retry = null;
+  let closed = false;
+  let lastEventId = "";
+
+  const connect = async () => {
+    let ticket;
+    try {
+      ({ ticket } = await unwrap(api.post("/admin/contacts/stream-ticket")));
+    } catch {
+      if (!closed) retry = setTimeout(connect, STREAM_RETRY_MS);
+      return;
+    }
+    if (closed) return;
+    const params = new URLSearchParams({ ticket });
+    if (lastEventId) params.set("last_event_id", lastEventId);
+    source = new EventSource(`${API_BASE}/admin/contacts/stream?${params}`);
+    source.addEventListener("upsert", (event) => {
+      if (event.lastEventId) lastEventId = event.lastEventId;
+      onUpsert(JSON.parse(event.data));
+    });
+    source.addEventListener("invalidate", () => onInvalidate());
+    source.onerror = () => {
+      // The ticket is spent, so the browser's own reconnect would be rejected
+      source.close();
+      if (!closed) retry = setTimeout(connect, STREAM_RETRY_MS);
+    };
+  };
+
+  connect();
+  return {
+    close: () => {
+      closed = true;
+      clearTimeout(retry);
+      if (source) source.close();
+    },
+  };
+};
+
 // Public contact submission
 export const submitContact = (payload) => unwrap(api.post("/contact", payload));
 
@@ -4,3 +4,14 @@ import { twMerge } from "tailwind-merge"
 export function cn(...inputs) {
   return twMerge(clsx(inputs));
 }
+
+// Turn a {width: url} variant map into an <img> srcSet; undefined when there
+// are none so the browser falls back to src
+export function variantSrcSet(variants) {
+  const entries = Object.entries(variants || {})
+    .map(([width, url]) => [Number(width), url])
+    .filter(([width, url]) => width > 0 && url)
+    .sort(([a], [b]) => a - b);
+  if (entries.length === 0) return undefined;
+  return entries.map(([width, url]) => `${url} ${width}w`).join(", ");
+}
@@ -13,10 +13,9 @@ import {
   deleteContact,
   deleteProject,
   deleteTestimonial,
+  fetchAdminBootstrap,
   fetchContacts,
-  fetchProjects,
-  fetchStats,
-  fetchTestimonials,
+  openContactStream,
   updateContactStatus,
   updateProject,
   updateTestimonial,
@@ -34,6 +33,8 @@ const AdminDashboard = () => {
   const [projects, setProjects] = useState([]);
   const [testimonials, setTestimonials] = useState([]);
   const [contacts, setContacts] = useState([]);
+  const [contactsCursor, setContactsCursor] = useState(null);
+  const [loadingMoreContacts, setLoadingMoreContacts] = useState(false);
 
   const [loading, setLoading] = useState(true);
   const [projectForm, setProjectForm] = useState({
@@ -72,16 +73,12 @@ const AdminDashboard = () => {
       }
       try {
         setLoading(true);
-        const [statsRes, projRes, testRes, contactRes] = await Promise.all([
-          fetchStats(),
-          fetchProjects(),
-          fetchTestimonials(),
-          fetchContacts(),
-        ]);
-        setStats(statsRes);
-        setProjects(projRes);
-        setTestimonials(testRes);
-        setContacts(contactRes);
+        const data = await fetchAdminBootstrap();
+        setStats(data.stats);
+        setProjects(data.projects);
+        setTestimonials(data.testimonials);
+        setContacts(data.contacts);
+        setContactsCursor(data.cursors.contacts);
       } catch (error) {
         const detail = error?.response?.data?.detail || "Session expired";
         toast({ title: "Auth required", description: detail });
@@ -94,6 +91,23 @@ const AdminDashboard = () => {
     load();
   }, [token, toast, logout, navigate]);
 
+  useEffect(() => {
+    if (!token) return undefined;
+    const source = openContactStream({
+      onUpsert: (contact) =>
+        setContacts((prev) => [contact, ...prev.filter((c) => c.id !== contact.id)]
+          .sort((a, b) => (a.created_at < b.created_at ? 1 : -1))),
+      onInvalidate: () =>
+        fetchContacts()
+          .then(({ contacts: firstPage, nextCursor }) => {
+            setContacts(firstPage);
+            setContactsCursor(nextCursor);
+          })
+          .catch(() => {}),
+    });
+    return () => source.close();
+  }, [token]);
+
   const handleLogout = () => {
     logout();
     navigate(getAdminRoute("/sbdevstudio/login"), { replace: true });
@@ -205,6 +219,21 @@ const AdminDashboard = () => {
     }
   };
 
+  const handleLoadMoreContacts = async () => {
+    if (!contactsCursor) return;
+    try {
+      setLoadingMoreContacts(true);
+      const { contacts: page, nextCursor } = await fetchContacts(contactsCursor);
+      // Streamed upserts may already have added some of these
+      setContacts((prev) => [...prev, ...page.filter((c) => !prev.some((p) => p.id === c.id))]);
+      setContactsCursor(nextCursor);
+    } catch (error) {
+      toast({ title: "Load failed", description: "Could not load more contacts" });
+    } finally {
+      setLoadingMoreContacts(false);
+    }
+  };
+
   const handleContactDelete = async (id) => {
     if (!window.confirm("Delete this contact?")) return;
     try {
@@ -506,6 +535,11 @@ const AdminDashboard = () => {
                 </div>
               </div>
             ))}
+            {contactsCursor && (
+              <Button variant="outline" className="border-cyan-400/40 text-cyan-200" onClick={handleLoadMoreContacts} disabled={loadingMoreContacts}>
+                {loadingMoreContacts ? "Loading..." : "Load more"}
+              </Button>
+            )}
           </CardContent>
         </Card>
       </div>
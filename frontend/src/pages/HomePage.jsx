@@ -8,9 +8,28 @@ import TestimonialsSection from '../components/TestimonialsSection';
 import TechStackSection from '../components/TechStackSection';
 import ContactSection from '../components/ContactSection';
 import Footer from '../components/Footer';
+import { fetchHome } from '@/lib/api';
+import { useToast } from '@/hooks/use-toast';
 
 const HomePage = () => {
+  const { toast } = useToast();
   const [scrollY, setScrollY] = useState(0);
+  const [home, setHome] = useState({ projects: [], testimonials: [] });
+  const [loading, setLoading] = useState(true);
+
+  useEffect(() => {
+    const load = async () => {
+      try {
+        const data = await fetchHome();
+        setHome(data);
+      } catch (error) {
+        toast({ title: 'Could not load projects and testimonials', description: 'Please try again later.' });
+      } finally {
+        setLoading(false);
+      }
+    };
+    load();
+  }, [toast]);
 
   useEffect(() => {
     const handleScroll = () => setScrollY(window.scrollY);
@@ -24,8 +43,8 @@ const HomePage = () => {
       <HeroSection scrollY={scrollY} />
       <AboutSection />
       <AbilitiesSection />
-      <ProjectsSection />
-      <TestimonialsSection />
+      <ProjectsSection projects={home.projects} loading={loading} />
+      <TestimonialsSection items={home.testimonials} loading={loading} />
       <TechStackSection />
       <ContactSection />
       <Footer />
@@ -0,0 +1,50 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# Settings are read at import, so they are set before any backend module loads
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "sbdevstudio_test")
+os.environ.setdefault("UPLOAD_DIR", tempfile.mkdtemp(prefix="sbdev-test-uploads-"))
+os.environ["BCRYPT_ROUNDS"] = "4"
+os.environ["RATE_LIMIT_CONTACT"] = "100000/1"
+os.environ["RATE_LIMIT_LOGIN"] = "100000/1"
+os.environ["RATE_LIMIT_SEARCH"] = "100000/1"
+# mongomock has no change streams or collection storage options
+os.environ["EVENTS_MODE"] = "poll"
+os.environ["CONTACT_ARCHIVE_COMPRESSOR"] = ""
+os.environ.pop("SENDGRID_API_KEY", None)
+
+# The backend is a flat set of modules run from backend/, not an installed package
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+
+@pytest.fixture
+def client():
+    """TestClient for a fresh app on an empty mongomock database."""
+    from fastapi.testclient import TestClient
+    from mongomock_motor import AsyncMongoMockClient
+
+    import server
+    from cache import content_cache
+
+    content_cache.clear()
+    mongo = AsyncMongoMockClient()
+    with TestClient(server.create_app(client_factory=lambda url: mongo)) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def db(client):
+    return client.app.state.db
+
+
+@pytest.fixture
+def auth(client):
+    """Authorization header of the default admin."""
+    response = client.post("/api/admin/login", json={"username": "admin", "password": "Admin@123"})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
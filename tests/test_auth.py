@@ -0,0 +1,118 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from auth import (
+    AuthState, TokenCache, VerifiedToken, auth_state, create_access_token, redeem_stream_ticket
+)
+
+
+@pytest.fixture(autouse=True)
+def fresh_auth_state():
+    """auth_state is process-wide; start each test from an unloaded one."""
+    auth_state.loaded_at = 0.0
+    auth_state.unknown_admins = set()
+    yield
+    auth_state.loaded_at = 0.0
+
+
+def _entry(name, ttl=60):
+    return VerifiedToken(name, name, time.time() + ttl)
+
+
+def test_token_cache_evicts_least_recently_used():
+    cache = TokenCache(max_size=2)
+    cache.set("a", _entry("a"))
+    cache.set("b", _entry("b"))
+    assert cache.get("a") is not None
+    cache.set("c", _entry("c"))
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+
+
+def test_token_cache_drops_expired_tokens():
+    cache = TokenCache(max_size=2)
+    cache.set("a", _entry("a", ttl=-1))
+    assert cache.get("a") is None
+    assert "a" not in cache._entries
+
+
+def test_logout_revokes_the_token(client, auth):
+    assert client.get("/api/admin/stats", headers=auth).status_code == 200
+    assert client.post("/api/admin/logout", headers=auth).status_code == 200
+    assert client.get("/api/admin/stats", headers=auth).status_code == 401
+
+
+def test_unknown_admin_is_refreshed_once(client, db, monkeypatch):
+    refreshes = []
+    original = AuthState.refresh
+
+    async def counting(self, db, force=False):
+        refreshes.append(force)
+        await original(self, db, force)
+
+    monkeypatch.setattr(AuthState, "refresh", counting)
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'ghost'})}"}
+    assert client.get("/api/admin/stats", headers=headers).status_code == 401
+    assert client.get("/api/admin/stats", headers=headers).status_code == 401
+    assert refreshes.count(True) == 1
+    assert "ghost" in auth_state.unknown_admins
+
+
+def test_fresh_state_does_not_wait_for_the_lock(client, db):
+    state = AuthState()
+
+    async def run():
+        await state.refresh(db)
+        async with state._lock:
+            # A held lock must not block callers while the state is fresh
+            await asyncio.wait_for(state.refresh(db), timeout=1)
+
+    client.portal.call(run)
+    assert "admin" in state.active_admins
+
+
+def test_concurrent_refreshes_query_once(client, db, monkeypatch):
+    state = AuthState()
+    queries = []
+    collection = type(db.admins)
+    original = collection.find
+
+    def counting(self, *args, **kwargs):
+        if self.name == "admins":
+            queries.append(args)
+        return original(self, *args, **kwargs)
+
+    monkeypatch.setattr(collection, "find", counting)
+
+    async def run():
+        await asyncio.gather(*(state.refresh(db) for _ in range(5)))
+
+    client.portal.call(run)
+    assert len(queries) == 1
+
+
+def test_stream_ticket_is_single_use(client, auth, db):
+    response = client.post("/api/admin/contacts/stream-ticket", headers=auth)
+    assert response.status_code == 200
+    ticket = response.json()["ticket"]
+
+    # Tickets cannot stand in for an access token
+    bearer = {"Authorization": f"Bearer {ticket}"}
+    assert client.get("/api/admin/stats", headers=bearer).status_code == 401
+
+    assert client.portal.call(redeem_stream_ticket, ticket, db) == "admin"
+    with pytest.raises(HTTPException) as error:
+        client.portal.call(redeem_stream_ticket, ticket, db)
+    assert error.value.status_code == 401
+
+
+def test_stream_ticket_dies_with_its_access_token(client, auth, db):
+    ticket = client.post("/api/admin/contacts/stream-ticket", headers=auth).json()["ticket"]
+    client.post("/api/admin/logout", headers=auth)
+    with pytest.raises(HTTPException) as error:
+        client.portal.call(redeem_stream_ticket, ticket, db)
+    assert error.value.status_code == 401
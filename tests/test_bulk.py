@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta
+
+from retention import ARCHIVE_COLLECTION
+
+PROJECT = {"title": "P", "description": "D", "category": "Web", "technologies": [], "image": "/uploads/projects/none.png"}
+
+
+def _contact(contact_id, status="new", days_ago=0):
+    created_at = datetime.utcnow() - timedelta(days=days_ago)
+    return {"id": contact_id, "name": "N", "email": "n@example.com", "subject": "S", "message": "M",
+            "status": status, "created_at": created_at, "updated_at": created_at}
+
+
+def _bulk(client, auth, **body):
+    response = client.post("/api/admin/contacts/bulk", json=body, headers=auth)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_bulk_delete_projects(client, auth):
+    ids = [client.post("/api/admin/projects", json=PROJECT, headers=auth).json()["id"] for _ in range(3)]
+    response = client.post("/api/admin/projects/bulk-delete", json={"ids": ids[:2] + ["missing"]}, headers=auth)
+    assert response.json() == {
+        "matched": 2, "modified": 2,
+        "results": [
+            {"id": ids[0], "result": "deleted"},
+            {"id": ids[1], "result": "deleted"},
+            {"id": "missing", "result": "not_found"},
+        ],
+    }
+    assert [project["id"] for project in client.get("/api/projects").json()] == [ids[2]]
+
+
+def test_bulk_set_status_reports_unchanged(client, auth, db):
+    client.portal.call(db.contacts.insert_many, [_contact("a", "new"), _contact("b", "read")])
+    result = _bulk(client, auth, action="set_status", status="read", ids=["a", "b", "c"])
+    assert result["matched"] == 2
+    assert result["modified"] == 1
+    assert result["results"] == [
+        {"id": "a", "result": "updated"},
+        {"id": "b", "result": "unchanged"},
+        {"id": "c", "result": "not_found"},
+    ]
+
+
+def test_bulk_by_id_includes_archived_contacts(client, auth, db):
+    client.portal.call(db.contacts.insert_one, _contact("live", "new"))
+    client.portal.call(db[ARCHIVE_COLLECTION].insert_one, _contact("archived", "read", days_ago=400))
+
+    result = _bulk(client, auth, action="set_status", status="replied", ids=["live", "archived"])
+    assert [item["result"] for item in result["results"]] == ["updated", "updated"]
+    archived = client.portal.call(db[ARCHIVE_COLLECTION].find_one, {"id": "archived"})
+    assert archived["status"] == "replied"
+
+    result = _bulk(client, auth, action="delete", ids=["archived"])
+    assert result["results"] == [{"id": "archived", "result": "deleted"}]
+    assert client.portal.call(db[ARCHIVE_COLLECTION].count_documents, {}) == 0
+
+
+def test_bulk_by_filter(client, auth, db):
+    client.portal.call(db.contacts.insert_many, [
+        _contact("old", "read", days_ago=30), _contact("recent", "read"), _contact("new", "new", days_ago=30),
+    ])
+    cutoff = (datetime.utcnow() - timedelta(days=7)).isoformat()
+    result = _bulk(client, auth, action="delete", filter={"status": "read", "created_before": cutoff})
+    assert result == {"matched": 1, "modified": 1, "results": []}
+    assert sorted(client.portal.call(db.contacts.distinct, "id")) == ["new", "recent"]
+
+
+def test_bulk_rejects_ambiguous_selection(client, auth):
+    for body in [
+        {"action": "delete"},
+        {"action": "delete", "ids": ["a"], "filter": {"status": "new"}},
+        {"action": "delete", "filter": {}},
+        {"action": "set_status", "ids": ["a"]},
+    ]:
+        assert client.post("/api/admin/contacts/bulk", json=body, headers=auth).status_code == 400
@@ -0,0 +1,104 @@
+from starlette.requests import Request
+
+from cache import TTLCache, conditional_response, etag_matches, make_cached_body, version_etag
+
+
+def _request(headers=None):
+    raw = [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw})
+
+
+def test_etag_matches():
+    etag = '"abc"'
+    assert not etag_matches(None, etag)
+    assert not etag_matches("", etag)
+    assert etag_matches('"abc"', etag)
+    assert etag_matches('W/"abc"', etag)
+    assert etag_matches('"x", "abc"', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"abcd"', etag)
+
+
+def test_etag_is_stable_for_same_content():
+    assert make_cached_body({"a": 1}).etag == make_cached_body({"a": 1}).etag
+    assert make_cached_body({"a": 1}).etag != make_cached_body({"a": 2}).etag
+
+
+def test_conditional_response():
+    cached = make_cached_body([1, 2], {"X-Next-Cursor": "c"})
+
+    response = conditional_response(_request(), cached)
+    assert response.status_code == 200
+    assert response.body == cached.body
+    assert response.headers["etag"] == cached.etag
+    assert response.headers["x-next-cursor"] == "c"
+
+    response = conditional_response(_request({"If-None-Match": cached.etag}), cached)
+    assert response.status_code == 304
+    assert response.body == b""
+    assert response.headers["etag"] == cached.etag
+
+
+def test_invalidate_drops_sub_namespaces():
+    cache = TTLCache()
+    cache.set("projects", "list", 1)
+    cache.set("projects:search", "q", 2)
+    cache.set("projectsx", "other", 3)
+    cache.invalidate("projects")
+    assert cache.get("projects", "list") is None
+    assert cache.get("projects:search", "q") is None
+    assert cache.get("projectsx", "other") == 3
+
+
+def test_version_etag():
+    etag = version_etag(3, "list", None, 100)
+    assert etag.startswith('W/"')
+    assert etag == version_etag(3, "list", None, 100)
+    assert etag != version_etag(4, "list", None, 100)
+    assert etag != version_etag(3, "list", "Web", 100)
+    assert etag_matches(etag, etag)
+    assert etag_matches(etag.removeprefix("W/"), etag)
+
+
+PROJECT = {"title": "Shop", "description": "D", "category": "Web", "technologies": ["React"], "image": "/x.png"}
+
+
+def test_revalidation_is_answered_without_querying(client, auth, monkeypatch):
+    project = client.post("/api/admin/projects", json=PROJECT, headers=auth).json()
+    listing = client.get("/api/projects")
+    single = client.get(f"/api/projects/{project['id']}")
+    testimonials = client.get("/api/testimonials")
+
+    collection_class = type(client.app.state.db.projects)
+
+    def guarded(method):
+        def call(self, *args, **kwargs):
+            assert self.name not in ("projects", "testimonials"), "revalidation should not query content"
+            return method(self, *args, **kwargs)
+        return call
+
+    # Fresh cache, as on another worker or after the TTL
+    from cache import content_cache
+    content_cache.clear()
+    for name in ("find", "find_one"):
+        monkeypatch.setattr(collection_class, name, guarded(getattr(collection_class, name)))
+    for path, response in [
+        ("/api/projects", listing),
+        (f"/api/projects/{project['id']}", single),
+        ("/api/testimonials", testimonials),
+    ]:
+        revalidated = client.get(path, headers={"If-None-Match": response.headers["etag"]})
+        assert revalidated.status_code == 304
+        assert revalidated.headers["etag"] == response.headers["etag"]
+
+
+def test_writes_change_the_etag(client, auth):
+    first = client.get("/api/projects")
+    project = client.post("/api/admin/projects", json=PROJECT, headers=auth).json()
+    second = client.get("/api/projects", headers={"If-None-Match": first.headers["etag"]})
+    assert second.status_code == 200
+    assert [item["id"] for item in second.json()] == [project["id"]]
+    # Later pages get their own validators
+    page = client.get("/api/projects", params={"cursor": "WyIyMDAwLTAxLTAxVDAwOjAwOjAwIiwgIngiXQ"})
+    assert page.headers["etag"] != second.headers["etag"]
+    assert client.get("/api/projects", headers={"If-None-Match": second.headers["etag"]}).status_code == 304
@@ -0,0 +1,102 @@
+import asyncio
+import gzip
+
+from compression import GzipCompressor, _CompressionResponder, accepted_encodings
+
+
+def test_accepted_encodings():
+    assert accepted_encodings("") == set()
+    assert accepted_encodings("gzip, deflate, br") == {"gzip", "deflate", "br"}
+    assert accepted_encodings("GZIP;q=0.5, br;q=0") == {"gzip"}
+    assert accepted_encodings("gzip;q=bad, identity") == {"identity"}
+
+
+def _run(messages, content_type="application/json", minimum_size=10, headers=(),
+         factory=GzipCompressor, status=200, path="/api/projects"):
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    async def run():
+        responder = _CompressionResponder(send, factory, minimum_size, path)
+        raw = [(b"content-type", content_type.encode())] if content_type else []
+        raw += headers
+        await responder.send({"type": "http.response.start", "status": status, "headers": raw})
+        for message in messages:
+            await responder.send({"type": "http.response.body", **message})
+
+    asyncio.run(run())
+    start, *bodies = sent
+    return dict((name.decode(), value.decode()) for name, value in start["headers"]), bodies
+
+
+def test_compresses_single_body():
+    body = b'{"items": ' + b"[1, 2, 3], " * 50 + b"}"
+    headers, bodies = _run([{"body": body}], headers=[(b"etag", b'"abc"')])
+    assert headers["content-encoding"] == "gzip"
+    assert headers["vary"] == "Accept-Encoding"
+    assert headers["etag"] == 'W/"abc"'
+    assert headers["content-length"] == str(len(bodies[0]["body"]))
+    assert gzip.decompress(bodies[0]["body"]) == body
+
+
+def test_compresses_streamed_body():
+    chunks = [b"line %d\n" % i * 20 for i in range(3)]
+    headers, bodies = _run(
+        [{"body": chunk, "more_body": True} for chunk in chunks] + [{"body": b"", "more_body": False}],
+        content_type="application/x-ndjson",
+        headers=[(b"content-length", b"999")],
+    )
+    assert headers["content-encoding"] == "gzip"
+    assert "content-length" not in headers
+    assert gzip.decompress(b"".join(body["body"] for body in bodies)) == b"".join(chunks)
+
+
+def test_passes_through_small_binary_and_event_streams():
+    for content_type, body in [
+        ("application/json", b"{}"),
+        ("image/png", b"\x89PNG" * 100),
+        ("text/event-stream", b"data: x\n\n" * 100),
+    ]:
+        headers, bodies = _run([{"body": body}], content_type=content_type)
+        assert "content-encoding" not in headers
+        assert bodies[0]["body"] == body
+
+
+def test_varies_on_encoding_even_when_not_compressed():
+    etag = [(b"etag", b'"abc"')]
+    headers, bodies = _run([{"body": b"{}"}], headers=etag)
+    assert "content-encoding" not in headers
+    assert headers["vary"] == "Accept-Encoding"
+    assert headers["etag"] == 'W/"abc"'
+
+    headers, _ = _run([{"body": b"{}" * 100}], headers=etag, factory=None)
+    assert "content-encoding" not in headers
+    assert headers["vary"] == "Accept-Encoding"
+    assert headers["etag"] == '"abc"'
+
+    headers, _ = _run([{"body": b"\x89PNG" * 100}], content_type="image/png", headers=etag)
+    assert "vary" not in headers
+    assert headers["etag"] == '"abc"'
+
+
+def test_not_modified_matches_the_full_response():
+    etag = [(b"etag", b'"abc"')]
+    headers, _ = _run([], content_type="", status=304, headers=etag)
+    assert headers == {"etag": 'W/"abc"', "vary": "Accept-Encoding"}
+
+    headers, _ = _run([], content_type="", status=304, headers=etag, factory=None)
+    assert headers == {"etag": '"abc"', "vary": "Accept-Encoding"}
+
+    headers, _ = _run([], content_type="", status=304, headers=etag, path="/uploads/projects/a.png")
+    assert headers == {"etag": '"abc"'}
+
+
+def test_revalidated_responses_keep_their_etag(client):
+    gzip_only = {"Accept-Encoding": "gzip"}
+    first = client.get("/api/projects", headers=gzip_only)
+    second = client.get("/api/projects", headers={**gzip_only, "If-None-Match": first.headers["etag"]})
+    assert second.status_code == 304
+    assert second.headers["etag"] == first.headers["etag"]
+    assert first.headers["vary"] == second.headers["vary"] == "Accept-Encoding"
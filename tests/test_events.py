@@ -0,0 +1,124 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+import events
+import routes.admin
+from events import ChangeWatcher, EventBus, bump_version, event_bus
+
+
+def _contact(contact_id, updated_at):
+    return {"id": contact_id, "name": "N", "email": "n@example.com", "subject": "S", "message": "M",
+            "status": "new", "created_at": updated_at, "updated_at": updated_at}
+
+
+def test_bus_filters_subscriptions_and_calls_listeners():
+    async def run():
+        bus = EventBus(queue_size=10)
+        heard = []
+        bus.add_listener(heard.append)
+        contacts, everything = bus.subscribe(["contacts"]), bus.subscribe()
+        bus.publish({"collection": "projects", "op": "invalidate"})
+        bus.publish({"collection": "contacts", "op": "invalidate"})
+        bus.unsubscribe(everything)
+        bus.publish({"collection": "contacts", "op": "invalidate"})
+        return heard, contacts.qsize(), everything.qsize()
+
+    heard, contacts, everything = asyncio.run(run())
+    assert len(heard) == 3
+    assert (contacts, everything) == (2, 2)
+
+
+def test_bus_replaces_a_full_backlog_with_one_invalidate():
+    async def run():
+        bus = EventBus(queue_size=2)
+        queue = bus.subscribe()
+        for index in range(3):
+            bus.publish({"collection": "contacts", "op": "upsert", "doc": {"id": str(index)}})
+        return [queue.get_nowait() for _ in range(queue.qsize())]
+
+    assert asyncio.run(run()) == [{"collection": "contacts", "op": "invalidate"}]
+
+
+def test_polling_watcher_publishes_changes(monkeypatch):
+    monkeypatch.setattr(events, "EVENTS_POLL_INTERVAL_SECONDS", 0.01)
+
+    async def run():
+        db = AsyncMongoMockClient()["events_test"]
+        bus = EventBus()
+        queue = bus.subscribe()
+        await bump_version(db, "projects")
+        watcher = ChangeWatcher(db, bus, mode="poll")
+        watcher.start()
+        await asyncio.sleep(0.05)
+        await db.contacts.insert_one(_contact("c1", datetime.utcnow()))
+        await bump_version(db, "projects")
+        # Several polls, with c1 inside the lookback window on each
+        await asyncio.sleep(0.1)
+        await watcher.stop()
+        return [queue.get_nowait() for _ in range(queue.qsize())]
+
+    published = asyncio.run(run())
+    # Each change once, although c1 is re-read within the lookback window
+    assert sorted((event["collection"], event["op"]) for event in published) == [
+        ("contacts", "upsert"), ("projects", "invalidate")
+    ]
+    assert next(event["doc"]["id"] for event in published if event["op"] == "upsert") == "c1"
+
+
+def _stream(db, last_event_id, during=None):
+    """Collect the SSE events of one short contact stream."""
+
+    async def run():
+        chunks = []
+        async for chunk in routes.admin._contact_events(db, last_event_id):
+            chunks.append(chunk)
+            if during is not None and len(chunks) == 1:
+                asyncio.get_running_loop().call_soon(during)
+        return chunks
+
+    chunks = asyncio.run(run())
+    assert chunks[0] == b"retry: 3000\n\n"
+    parsed = []
+    for chunk in chunks[1:]:
+        if chunk.startswith(b":"):
+            continue  # keepalive
+        fields = dict(line.split(": ", 1) for line in chunk.decode().strip().split("\n"))
+        parsed.append((fields["event"], fields.get("id"), json.loads(fields["data"])))
+    return parsed
+
+
+@pytest.fixture
+def stream_db(monkeypatch):
+    monkeypatch.setattr(routes.admin, "SSE_MAX_STREAM_SECONDS", 0.05)
+    db = AsyncMongoMockClient()["events_test"]
+    start = datetime(2024, 1, 1)
+    contacts = [_contact(f"c{index}", start + timedelta(minutes=index // 2)) for index in range(4)]
+    asyncio.run(db.contacts.insert_many(contacts))
+    return db, [routes.admin._contact_event_id(contact) for contact in contacts]
+
+
+def test_stream_replays_changes_after_the_last_event_id(stream_db):
+    db, ids = stream_db
+    # c0 and c1 share an updated_at, so the id breaks the tie
+    events_after_c0 = _stream(db, ids[0])
+    assert [(event, event_id) for event, event_id, _ in events_after_c0] == [("upsert", event_id) for event_id in ids[1:]]
+    assert [data["id"] for _, _, data in events_after_c0] == ["c1", "c2", "c3"]
+    assert _stream(db, ids[3]) == []
+
+
+def test_stream_asks_for_a_reload_when_it_cannot_replay(stream_db, monkeypatch):
+    db, ids = stream_db
+    assert _stream(db, "garbage") == [("invalidate", None, {})]
+    monkeypatch.setattr(routes.admin, "SSE_REPLAY_LIMIT", 2)
+    assert _stream(db, ids[0]) == [("invalidate", None, {})]
+
+
+def test_stream_forwards_live_events(stream_db):
+    db, _ = stream_db
+    contact = _contact("live", datetime(2024, 2, 1))
+    live = _stream(db, None, during=lambda: event_bus.publish({"collection": "contacts", "op": "upsert", "doc": contact}))
+    assert [(event, data["id"]) for event, _, data in live] == [("upsert", "live")]
@@ -0,0 +1,79 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+import export
+from export import _csv_value
+from retention import ARCHIVE_COLLECTION
+
+
+def _contact(contact_id, status="new", days_ago=0, **fields):
+    created_at = datetime(2024, 6, 1) - timedelta(days=days_ago)
+    return {"id": contact_id, "name": "N", "email": "n@example.com", "subject": "S", "message": "M",
+            "status": status, "created_at": created_at, "updated_at": created_at, **fields}
+
+
+@pytest.mark.parametrize("value, expected", [
+    (None, ""),
+    (datetime(2024, 1, 2, 3, 4, 5), "2024-01-02T03:04:05"),
+    (["React", "Node"], "React; Node"),
+    ({"a": 1}, '{"a": 1}'),
+    ("=HYPERLINK(\"http://evil\")", "'=HYPERLINK(\"http://evil\")"),
+    ("+1 555", "'+1 555"),
+    ("-2", "'-2"),
+    ("@SUM(A1)", "'@SUM(A1)"),
+    ("\tcmd", "'\tcmd"),
+    ("plain = text", "plain = text"),
+    (3, "3"),
+])
+def test_csv_values_are_flattened_and_formulas_escaped(value, expected):
+    assert _csv_value(value) == expected
+
+
+def test_contacts_export_as_csv(client, auth, db, monkeypatch):
+    # Small chunks, so rows are spread over several body chunks
+    monkeypatch.setattr(export, "EXPORT_CHUNK_BYTES", 64)
+    client.portal.call(db.contacts.insert_many, [
+        _contact("a", days_ago=2, name="=cmd()"), _contact("b", "read", days_ago=1), _contact("c", days_ago=0),
+    ])
+    response = client.get("/api/admin/contacts/export", params={"status": "new"}, headers=auth)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "text/csv; charset=utf-8"
+    assert response.headers["content-disposition"].startswith('attachment; filename="contacts-')
+    assert response.headers["cache-control"] == "no-store"
+
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["id"] for row in rows] == ["c", "a"]
+    assert rows[1]["name"] == "'=cmd()"
+    assert rows[1]["created_at"] == "2024-05-30T00:00:00"
+
+
+def test_contacts_export_as_ndjson_with_archive(client, auth, db):
+    client.portal.call(db.contacts.insert_one, _contact("live"))
+    client.portal.call(db[ARCHIVE_COLLECTION].insert_one, _contact("old", "read", days_ago=400))
+    params = {"format": "ndjson", "include_archived": True, "created_after": "2023-01-01T00:00:00"}
+    response = client.get("/api/admin/contacts/export", params=params, headers=auth)
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["id"] for line in lines] == ["live", "old"]
+    assert "_id" not in lines[0]
+
+    params["created_after"] = "2024-01-01T00:00:00"
+    response = client.get("/api/admin/contacts/export", params=params, headers=auth)
+    assert [json.loads(line)["id"] for line in response.text.splitlines()] == ["live"]
+
+
+def test_project_export_filters_and_joins_lists(client, auth):
+    for title, category in [("Shop", "Web"), ("Bot", "AI/ML")]:
+        client.post("/api/admin/projects", headers=auth, json={
+            "title": title, "description": "D", "category": category, "technologies": ["React", "Node"], "image": ""
+        })
+    response = client.get("/api/admin/projects/export", params={"category": "Web"}, headers=auth)
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [(row["title"], row["technologies"]) for row in rows] == [("Shop", "React; Node")]
+
+    assert client.get("/api/admin/projects/export", params={"format": "xml"}, headers=auth).status_code == 422
+    assert client.get("/api/admin/projects/export").status_code == 403
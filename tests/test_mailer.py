@@ -0,0 +1,154 @@
+import asyncio
+import json
+import uuid
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+import mailer
+from mailer import OutboxWorker, SendGridConfig
+
+CONFIG = SendGridConfig(api_key="key", from_addr="from@example.com", notify_to="to@example.com",
+                        api_base="https://sendgrid.test")
+
+
+@pytest.fixture(autouse=True)
+def fast_outbox(monkeypatch):
+    monkeypatch.setattr(mailer, "EMAIL_BATCH_SIZE", 3)
+    monkeypatch.setattr(mailer, "EMAIL_BATCH_WINDOW_SECONDS", 60)
+    monkeypatch.setattr(mailer, "EMAIL_POLL_INTERVAL_SECONDS", 0.02)
+    monkeypatch.setattr(mailer, "EMAIL_RETRY_BASE_SECONDS", 30)
+    monkeypatch.setattr(mailer, "EMAIL_MAX_ATTEMPTS", 2)
+
+
+def _item(name, age=0, **fields):
+    created_at = datetime.utcnow() - timedelta(seconds=age)
+    return {"id": str(uuid.uuid4()), "kind": "contact", "payload": {"name": name, "message": "m"},
+            "status": "pending", "attempts": 0, "next_attempt_at": created_at, "created_at": created_at, **fields}
+
+
+def _run(items, handler, until):
+    """Run a worker over items until until(db) holds; returns (db docs, requests sent)."""
+    requests = []
+
+    async def record(request):
+        requests.append(json.loads(request.content))
+        return await handler(request)
+
+    async def run():
+        db = AsyncMongoMockClient()["outbox_test"]
+        if items:
+            await db.email_outbox.insert_many(items)
+        worker = OutboxWorker(db, CONFIG, transport=httpx.MockTransport(record))
+        worker.start()
+        for _ in range(200):
+            if await until(db):
+                break
+            await asyncio.sleep(0.01)
+        await worker.stop()
+        return await db.email_outbox.find({}, {"_id": 0}).sort("created_at", 1).to_list(None)
+
+    return asyncio.run(run()), requests
+
+
+async def _ok(request):
+    return httpx.Response(202)
+
+
+async def _error(request):
+    return httpx.Response(500)
+
+
+async def _all_sent(db):
+    return await db.email_outbox.count_documents({"status": {"$in": ["pending", "sending"]}}) == 0
+
+
+def test_full_batch_is_sent_as_one_digest():
+    docs, requests = _run([_item(f"n{i}") for i in range(3)], _ok, _all_sent)
+    assert [doc["status"] for doc in docs] == ["sent"] * 3
+    assert len(requests) == 1
+    assert requests[0]["subject"] == "3 new contact submissions"
+    assert all(f"Name: n{i}" in requests[0]["content"][0]["value"] for i in range(3))
+
+
+def test_partial_batch_waits_for_the_window():
+    async def attempted(db):
+        await asyncio.sleep(0.1)
+        return True
+
+    docs, requests = _run([_item("fresh")], _ok, attempted)
+    assert requests == []
+    assert docs[0]["status"] == "pending"
+
+    docs, requests = _run([_item("old", age=120)], _ok, _all_sent)
+    assert docs[0]["status"] == "sent"
+    assert requests[0]["subject"] == "New contact from old"
+
+
+def test_failed_sends_back_off_then_fail():
+    async def rescheduled(db):
+        return await db.email_outbox.count_documents({"attempts": 1}) == 1
+
+    docs, _ = _run([_item("n", age=120)], _error, rescheduled)
+    [doc] = docs
+    assert doc["status"] == "pending"
+    assert "claim" not in doc
+    delay = (doc["next_attempt_at"] - datetime.utcnow()).total_seconds()
+    assert 20 < delay <= 36
+
+    async def failed(db):
+        return await db.email_outbox.count_documents({"status": "failed"}) == 1
+
+    docs, _ = _run([_item("n", age=120, attempts=1)], _error, failed)
+    assert docs[0]["status"] == "failed"
+    assert docs[0]["attempts"] == 2
+
+
+def test_expired_leases_are_reclaimed():
+    now = datetime.utcnow()
+    items = [
+        _item("stale", age=120, status="sending", claim="dead", locked_until=now - timedelta(seconds=1)),
+        _item("leased", age=120, status="sending", claim="live", locked_until=now + timedelta(seconds=300)),
+    ]
+
+    async def stale_sent(db):
+        return await db.email_outbox.count_documents({"status": "sent"}) == 1
+
+    docs, requests = _run(items, _ok, stale_sent)
+    assert [(doc["payload"]["name"], doc["status"]) for doc in docs] == [("stale", "sent"), ("leased", "sending")]
+    assert len(requests) == 1
+
+
+def test_stop_claims_no_new_batch(monkeypatch):
+    monkeypatch.setattr(mailer, "EMAIL_CONCURRENCY", 1)
+    monkeypatch.setattr(mailer, "EMAIL_BATCH_SIZE", 1)
+
+    async def run():
+        release = asyncio.Event()
+        sent = []
+
+        async def slow(request):
+            sent.append(json.loads(request.content)["subject"])
+            await release.wait()
+            return httpx.Response(202)
+
+        db = AsyncMongoMockClient()["outbox_test"]
+        await db.email_outbox.insert_one(_item("first"))
+        worker = OutboxWorker(db, CONFIG, transport=httpx.MockTransport(slow))
+        worker.start()
+        while not sent:
+            await asyncio.sleep(0.01)
+        # The worker now waits for the only send slot; the next item is due
+        await db.email_outbox.insert_one(_item("second"))
+        stopping = asyncio.create_task(worker.stop())
+        await asyncio.sleep(0.05)
+        release.set()
+        await stopping
+        return sent, await db.email_outbox.find_one({"payload.name": "second"})
+
+    sent, second = asyncio.run(run())
+    assert sent == ["New contact from first"]
+    assert second["status"] == "pending"
+    assert "claim" not in second
@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from pagination import decode_cursor, encode_cursor, page_cache_key
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2024, 5, 1, 12, 30, 15, 123456)
+    cursor = encode_cursor({"created_at": created_at, "id": "abc"})
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (created_at, "abc")
+
+
+@pytest.mark.parametrize("cursor", ["not a cursor", "e30", "WyJ4IiwgImEiXQ", ""])
+def test_invalid_cursor_is_400(cursor):
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(cursor)
+    assert exc.value.status_code == 400
+
+
+def test_only_first_pages_get_cache_keys():
+    projection = {"_id": 0, "id": 1, "title": 1}
+    assert page_cache_key(None, projection, 10) == (10, ("_id", "id", "title"))
+    assert page_cache_key("abc", projection, 10) is None
+
+
+def _contacts(count, created_at):
+    # Pairs share a timestamp so the id tie-break is exercised
+    return [
+        {"id": f"c{index:02d}", "name": "N", "email": "n@example.com", "subject": "S", "message": "M",
+         "status": "new", "created_at": created_at - timedelta(seconds=index // 2)}
+        for index in range(count)
+    ]
+
+
+def _pages(client, url, params, headers=None):
+    pages, cursor = [], None
+    while True:
+        response = client.get(url, params={**params, "cursor": cursor} if cursor else params, headers=headers)
+        assert response.status_code == 200, response.text
+        pages.append(response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return pages
+
+
+def test_contacts_page_through_every_document_once(client, auth, db):
+    client.portal.call(db.contacts.insert_many, _contacts(7, datetime.utcnow()))
+    pages = _pages(client, "/api/admin/contacts", {"limit": 3, "fields": "name"}, auth)
+    assert [len(page) for page in pages] == [3, 3, 1]
+    ids = [contact["id"] for page in pages for contact in page]
+    assert sorted(ids) == [f"c{index:02d}" for index in range(7)]
+    assert set(pages[0][0]) == {"id", "name", "created_at"}
+
+
+def test_projects_page_through_the_listing(client, auth):
+    for index in range(5):
+        project = {"title": f"P{index}", "description": "D", "category": "Web", "technologies": [], "image": ""}
+        client.post("/api/admin/projects", json=project, headers=auth)
+    pages = _pages(client, "/api/projects", {"limit": 2})
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert len({project["id"] for page in pages for project in page}) == 5
+
+
+def test_endpoints_reject_bad_cursors_and_fields(client, auth):
+    assert client.get("/api/projects", params={"cursor": "junk"}).status_code == 400
+    assert client.get("/api/admin/contacts", params={"fields": "nope"}, headers=auth).status_code == 400
@@ -0,0 +1,142 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+from pymongo.errors import DuplicateKeyError
+
+import ratelimit
+from ratelimit import InMemoryRateLimitBackend, MongoRateLimitBackend, RateLimitMiddleware, RateLimitRule, client_ip
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(ratelimit.time, "monotonic", clock)
+    return clock
+
+
+def test_parse():
+    rule = RateLimitRule.parse("5/600")
+    assert rule.capacity == 5
+    assert rule.refill_per_second == pytest.approx(5 / 600)
+
+
+def test_bucket_allows_burst_then_limits(clock):
+    backend = InMemoryRateLimitBackend()
+    rule = RateLimitRule.parse("3/30")
+
+    async def hits(count):
+        return [await backend.hit("key", rule) for _ in range(count)]
+
+    results = asyncio.run(hits(4))
+    assert [result.allowed for result in results] == [True, True, True, False]
+    assert results[-1].retry_after == pytest.approx(10)
+
+    # One token back after 10 seconds, and no more than one
+    clock.now += 10
+    assert [result.allowed for result in asyncio.run(hits(2))] == [True, False]
+
+
+def test_bucket_refills_to_capacity_only(clock):
+    backend = InMemoryRateLimitBackend()
+    rule = RateLimitRule.parse("2/10")
+    asyncio.run(backend.hit("key", rule))
+    clock.now += 3600
+
+    async def hits():
+        return [(await backend.hit("key", rule)).allowed for _ in range(3)]
+
+    assert asyncio.run(hits()) == [True, True, False]
+
+
+def test_keys_are_independent(clock):
+    backend = InMemoryRateLimitBackend()
+    rule = RateLimitRule.parse("1/60")
+
+    async def run():
+        return [(await backend.hit(key, rule)).allowed for key in ("a", "b", "a")]
+
+    assert asyncio.run(run()) == [True, True, False]
+
+
+def test_client_ip_uses_trusted_hops():
+    scope = {"client": ("10.0.0.1", 5000), "headers": [(b"x-forwarded-for", b"6.6.6.6, 1.2.3.4")]}
+    assert client_ip(scope, trusted_proxies=0) == "10.0.0.1"
+    assert client_ip(scope, trusted_proxies=1) == "1.2.3.4"
+    assert client_ip(scope, trusted_proxies=2) == "6.6.6.6"
+    assert client_ip(scope, trusted_proxies=3) == "10.0.0.1"
+
+
+def test_mongo_backend_shares_buckets():
+    async def run():
+        collection = AsyncMongoMockClient()["ratelimit_test"].rate_limits
+        rule = RateLimitRule.parse("2/60")
+        # Two backends stand in for two workers on the same collection
+        first, second = MongoRateLimitBackend(collection), MongoRateLimitBackend(collection)
+        results = [await first.hit("key", rule), await second.hit("key", rule), await first.hit("key", rule)]
+        return results, await collection.find_one({"_id": "key"})
+
+    results, bucket = asyncio.run(run())
+    assert [result.allowed for result in results] == [True, True, False]
+    assert results[-1].retry_after == pytest.approx(30, abs=1)
+    assert "expires_at" in bucket
+
+
+def test_mongo_backend_retries_a_racing_upsert(monkeypatch):
+    collection_type = type(AsyncMongoMockClient()["ratelimit_test"].rate_limits)
+    original = collection_type.find_one_and_update
+    calls = []
+
+    def racing(self, *args, **kwargs):
+        calls.append(args[0])
+        if len(calls) == 1:
+            raise DuplicateKeyError("E11000 duplicate key")
+        return original(self, *args, **kwargs)
+
+    monkeypatch.setattr(collection_type, "find_one_and_update", racing)
+
+    async def run():
+        backend = MongoRateLimitBackend(AsyncMongoMockClient()["ratelimit_test"].rate_limits)
+        return await backend.hit("key", RateLimitRule.parse("1/60"))
+
+    assert asyncio.run(run()).allowed
+    assert len(calls) == 2
+
+
+def test_middleware_limits_per_route_and_client(monkeypatch):
+    # As if TRUSTED_PROXY_COUNT=1, which is bound when the module loads
+    monkeypatch.setattr(ratelimit, "client_ip", lambda scope: client_ip(scope, trusted_proxies=1))
+    app = FastAPI()
+
+    @app.post("/limited")
+    async def limited():
+        return {}
+
+    @app.get("/limited")
+    async def other_method():
+        return {}
+
+    app.add_middleware(
+        RateLimitMiddleware, backend=InMemoryRateLimitBackend(),
+        rules={("POST", "/limited"): RateLimitRule.parse("1/60")},
+    )
+    client = TestClient(app)
+    first = {"X-Forwarded-For": "1.1.1.1"}
+    assert client.post("/limited", headers=first).status_code == 200
+    blocked = client.post("/limited", headers=first)
+    assert blocked.status_code == 429
+    assert blocked.headers["Retry-After"] == "60"
+    # A spoofed leftmost entry doesn't buy a new bucket
+    assert client.post("/limited", headers={"X-Forwarded-For": "9.9.9.9, 1.1.1.1"}).status_code == 429
+    assert client.post("/limited", headers={"X-Forwarded-For": "2.2.2.2"}).status_code == 200
+    assert client.get("/limited", headers=first).status_code == 200
@@ -0,0 +1,111 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+import retention
+from retention import ARCHIVE_COLLECTION, archive_contacts
+
+
+def _contact(contact_id, status, age_days):
+    created_at = datetime.utcnow() - timedelta(days=age_days)
+    return {"id": contact_id, "status": status, "created_at": created_at, "updated_at": created_at}
+
+
+@pytest.fixture
+def db():
+    return AsyncMongoMockClient()["retention_test"]
+
+
+def test_archives_only_old_handled_contacts(db):
+    async def run():
+        await db.contacts.insert_many([
+            _contact("old-read", "read", 100),
+            _contact("old-replied", "replied", 100),
+            _contact("old-new", "new", 100),
+            _contact("recent-read", "read", 5),
+        ])
+        moved = await archive_contacts(db, retention_days=30)
+        remaining = sorted(await db.contacts.distinct("id"))
+        archived = await db[ARCHIVE_COLLECTION].find({}).to_list(None)
+        return moved, remaining, archived
+
+    moved, remaining, archived = asyncio.run(run())
+    assert moved == 2
+    assert remaining == ["old-new", "recent-read"]
+    assert sorted(doc["id"] for doc in archived) == ["old-read", "old-replied"]
+    assert all(isinstance(doc["archived_at"], datetime) for doc in archived)
+
+
+def test_archives_in_batches(db, monkeypatch):
+    monkeypatch.setattr(retention, "CONTACT_ARCHIVE_BATCH_SIZE", 2)
+
+    async def run():
+        await db.contacts.insert_many([_contact(f"c{i}", "read", 100) for i in range(5)])
+        moved = await archive_contacts(db, retention_days=30)
+        return moved, await db.contacts.count_documents({}), await db[ARCHIVE_COLLECTION].count_documents({})
+
+    assert asyncio.run(run()) == (5, 0, 5)
+
+
+def test_skips_when_another_worker_holds_the_lease(db):
+    async def run():
+        await db.contacts.insert_one(_contact("old", "read", 100))
+        await db.job_leases.insert_one({
+            "_id": retention.ARCHIVE_LEASE_ID,
+            "holder": "another-worker",
+            "expires_at": datetime.utcnow() + timedelta(minutes=5),
+        })
+        return await archive_contacts(db, retention_days=30), await db.contacts.count_documents({})
+
+    assert asyncio.run(run()) == (0, 1)
+
+
+def _full_contact(contact_id, status, age_days):
+    return {**_contact(contact_id, status, age_days),
+            "name": "N", "email": "n@example.com", "subject": "S", "message": "M"}
+
+
+@pytest.fixture
+def archived(client, monkeypatch):
+    """The app's database with old1/old2 archived and new1 still live."""
+    monkeypatch.setattr(retention, "CONTACT_RETENTION_DAYS", 30)
+    app_db = client.app.state.db
+    client.portal.call(app_db.contacts.insert_many, [
+        _full_contact("old1", "read", 90), _full_contact("old2", "replied", 60), _full_contact("new1", "new", 1),
+    ])
+    assert client.portal.call(archive_contacts, app_db) == 2
+    return app_db
+
+
+def test_listing_merges_archived_contacts_on_request(client, auth, archived):
+    live = client.get("/api/admin/contacts", headers=auth).json()
+    assert [contact["id"] for contact in live] == ["new1"]
+
+    first = client.get("/api/admin/contacts", params={"include_archived": True, "limit": 2}, headers=auth)
+    rest = client.get("/api/admin/contacts", headers=auth, params={
+        "include_archived": True, "limit": 2, "cursor": first.headers["X-Next-Cursor"]
+    })
+    assert [contact["id"] for contact in first.json() + rest.json()] == ["new1", "old2", "old1"]
+
+
+def test_archived_contacts_can_be_read_updated_and_deleted(client, auth, archived):
+    assert client.get("/api/admin/contacts/old1", headers=auth).status_code == 404
+    assert client.get("/api/admin/contacts/old1", params={"include_archived": True}, headers=auth).json()["id"] == "old1"
+
+    updated = client.put("/api/admin/contacts/old1", json={"status": "replied"}, headers=auth)
+    assert updated.json()["status"] == "replied"
+    assert client.portal.call(archived[ARCHIVE_COLLECTION].find_one, {"id": "old1"})["status"] == "replied"
+    assert client.portal.call(archived.contacts.count_documents, {}) == 1
+
+    assert client.delete("/api/admin/contacts/old1", headers=auth).status_code == 200
+    assert client.delete("/api/admin/contacts/old1", headers=auth).status_code == 404
+
+
+def test_stats_count_archived_contacts_on_request(client, auth, archived):
+    assert client.get("/api/admin/stats", headers=auth).json()["total_contacts"] == 1
+    stats = client.get("/api/admin/stats", params={"include_archived": True, "breakdown": True}, headers=auth).json()
+    assert stats["total_contacts"] == 3
+    assert stats["archived_contacts"] == 2
+    assert stats["contacts_by_status"] == {"new": 1, "read": 1, "replied": 1}
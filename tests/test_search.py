@@ -0,0 +1,96 @@
+import pytest
+from pymongo.errors import OperationFailure
+
+import search
+from search import InvertedIndex, PROJECT_SEARCH, tokenize
+
+DOCS = [
+    {"id": "1", "title": "Online shop", "technologies": ["React", "Node"], "category": "Web", "description": "Store"},
+    {"id": "2", "title": "Chat bot", "technologies": ["Python"], "category": "AI/ML", "description": "A shop assistant"},
+    {"id": "3", "title": "Dashboard", "technologies": ["Vue"], "category": "Web", "description": "Reactive charts"},
+]
+
+
+def _ids(results):
+    return [doc["id"] for _, doc in results]
+
+
+def test_tokenize():
+    assert tokenize("Hello, World! node.js") == ["hello", "world", "node", "js"]
+
+
+def test_field_weights_rank_results():
+    index = InvertedIndex(DOCS, PROJECT_SEARCH)
+    # A title match outweighs a description match
+    assert _ids(index.search("shop")) == ["1", "2"]
+
+
+def test_prefix_matches_score_lower_than_exact():
+    index = InvertedIndex(DOCS, PROJECT_SEARCH)
+    results = index.search("react")
+    assert _ids(results) == ["1", "3"]
+    # "reactive" only matches by prefix, and in a low-weight field
+    assert results[0][0] > results[1][0]
+    assert _ids(index.search("reac")) == ["1", "3"]
+
+
+def test_no_match_and_ties():
+    index = InvertedIndex(DOCS, PROJECT_SEARCH)
+    assert index.search("kubernetes") == []
+    assert index.search("") == []
+    # Equal scores are ordered by id
+    assert _ids(index.search("web")) == ["1", "3"]
+
+
+@pytest.fixture
+def memory_search(monkeypatch):
+    # mongomock has no $text, so endpoint tests use the in-memory backend
+    monkeypatch.setattr(search, "SEARCH_BACKEND", "memory")
+
+
+def _add_projects(client, auth):
+    for doc in DOCS:
+        project = {key: doc[key] for key in ("title", "technologies", "category", "description")}
+        client.post("/api/admin/projects", json={**project, "image": ""}, headers=auth)
+
+
+def test_search_endpoint_ranks_and_pages(client, auth, memory_search):
+    _add_projects(client, auth)
+    first = client.get("/api/projects/search", params={"q": "shop", "limit": 1})
+    assert [project["title"] for project in first.json()] == ["Online shop"]
+    assert first.json()[0]["score"] > 0
+    second = client.get(
+        "/api/projects/search", params={"q": "shop", "limit": 1, "cursor": first.headers["X-Next-Cursor"]}
+    )
+    assert [project["title"] for project in second.json()] == ["Chat bot"]
+    assert "X-Next-Cursor" not in second.headers
+
+    assert client.get("/api/projects/search", params={"q": "shop", "cursor": "junk"}).status_code == 400
+
+
+def test_search_sees_writes(client, auth, memory_search):
+    _add_projects(client, auth)
+    assert client.get("/api/projects/search", params={"q": "rust"}).json() == []
+    client.post("/api/admin/projects", headers=auth, json={
+        "title": "Engine", "description": "D", "category": "Tools", "technologies": ["Rust"], "image": ""
+    })
+    assert [project["title"] for project in client.get("/api/projects/search", params={"q": "rust"}).json()] == ["Engine"]
+
+
+def test_memory_index_keeps_the_newest_documents(client, auth, memory_search, monkeypatch):
+    monkeypatch.setattr(search, "SEARCH_MEMORY_MAX_DOCS", 2)
+    _add_projects(client, auth)
+    titles = [project["title"] for project in client.get("/api/projects/search", params={"q": "shop"}).json()]
+    # "Online shop" was created first, so it fell out of the index
+    assert titles == ["Chat bot"]
+
+
+def test_missing_text_index(client, auth, monkeypatch):
+    async def no_text_index(*args):
+        raise OperationFailure("text index required for $text query")
+
+    monkeypatch.setattr(search, "_mongo_search", no_text_index)
+    _add_projects(client, auth)
+    # Projects fall back to the in-memory index; contacts report the outage
+    assert len(client.get("/api/projects/search", params={"q": "shop"}).json()) == 2
+    assert client.get("/api/admin/contacts/search", params={"q": "x"}, headers=auth).status_code == 503
@@ -0,0 +1,48 @@
+from cache import content_cache
+from events import bump_version
+from snapshot import HOME_SNAPSHOT_ID, get_home_snapshot, rebuild_home_snapshot
+
+PROJECT = {"title": "P", "description": "D", "category": "Web", "technologies": [], "image": ""}
+TESTIMONIAL = {"name": "N", "role": "R", "content": "C", "rating": 5, "avatar": ""}
+
+
+def _stored(client, db):
+    return client.portal.call(db.site_snapshots.find_one, {"_id": HOME_SNAPSHOT_ID})
+
+
+def test_writes_rebuild_the_snapshot(client, auth, db):
+    client.post("/api/admin/projects", json=PROJECT, headers=auth)
+    client.post("/api/admin/testimonials", json=TESTIMONIAL, headers=auth)
+    snapshot = _stored(client, db)
+    assert snapshot["version"] == 2
+    assert [project["title"] for project in snapshot["projects"]] == ["P"]
+
+    home = client.get("/api/home").json()
+    assert [testimonial["name"] for testimonial in home["testimonials"]] == ["N"]
+    assert len(home["projects"]) == 1
+
+
+def test_stale_rebuild_keeps_the_newer_snapshot(client, db):
+    # As if another worker already stored a snapshot of a later version
+    newer = {"projects": [{"id": "newer"}], "testimonials": [], "version": 1000}
+    client.portal.call(db.site_snapshots.insert_one, {"_id": HOME_SNAPSHOT_ID, **newer})
+    client.portal.call(bump_version, db, "projects")
+
+    snapshot = client.portal.call(rebuild_home_snapshot, db)
+    assert snapshot["version"] == 1000
+    assert _stored(client, db)["projects"] == [{"id": "newer"}]
+
+
+def test_snapshots_behind_or_unversioned_are_rebuilt(client, db):
+    client.portal.call(db.site_snapshots.insert_one, {"_id": HOME_SNAPSHOT_ID, "projects": [], "testimonials": []})
+    assert client.portal.call(get_home_snapshot, db)["version"] == 0
+    assert _stored(client, db)["version"] == 0
+
+    # A write seen through content_versions alone, e.g. made by another worker
+    client.portal.call(db.projects.insert_one, {**PROJECT, "id": "p1"})
+    client.portal.call(bump_version, db, "projects")
+    content_cache.invalidate("projects")
+    snapshot = client.portal.call(get_home_snapshot, db)
+    assert snapshot["version"] == 1
+    assert [project["id"] for project in snapshot["projects"]] == ["p1"]
+    assert "_id" not in snapshot
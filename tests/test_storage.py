@@ -0,0 +1,141 @@
+import pytest
+from botocore.exceptions import ClientError
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+
+import file_handler
+from storage import IMMUTABLE_CACHE_CONTROL, LocalStorage, S3Storage, create_storage
+
+HASHED = "projects/" + "a" * 64 + ".png"
+
+
+class FakeS3Client:
+    """The few boto3 S3 client calls S3Storage makes, backed by a dict."""
+
+    def __init__(self):
+        self.objects = {}
+
+    def upload_file(self, filename, bucket, key, ExtraArgs=None, Config=None):
+        with open(filename, "rb") as source:
+            self.objects[(bucket, key)] = (source.read(), ExtraArgs)
+
+    def head_object(self, Bucket, Key):
+        if (Bucket, Key) not in self.objects:
+            raise ClientError({"Error": {"Code": "404"}}, "HeadObject")
+        return {}
+
+    def delete_object(self, Bucket, Key):
+        self.objects.pop((Bucket, Key), None)
+
+    def get_paginator(self, operation):
+        client = self
+
+        class Paginator:
+            def paginate(self, Bucket, Prefix):
+                keys = sorted(key for bucket, key in client.objects if bucket == Bucket and key.startswith(Prefix))
+                # Two pages, to check that every page is read
+                yield {"Contents": [{"Key": key} for key in keys[:1]]}
+                yield {"Contents": [{"Key": key} for key in keys[1:]]}
+
+        return Paginator()
+
+    def generate_presigned_url(self, operation, Params, ExpiresIn):
+        return f"https://s3.test/{Params['Bucket']}/{Params['Key']}?expires={ExpiresIn}"
+
+
+@pytest.fixture
+def s3():
+    storage = S3Storage("bucket", prefix="/site/", presign_expires=600)
+    storage._client = FakeS3Client()
+    return storage
+
+
+def _source(tmp_path, content=b"data"):
+    source = tmp_path / "staged.part"
+    source.write_bytes(content)
+    return source
+
+
+def test_local_storage(tmp_path):
+    root = tmp_path / "uploads"
+    (root / "projects").mkdir(parents=True)
+    storage = LocalStorage(root)
+    storage.put("projects/a.png", _source(tmp_path))
+    storage.put("projects/a-320w.webp", _source(tmp_path))
+    assert storage.exists("projects/a.png")
+    assert not (tmp_path / "staged.part").exists()
+    assert sorted(storage.list("projects/a")) == ["projects/a-320w.webp", "projects/a.png"]
+    assert storage.local_path("projects/a.png") == root / "projects" / "a.png"
+    assert storage.url_for("projects/a.png") == "/uploads/projects/a.png"
+    storage.delete("projects/a.png")
+    storage.delete("projects/a.png")
+    assert not storage.exists("projects/a.png")
+
+
+def test_s3_put_sets_headers_under_the_prefix(s3, tmp_path):
+    s3.put(HASHED, _source(tmp_path, b"png"))
+    s3.put("projects/legacy.png", _source(tmp_path))
+    body, extra = s3.client.objects[("bucket", f"site/{HASHED}")]
+    assert body == b"png"
+    assert extra == {"ContentType": "image/png", "CacheControl": IMMUTABLE_CACHE_CONTROL}
+    assert s3.client.objects[("bucket", "site/projects/legacy.png")][1] == {"ContentType": "image/png"}
+    assert not (tmp_path / "staged.part").exists()
+
+
+def test_s3_exists_list_and_delete(s3, tmp_path):
+    assert not s3.exists(HASHED)
+    s3.put(HASHED, _source(tmp_path))
+    s3.put("projects/b.png", _source(tmp_path))
+    s3.put("testimonials/c.png", _source(tmp_path))
+    assert s3.exists(HASHED)
+    assert s3.list("projects/") == [HASHED, "projects/b.png"]
+    s3.delete(HASHED)
+    assert not s3.exists(HASHED)
+
+
+def test_s3_exists_raises_other_errors(s3):
+    def denied(Bucket, Key):
+        raise ClientError({"Error": {"Code": "403"}}, "HeadObject")
+
+    s3.client.head_object = denied
+    with pytest.raises(ClientError):
+        s3.exists(HASHED)
+
+
+def test_s3_urls(s3):
+    assert s3.url_for(HASHED) == f"https://s3.test/bucket/site/{HASHED}?expires=600"
+    s3.public_base_url = "https://cdn.test"
+    assert s3.url_for(HASHED) == f"https://cdn.test/site/{HASHED}"
+
+
+def test_create_storage(tmp_path, monkeypatch):
+    monkeypatch.delenv("STORAGE_BACKEND", raising=False)
+    assert isinstance(create_storage(tmp_path), LocalStorage)
+    monkeypatch.setenv("STORAGE_BACKEND", "s3")
+    monkeypatch.setenv("S3_BUCKET", "bucket")
+    monkeypatch.setenv("S3_PUBLIC_BASE_URL", "https://cdn.test/")
+    storage = create_storage(tmp_path)
+    assert (storage.bucket, storage.public_base_url) == ("bucket", "https://cdn.test")
+    monkeypatch.setenv("STORAGE_BACKEND", "ftp")
+    with pytest.raises(ValueError):
+        create_storage(tmp_path)
+
+
+def test_uploads_redirect_to_s3(s3, tmp_path, monkeypatch):
+    import server
+
+    s3.put(HASHED, _source(tmp_path))
+    monkeypatch.setattr(file_handler, "storage", s3)
+    mongo = AsyncMongoMockClient()
+    with TestClient(server.create_app(client_factory=lambda url: mongo), follow_redirects=False) as client:
+        presigned = client.get(f"/uploads/{HASHED}")
+        assert presigned.status_code == 307
+        assert presigned.headers["location"].startswith(f"https://s3.test/bucket/site/{HASHED}")
+        assert presigned.headers["cache-control"] == "private, max-age=300"
+
+        s3.public_base_url = "https://cdn.test"
+        public = client.get(f"/uploads/{HASHED}")
+        assert public.headers["location"] == f"https://cdn.test/site/{HASHED}"
+        assert public.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+
+        assert client.get("/uploads/projects//a.png").status_code == 404
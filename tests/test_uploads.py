@@ -0,0 +1,118 @@
+import asyncio
+import io
+from datetime import datetime, timedelta
+
+from PIL import Image
+
+import file_handler
+from file_handler import UPLOAD_DIR, UPLOAD_STAGING_DIR, _claim_upload, release_file, sweep_upload_claims
+
+PROJECT = {"title": "Shop", "description": "D", "category": "Web", "technologies": [], "image": ""}
+
+
+def _png(color):
+    buffer = io.BytesIO()
+    Image.new("RGB", (40, 30), color).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def _upload(client, auth, content, subfolder="projects"):
+    response = client.post(
+        "/api/admin/upload", headers=auth, data={"subfolder": subfolder},
+        files={"file": ("a.png", content, "image/png")}
+    )
+    assert response.status_code == 200, response.text
+    return response.json()["url"]
+
+
+def _stored(url):
+    return (UPLOAD_DIR / url[len("/uploads/"):]).exists()
+
+
+def test_identical_uploads_share_one_file(client, auth):
+    first = _upload(client, auth, _png((16, 17, 18)))
+    second = _upload(client, auth, _png((16, 17, 18)))
+    assert first == second
+    # Named by the SHA-256 of the content
+    assert len(first.rsplit("/", 1)[1].split(".")[0]) == 64
+    assert _stored(first)
+
+
+def test_uploads_are_staged_outside_the_served_directory(client, auth, monkeypatch):
+    seen = []
+    generate = file_handler.generate_variants
+
+    def watching(original, stem, out_dir):
+        seen.append((original.parent, out_dir.parent, sorted(UPLOAD_DIR.rglob("*.part"))))
+        return generate(original, stem, out_dir)
+
+    monkeypatch.setattr(file_handler, "generate_variants", watching)
+    url = _upload(client, auth, _png((19, 20, 21)))
+    assert seen == [(UPLOAD_STAGING_DIR, UPLOAD_STAGING_DIR, [])]
+    assert UPLOAD_DIR not in UPLOAD_STAGING_DIR.parents
+    assert list(UPLOAD_STAGING_DIR.iterdir()) == []
+    assert _stored(url)
+    assert client.get(url).status_code == 200
+
+
+def _expire_claim(client, db, url):
+    client.portal.call(
+        db.upload_claims.update_one, {"_id": url}, {"$set": {"expires_at": datetime.utcnow() - timedelta(seconds=1)}}
+    )
+
+
+def test_release_keeps_claimed_uploads(client, auth, db):
+    url = _upload(client, auth, _png((1, 2, 3)))
+    client.portal.call(release_file, db, url)
+    assert _stored(url)
+
+    _expire_claim(client, db, url)
+    client.portal.call(release_file, db, url)
+    assert not _stored(url)
+    assert client.portal.call(db.upload_claims.find_one, {"_id": url}) is None
+
+
+def test_release_skips_files_another_release_is_deleting(client, auth, db):
+    url = _upload(client, auth, _png((4, 5, 6)))
+    lease = datetime.utcnow() + timedelta(seconds=60)
+    client.portal.call(
+        db.upload_claims.replace_one, {"_id": url}, {"deleting": True, "expires_at": lease}
+    )
+    assert client.portal.call(file_handler._release, db, url) is False
+    assert _stored(url)
+
+
+def test_claim_waits_for_a_release_in_progress(client, db):
+    url = "/uploads/projects/pending.png"
+    lease = datetime.utcnow() + timedelta(seconds=60)
+    client.portal.call(db.upload_claims.insert_one, {"_id": url, "deleting": True, "expires_at": lease})
+
+    async def run():
+        claim = asyncio.create_task(_claim_upload(db, url))
+        await asyncio.sleep(0.1)
+        assert not claim.done()
+        await db.upload_claims.delete_one({"_id": url, "deleting": True})
+        await asyncio.wait_for(claim, timeout=1)
+
+    client.portal.call(run)
+    claim = client.portal.call(db.upload_claims.find_one, {"_id": url})
+    assert "deleting" not in claim
+    assert claim["expires_at"] > datetime.utcnow()
+
+
+def test_sweep_deletes_expired_unreferenced_uploads(client, auth, db):
+    orphan = _upload(client, auth, _png((7, 8, 9)))
+    used = _upload(client, auth, _png((10, 11, 12)))
+    fresh = _upload(client, auth, _png((13, 14, 15)))
+    client.post("/api/admin/projects", json={**PROJECT, "image": used}, headers=auth)
+    # A claim left behind as if the document was saved by an older worker
+    client.portal.call(_claim_upload, db, used)
+    _expire_claim(client, db, orphan)
+    _expire_claim(client, db, used)
+
+    assert client.portal.call(sweep_upload_claims, db) == 1
+    assert not _stored(orphan)
+    assert _stored(used)
+    assert _stored(fresh)
+    remaining = client.portal.call(db.upload_claims.distinct, "_id")
+    assert remaining == [fresh]
@@ -0,0 +1,67 @@
+import io
+
+import pytest
+from PIL import Image
+
+import routes.admin
+
+PROJECT = {"title": "Shop", "description": "D", "category": "Web", "technologies": [], "image": ""}
+TESTIMONIAL = {"name": "N", "role": "R", "content": "C", "rating": 5, "avatar": ""}
+
+
+def _png(width, height, color="red"):
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), color).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def _upload(client, auth, subfolder, content):
+    response = client.post(
+        "/api/admin/upload", headers=auth, data={"subfolder": subfolder},
+        files={"file": ("a.png", content, "image/png")}
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_upload_returns_variants_no_wider_than_the_original(client, auth):
+    upload = _upload(client, auth, "projects", _png(800, 400))
+    assert set(upload["variants"]) == {"320", "640", "800"}
+    assert client.get(upload["variants"]["320"]).status_code == 200
+
+
+def test_documents_store_their_variants(client, auth):
+    upload = _upload(client, auth, "projects", _png(700, 300))
+    project = client.post("/api/admin/projects", json={**PROJECT, "image": upload["url"]}, headers=auth).json()
+    assert project["image_variants"] == upload["variants"]
+    assert client.get("/api/projects").json()[0]["image_variants"] == upload["variants"]
+
+
+@pytest.mark.parametrize("path, payload", [
+    ("/api/admin/projects/missing", {**PROJECT, "image": "/uploads/projects/x.png"}),
+    ("/api/admin/testimonials/missing", {**TESTIMONIAL, "avatar": "/uploads/testimonials/x.png"}),
+])
+def test_update_of_missing_document_builds_no_variants(client, auth, monkeypatch, path, payload):
+    async def fail(file_path):
+        raise AssertionError("variants built for a missing document")
+
+    monkeypatch.setattr(routes.admin, "get_image_variants", fail)
+    assert client.put(path, json=payload, headers=auth).status_code == 404
+
+
+def test_update_with_unchanged_image_reuses_variants(client, auth, monkeypatch):
+    upload = _upload(client, auth, "testimonials", _png(400, 400, "blue"))
+    testimonial = client.post(
+        "/api/admin/testimonials", json={**TESTIMONIAL, "avatar": upload["url"]}, headers=auth
+    ).json()
+
+    async def fail(file_path):
+        raise AssertionError("variants rebuilt for an unchanged avatar")
+
+    monkeypatch.setattr(routes.admin, "get_image_variants", fail)
+    updated = client.put(
+        f"/api/admin/testimonials/{testimonial['id']}",
+        json={**TESTIMONIAL, "avatar": upload["url"], "role": "CTO"}, headers=auth
+    ).json()
+    assert updated["role"] == "CTO"
+    assert updated["avatar_variants"] == upload["variants"]